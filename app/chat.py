@@ -1,65 +1,37 @@
 # app/chat.py
 import os
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import sys
+import argparse
 
-# === 1. LOAD DOKUMEN (otomatis ubah list → string) ===
-def load_documents(folder):
-    docs = {}
-    if not os.path.exists(folder):
-        print(f"⚠️ Folder {folder} tidak ditemukan!")
-        return docs
+# Modul search ada di folder src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from searcher import VSMSearcher
+from corpus import load_texts
+from profiling import span, profile_session
 
-    for filename in os.listdir(folder):
-        if filename.endswith(".txt"):
-            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
-                text = f.read().strip()
-                # Kalau file berisi token yang dipisah spasi atau koma, ubah jadi string
-                if text.startswith("[") and text.endswith("]"):  # tanda list
-                    text = text.replace("[", "").replace("]", "").replace("'", "").replace(",", "")
-                docs[filename] = text
-    return docs
+# === 1. LOAD DOKUMEN ===
+# load_texts diimpor dari corpus.py: file berisi list token otomatis diubah jadi string.
 
 
-# === 2. VECTOR SPACE MODEL SEARCH ===
-def vsm_search(query, docs, k=3):
-    """Cari top-k dokumen paling relevan dengan cosine similarity"""
-    if len(docs) == 0:
-        print("⚠️ Tidak ada dokumen untuk diproses.")
-        return []
-
-    # pastikan semua dokumen adalah string
-    clean_docs = [str(v) for v in docs.values()]
-
-    vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(clean_docs)
-    query_vec = vectorizer.transform([query])
-    cosine_sim = cosine_similarity(query_vec, tfidf_matrix).flatten()
-    ranked_indices = cosine_sim.argsort()[::-1]
-
-    doc_names = list(docs.keys())
-    results = [(doc_names[i], cosine_sim[i]) for i in ranked_indices[:k]]
-    return results
-
-
-# === 3. TEMPLATE JAWABAN ===
-def generate_response(query, results, docs):
+# === 2. TEMPLATE JAWABAN ===
+def generate_response(query, results, searcher):
     if not results:
         return f"❌ Tidak ditemukan dokumen relevan untuk '{query}'."
 
     response = f"🔍 Berdasarkan pencarian untuk '{query}', berikut {len(results)} dokumen teratas:\n\n"
     for i, (doc, score) in enumerate(results, 1):
-        snippet = docs[doc][:120].replace("\n", " ")
+        snippet = searcher.snippet(doc, query)
         response += f"{i}. {doc:<25} (cosine: {score:.3f}) — {snippet}\n"
     response += "\n🧠 Sistem menampilkan hasil paling relevan berdasarkan kesamaan deskripsi teks."
     return response
 
 
-# === 4. ANTARMUKA CHAT ===
+# === 3. ANTARMUKA CHAT ===
 def chat_interface():
     data_folder = "data/processed"
-    docs = load_documents(data_folder)
+    # Fit sekali saat startup (atau load dari data/index), refit otomatis jika file berubah
+    with span("chat.startup"):
+        searcher = VSMSearcher(data_folder, index_dir="data/index", loader=load_texts)
 
     print("=" * 60)
     print("🤖 Mini Search Assistant (VSM-based)")
@@ -69,15 +41,24 @@ def chat_interface():
     while True:
         query = input("\n🗨️  Query: ").strip()
         if query.lower() == "exit":
+            print(f"ℹ️ {searcher.cache.summary()}")
             print("👋 Terima kasih! Program selesai.")
+            searcher.close()
             break
 
-        results = vsm_search(query, docs, k=3)
-        response = generate_response(query, results, docs)
+        with span("chat.search"):
+            results = searcher.search(query, k=3)
+        with span("chat.response"):
+            response = generate_response(query, results, searcher)
         print("\n" + response)
         print("-" * 60)
 
 
-# === 5. MAIN ===
+# === 4. MAIN ===
 if __name__ == "__main__":
-    chat_interface()
+    parser = argparse.ArgumentParser(description="Mini Search Assistant (chat)")
+    parser.add_argument("--profile", action="store_true", help="Tampilkan breakdown waktu per tahap saat keluar")
+    parser.add_argument("--profile-out", default=None, help="Simpan hasil cProfile (.pstats) ke file ini")
+    args = parser.parse_args()
+    with profile_session(args.profile, args.profile_out):
+        chat_interface()
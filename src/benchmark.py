@@ -0,0 +1,246 @@
+# src/benchmark.py
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import numpy as np
+import scipy
+import sklearn
+from synthetic_corpus import SyntheticCorpus
+from index_store import build_index, load_index
+from search_engine import boolean_search
+
+MODELS = ("boolean", "tfidf", "bm25")
+
+
+# === 1. UTIL PENGUKURAN ===
+def latency_summary(latencies_s):
+    """Ringkasan latensi per query (ms): mean, p50, p90, p99, max, dan QPS satu thread."""
+    lat = np.asarray(latencies_s) * 1000
+    p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+    return {
+        "queries": len(lat),
+        "mean_ms": round(float(lat.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(lat.max()), 4),
+        "qps": round(len(lat) / (lat.sum() / 1000), 1) if lat.sum() else 0.0,
+    }
+
+
+def peak_memory(fn):
+    """Jalankan fn sekali lagi di bawah tracemalloc: (hasil, puncak alokasi dalam MB)."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / 2 ** 20, 2)
+
+
+def dir_size_mb(path):
+    total = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return round(total / 2 ** 20, 2)
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "scikit_learn": sklearn.__version__,
+    }
+
+
+def skip_reason(error):
+    """Alasan singkat tahap dilewati; untuk LookupError NLTK sebutkan resource yang hilang."""
+    message = re.sub(r"\x1b\[[0-9;]*m", "", str(error))
+    missing = re.search(r"Resource\s+'?([^'\s]+)'?\s+not found", message)
+    if isinstance(error, LookupError) and missing:
+        name = missing.group(1)
+        return f"{type(error).__name__}: resource NLTK '{name}' tidak ditemukan (jalankan nltk.download('{name}'))"
+    lines = [line.strip() for line in message.splitlines() if line.strip().strip("*")]
+    return f"{type(error).__name__}: {lines[0] if lines else repr(error)}"
+
+
+# === 2. TAHAP BENCHMARK ===
+def bench_preprocess(corpus, sample):
+    """Throughput preprocess_document (cleaning, stopword, stemming) pada `sample` dokumen mentah."""
+    try:
+        from preprocess import preprocess_document, get_stop_words
+        get_stop_words()
+    except (ImportError, LookupError) as e:
+        return {"skipped": skip_reason(e)}
+
+    texts = []
+    for _, text in corpus.iter_raw_docs():
+        texts.append(text)
+        if len(texts) >= sample:
+            break
+    start = time.perf_counter()
+    n_tokens = sum(len(preprocess_document(text)) for text in texts)
+    elapsed = time.perf_counter() - start
+    n_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    return {
+        "docs": len(texts),
+        "seconds": round(elapsed, 4),
+        "docs_per_s": round(len(texts) / elapsed, 1),
+        "tokens_per_s": round(n_tokens / elapsed, 1),
+        "mb_per_s": round(n_bytes / 2 ** 20 / elapsed, 3),
+    }
+
+
+def bench_build(iter_docs, index_dir, memory=True):
+    """
+    Waktu build index lengkap (TF-IDF, BM25 stats, postings, WAND) ke disk + puncak memori.
+    iter_docs() mengembalikan generator (nama, list token) baru: korpus di-stream ke
+    build_index tanpa dimuat seluruhnya (waktu & memori termasuk membangkitkan dokumen per chunk).
+    """
+    start = time.perf_counter()
+    meta = build_index(iter_docs(), index_dir)
+    elapsed = time.perf_counter() - start
+    result = {
+        "seconds": round(elapsed, 4),
+        "docs_per_s": round(meta["n_docs"] / elapsed, 1),
+        "n_features": meta["n_features"],
+        "n_terms": meta["n_terms"],
+        "disk_mb": dir_size_mb(index_dir),
+    }
+    if memory:
+        _, result["peak_mb"] = peak_memory(lambda: build_index(iter_docs(), index_dir))
+    return result
+
+
+def bench_queries(index, corpus, n_queries, models=MODELS, warmup=5):
+    """Latensi per query untuk tiap jalur pencarian (tanpa cache hasil)."""
+    queries = corpus.queries(n_queries)
+    results = {}
+    for model in models:
+        start = time.perf_counter()
+        if model == "boolean":
+            postings = index.postings
+            expander = postings.expander
+            model_queries = corpus.boolean_queries(n_queries)
+            search = lambda q: boolean_search(q, postings, expander)
+        elif model == "tfidf":
+            model_queries = queries
+            search = lambda q: index.vsm_search(q, 10)
+        else:
+            bm25 = index.bm25()
+            model_queries = queries
+            search = lambda q: bm25.search(q, 10)
+        setup_s = time.perf_counter() - start
+
+        for query in model_queries[:warmup]:
+            search(query)
+        latencies = []
+        for query in model_queries:
+            t0 = time.perf_counter()
+            search(query)
+            latencies.append(time.perf_counter() - t0)
+        results[model] = {"setup_s": round(setup_s, 4), **latency_summary(latencies)}
+    return results
+
+
+def run_size(n_docs, args):
+    print(f"\n=== {n_docs} dokumen ===")
+    start = time.perf_counter()
+    corpus = SyntheticCorpus(n_docs, args.mean_len, seed=args.seed)
+    # Satu pass streaming untuk statistik korpus; dokumen tidak disimpan di memori
+    n_tokens = sum(len(tokens) for _, tokens in corpus.iter_token_docs())
+    generate_s = time.perf_counter() - start
+    print(f"Korpus: {n_tokens} token, vocabulary {len(corpus.vocab)} ({generate_s:.2f} s)")
+
+    result = {"n_docs": n_docs, "n_tokens": n_tokens, "vocab_size": len(corpus.vocab),
+              "generate_s": round(generate_s, 4)}
+    result["preprocess"] = bench_preprocess(corpus, min(n_docs, args.preprocess_sample))
+    print(f"Preprocess: {result['preprocess']}")
+
+    index_dir = tempfile.mkdtemp(prefix="stki_bench_")
+    try:
+        result["build"] = bench_build(corpus.iter_token_docs, index_dir, memory=not args.no_memory)
+        print(f"Build index: {result['build']}")
+        result["query"] = bench_queries(load_index(index_dir), corpus, args.queries, args.models)
+        for model, summary in result["query"].items():
+            print(f"Query {model:<8}: p50={summary['p50_ms']} ms | p99={summary['p99_ms']} ms | "
+                  f"qps={summary['qps']}")
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return result
+
+
+# === 3. PERBANDINGAN ANTAR VERSI ===
+def compare(current, baseline, threshold=0.10):
+    """Bandingkan metrik waktu dengan hasil sebelumnya; rasio > 1 + threshold ditandai regresi."""
+    base_by_size = {r["n_docs"]: r for r in baseline["results"]}
+    regressions = 0
+    print(f"\n=== Perbandingan dengan {baseline['environment'].get('git_commit')} ===")
+    for result in current["results"]:
+        base = base_by_size.get(result["n_docs"])
+        if base is None:
+            continue
+        pairs = [("build.seconds", result["build"]["seconds"], base["build"]["seconds"])]
+        for model, summary in result["query"].items():
+            if model in base.get("query", {}):
+                for metric in ("p50_ms", "p99_ms"):
+                    pairs.append((f"{model}.{metric}", summary[metric], base["query"][model][metric]))
+        for name, new, old in pairs:
+            ratio = new / old if old else float("inf")
+            flag = "⚠️ regresi" if ratio > 1 + threshold else ""
+            regressions += bool(flag)
+            print(f"{result['n_docs']:>8} | {name:<18} {old:>10.4f} -> {new:>10.4f}  (x{ratio:.2f}) {flag}")
+    return regressions
+
+
+# === 4. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Mini Search Engine pada korpus sintetis")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000],
+                        help="Ukuran korpus (jumlah dokumen), mis. 1000 10000 100000 1000000")
+    parser.add_argument("--mean-len", type=int, default=60, help="Rata-rata token per dokumen")
+    parser.add_argument("--queries", type=int, default=200, help="Jumlah query per model")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--preprocess-sample", type=int, default=2_000,
+                        help="Jumlah dokumen mentah untuk mengukur throughput preprocessing")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Lewati pengukuran puncak memori (build kedua di bawah tracemalloc)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="benchmarks/results.json", help="File output JSON")
+    parser.add_argument("--compare", default=None, help="File JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Batas kenaikan relatif yang dianggap regresi saat --compare (default 10%%)")
+    args = parser.parse_args()
+
+    report = {
+        "environment": environment(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "threshold")},
+        "results": [run_size(n, args) for n in args.sizes],
+    }
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Hasil benchmark tersimpan di {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,138 @@
+# src/bm25.py
+
+import numpy as np
+import scipy.sparse as sp
+from ranking import ranked_results
+from term_dict import TermDictionary
+from dynamic_pruning import WandIndex
+from profiling import span
+from corpus import feature_tokens
+
+
+# === 1. BM25 BERBASIS MATRIKS SPARSE ===
+def bm25_weights(tf, idf, doc_len, avgdl, k1, b):
+    """CSR bobot BM25 dari matriks TF mentah (O(nnz)); struktur indices/indptr sama dengan tf."""
+    rows = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+    norm = k1 * (1 - b + b * doc_len / avgdl) if avgdl else np.full(tf.shape[0], k1)
+    data = idf[tf.indices] * tf.data * (k1 + 1) / (tf.data + norm[rows])
+    return sp.csr_matrix((data, tf.indices, tf.indptr), shape=tf.shape)
+
+
+class BM25Index:
+    """
+    BM25 Okapi dengan statistik yang dihitung sekali:
+    - tf_matrix : CSR dokumen x term (hitungan mentah)
+    - vocabulary: term -> kolom (TermDictionary, atau dict apa pun dengan .get)
+    - idf, doc_len, avgdl
+    - weights   : CSR bobot BM25 per (dokumen, term) untuk k1/b aktif
+
+    Skor satu query = weights @ q, dan skor banyak query = Q @ weights.T,
+    masing-masing satu operasi sparse. Rumus (termasuk epsilon untuk IDF
+    negatif) sama dengan rank_bm25.BM25Okapi.
+    """
+
+    def __init__(self, tf_matrix, vocabulary, doc_names, k1=1.5, b=0.75, epsilon=0.25, tokenize=feature_tokens,
+                 df=None, n_docs=None, avgdl=None):
+        self.tf_matrix = sp.csr_matrix(tf_matrix, dtype=np.float64)
+        self.vocabulary = vocabulary
+        self.doc_names = list(doc_names)
+        self.tokenize = tokenize
+        self.epsilon = epsilon
+
+        # df / n_docs / avgdl bisa diberikan dari luar (statistik global saat index di-shard)
+        self.doc_len = np.asarray(self.tf_matrix.sum(axis=1)).ravel()
+        if avgdl is None:
+            avgdl = self.doc_len.mean() if len(self.doc_len) else 0.0
+        self.avgdl = avgdl
+        self.idf = self._compute_idf(df, n_docs)
+        self.set_params(k1, b)
+
+    @classmethod
+    def from_documents(cls, docs, k1=1.5, b=0.75, epsilon=0.25, tokenize=feature_tokens):
+        """
+        docs: dict {nama file: teks} atau {nama file: list token}. Teks (dan list token
+        yang digabung) dianalisis dengan tokenize yang sama seperti query dan index di disk.
+        """
+        vocabulary = {}
+        indptr, indices, data = [0], [], []
+        for value in docs.values():
+            tokens = tokenize(" ".join(value) if isinstance(value, list) else value)
+            counts = {}
+            for token in tokens:
+                tid = vocabulary.setdefault(token, len(vocabulary))
+                counts[tid] = counts.get(tid, 0) + 1
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        # ID sementara (urutan kemunculan) -> term ID di TermDictionary terurut
+        terms = sorted(vocabulary)
+        remap = np.empty(len(terms), dtype=np.int32)
+        remap[[vocabulary[t] for t in terms]] = np.arange(len(terms), dtype=np.int32)
+        indices = remap[np.asarray(indices, dtype=np.int64)]
+        tf_matrix = sp.csr_matrix((data, indices, indptr), shape=(len(docs), len(terms)))
+        tf_matrix.sort_indices()
+        return cls(tf_matrix, TermDictionary.build(terms), docs.keys(), k1=k1, b=b, epsilon=epsilon,
+                   tokenize=tokenize)
+
+    def _compute_idf(self, df=None, n_docs=None):
+        if n_docs is None:
+            n_docs = self.tf_matrix.shape[0]
+        if df is None:
+            df = np.bincount(self.tf_matrix.indices, minlength=self.tf_matrix.shape[1])
+        idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+        # Term yang muncul di > setengah korpus: IDF negatif diganti epsilon * rata-rata IDF
+        eps = self.epsilon * idf.mean() if len(idf) else 0.0
+        idf[idf < 0] = eps
+        return idf
+
+    def set_params(self, k1=None, b=None):
+        """Ganti k1/b lalu hitung ulang bobot (O(nnz), tanpa tokenisasi ulang)."""
+        if k1 is not None:
+            self.k1 = k1
+        if b is not None:
+            self.b = b
+        self.weights = bm25_weights(self.tf_matrix, self.idf, self.doc_len, self.avgdl, self.k1, self.b)
+        # WandIndex bergantung pada bobot k1/b: dibangun ulang saat pertama dipakai
+        self._wand = None
+        return self
+
+    # === 2. QUERY ===
+    def query_matrix(self, queries):
+        """List query -> CSR (jumlah query x term), hitungan token yang dikenal."""
+        indptr, indices, data = [0], [], []
+        for query in queries:
+            counts = {}
+            for token in self.tokenize(query.lower()):
+                tid = self.vocabulary.get(token)
+                if tid is not None:
+                    counts[tid] = counts.get(tid, 0) + 1
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        return sp.csr_matrix((data, indices, indptr), shape=(len(queries), self.tf_matrix.shape[1]), dtype=np.float64)
+
+    def get_scores(self, query):
+        return self.get_batch_scores([query])[0]
+
+    def get_batch_scores(self, queries):
+        """Skor semua dokumen untuk banyak query sekaligus: (jumlah query x dokumen)."""
+        with span("bm25.query_matrix"):
+            query_matrix = self.query_matrix(queries)
+        with span("bm25.dot"):
+            return (query_matrix @ self.weights.T).toarray()
+
+    def search(self, query, k=3):
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries, k=3):
+        return ranked_results(self.get_batch_scores(queries), self.doc_names, k)
+
+    def wand(self):
+        """WandIndex di atas bobot BM25 aktif (skor maksimum per term untuk k1/b ini), dibangun sekali."""
+        if self._wand is None:
+            self._wand = WandIndex.from_matrix(self.weights, self.doc_names)
+        return self._wand
+
+    def search_wand(self, query, k=3):
+        """Top-k dengan WAND: (hasil, jumlah dokumen yang dihitung penuh)."""
+        return self.wand().search(self.query_matrix([query]), k)
@@ -1,23 +1,20 @@
-import os
-import re
+import numpy as np
 from collections import defaultdict
+from postings import CompactIndex, set_index_nbytes
+from query_parser import run_query, ArrayBackend, SetBackend
+from positional import PositionalIndex
+from term_dict import TermDictionary
+from corpus import load_documents
 
 # === 1. LOAD DOKUMEN YANG SUDAH DIPROSES ===
-def load_processed_docs(folder):
-    docs = {}
-    if not os.path.exists(folder):
-        print(f"Folder {folder} tidak ditemukan!")
-        return docs
-
-    for filename in os.listdir(folder):
-        if filename.endswith(".txt"):
-            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
-                docs[filename] = f.read().split()
-    return docs
+# load_documents diimpor dari corpus.py (list token, sama untuk semua model).
 
 
 # === 2. BANGUN VOCABULARY & INVERTED INDEX ===
-def build_inverted_index(docs):
+def build_inverted_index(docs, positional=False):
+    # positional=True: juga simpan posisi token (terkompresi) untuk query frasa & NEAR
+    if positional:
+        return PositionalIndex.from_docs(docs)
     inverted_index = defaultdict(set)
     for doc_id, tokens in docs.items():
         for token in tokens:
@@ -27,45 +24,35 @@ def build_inverted_index(docs):
 
 # === 3. INCIDENCE MATRIX (OPSIONAL, UNTUK DOKUMENTASI) ===
 def build_incidence_matrix(docs, vocab):
-    matrix = {}
-    for term in vocab:
-        matrix[term] = [1 if term in tokens else 0 for tokens in docs.values()]
-    return matrix
+    """
+    Matriks insiden term x dokumen (0/1). Baris = term ID di kamus term
+    (TermDictionary, atau dibangun dari list vocab terurut).
+    Mengembalikan (kamus term, matriks).
+    """
+    term_ids = vocab if isinstance(vocab, TermDictionary) else TermDictionary.build(vocab)
+    matrix = np.zeros((len(term_ids), len(docs)), dtype=np.uint8)
+    for j, tokens in enumerate(docs.values()):
+        rows = [term_ids.get(t) for t in set(tokens)]
+        matrix[[i for i in rows if i is not None], j] = 1
+    return term_ids, matrix
 
 
 # === 4. EVALUASI BOOLEAN QUERY ===
+# Query di-parse menjadi AST (prioritas NEAR > NOT > AND > OR, mendukung kurung
+# dan frasa "a b") lalu dieksekusi oleh planner di query_parser.py.
 def boolean_query(query, index, all_docs):
-    terms = re.findall(r'\w+|AND|OR|NOT', query.upper())
-
-    result_stack = []
-    operator_stack = []
-
-    def apply_operator(op):
-        if op == 'AND':
-            b = result_stack.pop()
-            a = result_stack.pop()
-            result_stack.append(a & b)
-        elif op == 'OR':
-            b = result_stack.pop()
-            a = result_stack.pop()
-            result_stack.append(a | b)
-        elif op == 'NOT':
-            a = result_stack.pop()
-            result_stack.append(all_docs - a)
-
-    for term in terms:
-        if term in ('AND', 'OR', 'NOT'):
-            operator_stack.append(term)
-        else:
-            term = term.lower()
-            result_stack.append(set(index.get(term, set())))
-
-            # Jika sudah ada operator, langsung terapkan
-            if operator_stack:
-                op = operator_stack.pop()
-                apply_operator(op)
-
-    return result_stack.pop() if result_stack else set()
+    # Index kompak: operasi langsung di array doc ID, hasil dikonversi ke nama file
+    if isinstance(index, CompactIndex):
+        return set(index.to_names(boolean_query_ids(query, index)))
+
+    positions = index if isinstance(index, PositionalIndex) else None
+    backend = SetBackend(lambda term: set(index.get(term, set())), all_docs, positions)
+    return run_query(query, backend)
+
+
+def boolean_query_ids(query, index):
+    """Seperti boolean_query, tetapi di atas CompactIndex dan mengembalikan doc ID terurut."""
+    return run_query(query, ArrayBackend(index.lookup, index.n_docs))
 
 
 # === 5. HITUNG PRECISION & RECALL ===
@@ -82,7 +69,7 @@ def evaluate(query, retrieved, relevant):
 # === 6. MAIN PROGRAM ===
 if __name__ == "__main__":
     folder = "data/processed"  # pastikan ini benar
-    docs = load_processed_docs(folder)
+    docs = load_documents(folder)
 
     print(f"Total dokumen: {len(docs)}")
 
@@ -90,7 +77,7 @@ if __name__ == "__main__":
         print("⚠️ Tidak ada dokumen yang ditemukan. Jalankan preprocess.py dulu.")
         exit()
 
-    inverted_index = build_inverted_index(docs)
+    inverted_index = build_inverted_index(docs, positional=True)
     all_docs = set(docs.keys())
 
     # tampilkan contoh index
@@ -98,11 +85,18 @@ if __name__ == "__main__":
     for term in list(inverted_index.keys())[:5]:
         print(f"{term} -> {list(inverted_index[term])}")
 
+    # Versi kompak: doc ID integer dalam array NumPy
+    compact_index = CompactIndex.from_docs(docs)
+    print(f"\nMemori postings: set={set_index_nbytes(inverted_index)} byte | "
+          f"array={compact_index.nbytes()} byte | varint={compact_index.nbytes(compressed=True)} byte")
+    print(f"Kamus term (front-coded): {compact_index.terms.nbytes} byte untuk {len(compact_index.terms)} term")
+
     # === 7. QUERY UJI COBA (DISUSUN ULANG AGAR KATA ADA DI KORPUS) ===
     queries = [
         ("pedang AND hutan", {"buku_fantasi.txt"}),
         ("cinta OR motivasi", {"buku_romansa.txt", "buku_motivasi.txt"}),
         ("NOT horor", set(all_docs) - {"buku_horor.txt"}),
+        ("pedang NEAR/5 hutan", {"buku_fantasi.txt"}),
     ]
 
     print("\n=== HASIL PENGUJIAN QUERY ===")
@@ -116,7 +110,9 @@ if __name__ == "__main__":
         print(f"Precision: {precision:.2f}, Recall: {recall:.2f}")
 
         print("Penjelasan logika Boolean:")
-        if "AND" in q:
+        if "NEAR" in q:
+            print("Operator NEAR/k → kedua kata muncul berjarak paling jauh k kata (index posisional).")
+        elif "AND" in q:
             print("Operator AND → irisan (∩) antara dua set dokumen.")
         elif "OR" in q:
             print("Operator OR → gabungan (∪) dua set dokumen.")
@@ -0,0 +1,143 @@
+# src/corpus.py
+
+import os
+import re
+import json
+import mmap
+import argparse
+
+# Header dokumen di file multi-dokumen: satu baris "### nama_dokumen" lalu isi dokumen
+DOC_HEADER = b"### "
+
+
+# === 1. NORMALISASI (satu aturan untuk semua model) ===
+def normalize_text(text):
+    """
+    Huruf kecil + spasi dirapikan. File yang berisi list token Python
+    ("['pedang', 'hutan']") diubah jadi teks biasa.
+    """
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        text = text.replace("[", " ").replace("]", " ").replace("'", " ").replace('"', " ").replace(",", " ")
+    return text.lower()
+
+
+def to_tokens(text):
+    return normalize_text(text).split()
+
+
+# Tokenizer bawaan TfidfVectorizer: satu analyzer untuk fitur TF-IDF & BM25 (index di disk maupun di memori)
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def feature_tokens(text):
+    """Token fitur TF-IDF/BM25: huruf kecil, kata 2+ karakter (sama dengan TfidfVectorizer())."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+# === 2. SUMBER DOKUMEN (streaming, satu dokumen di memori pada satu waktu) ===
+def iter_directory(folder, ext=".txt"):
+    """Satu file = satu dokumen, urut nama file."""
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith(ext):
+            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
+                yield filename, f.read()
+
+
+def iter_jsonl(path, id_field="id", text_field="text"):
+    """
+    Satu baris JSON = satu dokumen, dibaca baris per baris (buffered).
+    Field teks boleh string atau list token; tanpa id dipakai nomor baris.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            name = record.get(id_field)
+            # id 0 atau "" tetap id yang sah; nomor baris hanya jika field tidak ada / null
+            name = f"line_{lineno:07d}" if name is None else str(name)
+            text = record.get(text_field, "")
+            yield name, " ".join(text) if isinstance(text, list) else text
+
+
+def iter_multidoc(path, header=DOC_HEADER):
+    """
+    File besar berisi banyak dokumen, dipisah baris header ("### nama").
+    File di-memory-map: hanya potongan satu dokumen yang di-decode sekaligus,
+    sehingga file yang lebih besar dari RAM tetap bisa dibaca.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    pattern = re.compile(rb"^" + re.escape(header) + rb"[ \t]*(\S[^\r\n]*?)[ \t]*\r?$", re.M)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        name, start = None, 0
+        for match in pattern.finditer(mm):
+            if name is not None or mm[:match.start()].strip():
+                # Teks sebelum header pertama (jika ada) dianggap dokumen bernama file itu
+                yield name or os.path.basename(path), mm[start:match.start()].decode("utf-8")
+            name, start = match.group(1).decode("utf-8"), match.end()
+        if name is not None or mm[start:].strip():
+            yield name or os.path.basename(path), mm[start:].decode("utf-8")
+
+
+def iter_documents(source, **options):
+    """
+    Generator (nama dokumen, teks mentah) dari:
+    - folder      : satu file .txt per dokumen
+    - *.jsonl     : satu dokumen JSON per baris (opsi id_field, text_field)
+    - file lain   : file multi-dokumen dengan header "### nama"
+    """
+    if os.path.isdir(source):
+        return iter_directory(source, **options)
+    if source.endswith((".jsonl", ".ndjson")):
+        return iter_jsonl(source, **options)
+    return iter_multidoc(source, **options)
+
+
+def iter_token_docs(source, skip_empty=False, **options):
+    """Generator (nama dokumen, list token) yang sudah dinormalisasi."""
+    for name, text in iter_documents(source, **options):
+        tokens = to_tokens(text)
+        if tokens or not skip_empty:
+            yield name, tokens
+
+
+# === 3. DICT DOKUMEN (untuk kode yang butuh seluruh korpus) ===
+def _exists(source):
+    if os.path.exists(source):
+        return True
+    print(f"⚠️ Folder {source} tidak ditemukan!")
+    return False
+
+
+def load_documents(source, skip_empty=False):
+    """Dict {nama dokumen: list token}."""
+    if not _exists(source):
+        return {}
+    return dict(iter_token_docs(source, skip_empty=skip_empty))
+
+
+def load_texts(source, skip_empty=False):
+    """Dict {nama dokumen: teks ternormalisasi} untuk model yang menerima string (TF-IDF, BM25)."""
+    if not _exists(source):
+        return {}
+    return {name: " ".join(tokens) for name, tokens in iter_token_docs(source, skip_empty=skip_empty)}
+
+
+# === 4. MAIN: STATISTIK KORPUS (streaming) ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baca korpus secara streaming dan tampilkan statistiknya")
+    parser.add_argument("source", nargs="?", default="data/processed", help="Folder, file .jsonl, atau file multi-dokumen")
+    parser.add_argument("--show", type=int, default=3, help="Jumlah contoh dokumen yang ditampilkan")
+    args = parser.parse_args()
+
+    if not _exists(args.source):
+        exit()
+    n_docs = n_tokens = 0
+    for name, tokens in iter_token_docs(args.source):
+        if n_docs < args.show:
+            print(f"{name:<25} | {' '.join(tokens)[:80]}")
+        n_docs += 1
+        n_tokens += len(tokens)
+    print(f"\nTotal dokumen: {n_docs} | Total token: {n_tokens}")
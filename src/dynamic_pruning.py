@@ -0,0 +1,140 @@
+# src/dynamic_pruning.py
+
+import heapq
+import numpy as np
+import scipy.sparse as sp
+
+# Toleransi pembulatan float saat membandingkan batas atas dengan threshold
+EPS = 1e-12
+
+
+# === 1. POSTINGS BERBOBOT PER TERM + SKOR MAKSIMUM ===
+class WandIndex:
+    """
+    Postings per term (doc ID terurut + bobot) beserta skor maksimum tiap term.
+    Top-k dihitung document-at-a-time dengan WAND: dokumen yang jumlah batas
+    atasnya tidak bisa melewati skor ke-k saat ini dilompati tanpa dihitung.
+    Bobot = baris TF-IDF (l2-normalized) atau bobot BM25; skor = q · bobot.
+    Bobot int8 (lihat quantize.py): scale = skala per term, max_weights tetap
+    dalam satuan asli.
+    """
+
+    def __init__(self, offsets, doc_ids, weights, doc_names, max_weights=None, scale=None):
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.doc_names = doc_names
+        self.scale = scale
+        if len(weights) and np.min(weights) < 0:
+            raise ValueError("WAND membutuhkan bobot non-negatif.")
+        if max_weights is None:
+            max_weights = np.zeros(len(offsets) - 1)
+            nonempty = np.diff(offsets) > 0
+            max_weights[nonempty] = np.maximum.reduceat(weights, offsets[:-1][nonempty])
+        self.max_weights = max_weights
+
+    @classmethod
+    def from_matrix(cls, weight_matrix, doc_names):
+        """weight_matrix: sparse dokumen x term (TF-IDF atau BM25Index.weights)."""
+        by_term = sp.csc_matrix(weight_matrix)
+        by_term.sort_indices()
+        return cls(by_term.indptr, by_term.indices, by_term.data, list(doc_names))
+
+    def search(self, query_vector, k=3):
+        """
+        query_vector: sparse 1 x term (bobot query). Mengembalikan
+        (hasil [(nama dokumen, skor)], jumlah dokumen yang benar-benar dihitung).
+        Urutan hasil sama dengan penilaian penuh + ranking.top_k.
+        """
+        if k <= 0:
+            return [], 0
+        query_vector = sp.csr_matrix(query_vector)
+        cursors = []
+        for term, q_weight in zip(query_vector.indices, query_vector.data):
+            start, end = self.offsets[term], self.offsets[term + 1]
+            if end > start and q_weight > 0:
+                # Skala int8 dilipat ke bobot query: skor kursor = (q * skala) * bobot int8
+                scaled = q_weight * self.scale[term] if self.scale is not None else q_weight
+                cursors.append(_Cursor(self.doc_ids[start:end], self.weights[start:end],
+                                       scaled, q_weight * self.max_weights[term]))
+
+        heap = []  # min-heap (skor, doc ID): skor sama -> doc ID besar menang
+        scored = 0
+        while cursors:
+            cursors.sort(key=lambda c: c.doc)
+            threshold = heap[0][0] if len(heap) >= k else -np.inf
+
+            # Cari pivot: term pertama di mana jumlah batas atas bisa melewati threshold
+            upper = 0.0
+            pivot = None
+            for i, cursor in enumerate(cursors):
+                upper += cursor.upper_bound
+                if upper + EPS >= threshold:
+                    pivot = i
+                    break
+            if pivot is None:
+                break
+            pivot_doc = cursors[pivot].doc
+
+            if cursors[0].doc == pivot_doc:
+                # Semua kursor sebelum pivot sudah di pivot_doc: hitung skor penuh
+                score = 0.0
+                for cursor in cursors:
+                    if cursor.doc != pivot_doc:
+                        break
+                    score += cursor.score()
+                    cursor.next()
+                scored += 1
+                entry = (score, pivot_doc)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            else:
+                # Lompati dokumen yang tidak mungkin masuk top-k
+                for cursor in cursors[:pivot]:
+                    cursor.seek(pivot_doc)
+            cursors = [c for c in cursors if not c.exhausted]
+
+        ranked = sorted(heap, reverse=True)
+        results = [(self.doc_names[d], s) for s, d in ranked]
+
+        # Kurang dari k dokumen yang cocok: isi dengan skor 0 (urutan sama seperti top_k)
+        if len(results) < k:
+            taken = {d for _, d in ranked}
+            for d in range(len(self.doc_names) - 1, -1, -1):
+                if len(results) >= k:
+                    break
+                if d not in taken:
+                    results.append((self.doc_names[d], 0.0))
+        return results, scored
+
+
+# === 2. KURSOR POSTINGS ===
+class _Cursor:
+    __slots__ = ("docs", "weights", "q_weight", "upper_bound", "pos")
+
+    def __init__(self, docs, weights, q_weight, upper_bound):
+        self.docs = docs
+        self.weights = weights
+        self.q_weight = q_weight
+        self.upper_bound = upper_bound
+        self.pos = 0
+
+    @property
+    def exhausted(self):
+        return self.pos >= len(self.docs)
+
+    @property
+    def doc(self):
+        return self.docs[self.pos]
+
+    def score(self):
+        return self.q_weight * self.weights[self.pos]
+
+    def next(self):
+        self.pos += 1
+
+    def seek(self, target):
+        # Binary search (galloping) ke doc >= target
+        self.pos += int(np.searchsorted(self.docs[self.pos:], target))
@@ -1,45 +1,57 @@
-import os
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from rank_bm25 import BM25Okapi
+from bm25 import BM25Index
+from ranking import ranked_results
+from corpus import load_texts
+from trec_eval import evaluate, qrels_from_gold, run_from_results
 
 # === 1. LOAD DOKUMEN ===
-def load_documents(folder):
-    docs = {}
-    for filename in os.listdir(folder):
-        if filename.endswith(".txt"):
-            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
-                docs[filename] = f.read()
-    return docs
+# load_texts diimpor dari corpus.py (teks ternormalisasi, sama untuk semua model).
 
 
 # === 2. TF-IDF SEARCH ===
 def tfidf_search(query, docs, k=3):
+    return tfidf_search_batch([query], docs, k)[0]
+
+
+def tfidf_search_batch(queries, docs, k=3):
+    """Banyak query sekaligus: satu matriks query, satu perkalian Q · Dᵀ."""
     vectorizer = TfidfVectorizer()
     tfidf_matrix = vectorizer.fit_transform(docs.values())
-    query_vec = vectorizer.transform([query])
-    cosine_sim = cosine_similarity(query_vec, tfidf_matrix).flatten()
-    ranked_indices = cosine_sim.argsort()[::-1]
+    query_matrix = vectorizer.transform(queries)
+    cosine_sim = (query_matrix @ tfidf_matrix.T).toarray()  # baris sudah l2-normalized: cosine = dot
     doc_names = list(docs.keys())
-    results = [doc_names[i] for i in ranked_indices[:k]]
-    return results
+    return [[doc for doc, _ in row] for row in ranked_results(cosine_sim, doc_names, k)]
 
 
 # === 3. BM25 SEARCH ===
+# Model BM25 di-cache untuk dict docs yang sama, jadi statistik korpus
+# (IDF, panjang dokumen, matriks TF) hanya dihitung sekali.
+_bm25_cache = {"docs": None, "model": None}
+
+
+def get_bm25_model(docs):
+    if _bm25_cache["docs"] is not docs:
+        _bm25_cache["model"] = BM25Index.from_documents(docs)
+        _bm25_cache["docs"] = docs
+    return _bm25_cache["model"]
+
+
 def bm25_search(query, docs, k=3):
-    tokenized_corpus = [doc.split() for doc in docs.values()]
-    bm25 = BM25Okapi(tokenized_corpus)
-    tokenized_query = query.lower().split()
-    scores = bm25.get_scores(tokenized_query)
-    ranked_indices = np.argsort(scores)[::-1]
+    return bm25_search_batch([query], docs, k)[0]
+
+
+def bm25_search_batch(queries, docs, k=3):
+    bm25 = get_bm25_model(docs)
+    scores = bm25.get_batch_scores(queries)
     doc_names = list(docs.keys())
-    results = [doc_names[i] for i in ranked_indices[:k]]
-    return results
+    return [[doc for doc, _ in row] for row in ranked_results(scores, doc_names, k)]
 
 
 # === 4. METRIK EVALUASI ===
+# Versi per query (referensi). Evaluasi banyak query sekaligus memakai
+# trec_eval.evaluate (vectorized, hasil sama untuk gold set biner).
 def precision_recall_f1(retrieved, relevant):
     retrieved_set = set(retrieved)
     relevant_set = set(relevant)
@@ -94,7 +106,7 @@ def plot_comparison(metrics_summary):
 # === 6. MAIN ===
 if __name__ == "__main__":
     folder = "data/processed"
-    docs = load_documents(folder)
+    docs = load_texts(folder)
     print(f"Total dokumen: {len(docs)}")
 
     if not docs:
@@ -109,41 +121,31 @@ if __name__ == "__main__":
     }
 
     models = {
-        "TF-IDF": tfidf_search,
-        "BM25": bm25_search,
+        "TF-IDF": tfidf_search_batch,
+        "BM25": bm25_search_batch,
     }
+    qrels = qrels_from_gold(queries)
 
     metrics_summary = {}
 
     # === Evaluasi Tiap Model ===
-    for model_name, search_func in models.items():
+    for model_name, search_batch in models.items():
         print("\n" + "=" * 70)
         print(f"🔹 Evaluasi skema: {model_name}")
-        all_prec, all_rec, all_f1, all_map, all_ndcg = [], [], [], [], []
 
-        for query, gold in queries.items():
-            results = search_func(query, docs, k=3)
-            precision, recall, f1 = precision_recall_f1(results, gold)
-            mapk = map_at_k(results, gold)
-            ndcgk = ndcg_at_k(results, gold)
-
-            all_prec.append(precision)
-            all_rec.append(recall)
-            all_f1.append(f1)
-            all_map.append(mapk)
-            all_ndcg.append(ndcgk)
+        # Semua query dalam satu batch, semua metrik dalam satu lintasan matriks
+        results = dict(zip(queries, search_batch(list(queries), docs, k=3)))
+        qids, per_query = evaluate(run_from_results(results), qrels, k=3)
+        row = {qid: i for i, qid in enumerate(qids)}
 
+        for query in queries:
+            i = row[query]
             print(f"\nQuery: {query}")
-            print(f"Top-3: {results}")
-            print(f"Precision={precision:.2f}, Recall={recall:.2f}, F1={f1:.2f}, MAP@3={mapk:.2f}, nDCG@3={ndcgk:.2f}")
-
-        avg_metrics = [
-            np.mean(all_prec),
-            np.mean(all_rec),
-            np.mean(all_f1),
-            np.mean(all_map),
-            np.mean(all_ndcg),
-        ]
+            print(f"Top-3: {results[query]}")
+            print(f"Precision={per_query['P'][i]:.2f}, Recall={per_query['recall'][i]:.2f}, "
+                  f"F1={per_query['F1'][i]:.2f}, MAP@3={per_query['MAP'][i]:.2f}, nDCG@3={per_query['nDCG'][i]:.2f}")
+
+        avg_metrics = [float(per_query[m].mean()) for m in ("P", "recall", "F1", "MAP", "nDCG")]
         metrics_summary[model_name] = avg_metrics
 
         print("-" * 70)
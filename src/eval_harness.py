@@ -0,0 +1,297 @@
+# src/eval_harness.py
+
+import os
+import json
+import math
+import time
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.feature_extraction.text import TfidfVectorizer
+from bm25 import BM25Index, bm25_weights
+from ranking import top_k
+from corpus import load_texts
+from trec_eval import read_qrels, qrels_from_gold, evaluate, summarize
+
+# Gold set bawaan (sama dengan eval.py): qid = teks query
+DEFAULT_GOLD = {
+    "pedang hutan": ["buku_fantasi.txt"],
+    "cinta motivasi": ["buku_romansa.txt", "buku_motivasi.txt"],
+    "ilmu sains pengetahuan": ["buku_sains.txt"],
+}
+METRICS = ("P", "recall", "F1", "MAP", "nDCG", "RR")
+# Batas matriks skor padat per tugas (query x dokumen), ~32 MB float64
+MAX_SCORE_CELLS = 2 ** 22
+_ALIGN = 64
+
+
+# === 1. ARRAY DI SHARED MEMORY ===
+class SharedArrays:
+    """
+    Banyak array NumPy dalam satu blok shared memory. Proses induk menyalin
+    array sekali (publish); worker hanya menerima deskriptor kecil (nama blok +
+    dtype/shape/offset tiap array) lalu membuat view tanpa menyalin (attach).
+    Hanya pemilik (induk) yang boleh unlink.
+    """
+
+    def __init__(self, shm, layout, owner=False):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+
+    @classmethod
+    def publish(cls, arrays):
+        layout, size = {}, 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = (array.dtype.str, array.shape, size)
+            size += -(-array.nbytes // _ALIGN) * _ALIGN
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        shared = cls(shm, layout, owner=True)
+        for name, array in arrays.items():
+            shared[name][...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, layout = descriptor
+        return cls(shared_memory.SharedMemory(name=name), layout)
+
+    @property
+    def descriptor(self):
+        return self.shm.name, self.layout
+
+    def __getitem__(self, name):
+        dtype, shape, offset = self.layout[name]
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+
+    def csr(self, prefix):
+        """CSR dari array prefix.data / .indices / .indptr / .shape (view, tanpa salinan)."""
+        shape = tuple(int(n) for n in self[prefix + ".shape"])
+        return sp.csr_matrix((self[prefix + ".data"], self[prefix + ".indices"], self[prefix + ".indptr"]),
+                             shape=shape, copy=False)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _csr_arrays(prefix, matrix):
+    matrix = sp.csr_matrix(matrix)
+    return {
+        prefix + ".data": matrix.data,
+        prefix + ".indices": matrix.indices,
+        prefix + ".indptr": matrix.indptr,
+        prefix + ".shape": np.asarray(matrix.shape, dtype=np.int64),
+    }
+
+
+# === 2. GRID PARAMETER & MODEL (dibangun sekali di proses induk) ===
+# Konfigurasi = (model, sublinear, k1, b); parameter yang tidak berlaku bernilai None.
+def parameter_grid(models, sublinear=(False,), k1_values=(1.5,), b_values=(0.75,)):
+    configs = []
+    if "tfidf" in models:
+        configs += [("tfidf", bool(s), None, None) for s in sublinear]
+    if "bm25" in models:
+        configs += [("bm25", None, float(k1), float(b)) for k1 in k1_values for b in b_values]
+    return configs
+
+
+def config_label(config):
+    model, sublinear, k1, b = config
+    if model == "tfidf":
+        return "TF-IDF Sublinear" if sublinear else "TF-IDF"
+    return f"BM25 k1={k1:g} b={b:g}"
+
+
+def build_models(docs, queries, configs):
+    """
+    Semua array yang dibutuhkan grid, tanpa duplikasi:
+    - TF-IDF: matriks dokumen & query (ter-normalisasi L2) per nilai sublinear
+    - BM25  : matriks TF mentah + idf/doc_len/avgdl (bobot k1/b dihitung worker, O(nnz))
+    """
+    arrays = {}
+    texts = list(docs.values())
+    for sublinear in sorted({c[1] for c in configs if c[0] == "tfidf"}):
+        # Sama dengan eval.tfidf_search_batch: skor = cosine = Q · Dᵀ (dua sisi sudah L2)
+        vectorizer = TfidfVectorizer(sublinear_tf=sublinear)
+        arrays.update(_csr_arrays(f"tfidf{int(sublinear)}.docs", vectorizer.fit_transform(texts)))
+        arrays.update(_csr_arrays(f"tfidf{int(sublinear)}.queries", vectorizer.transform(queries)))
+    if any(c[0] == "bm25" for c in configs):
+        bm25 = BM25Index.from_documents(docs)
+        arrays.update(_csr_arrays("bm25.tf", bm25.tf_matrix))
+        arrays.update(_csr_arrays("bm25.queries", bm25.query_matrix(queries)))
+        arrays["bm25.idf"] = bm25.idf
+        arrays["bm25.doc_len"] = bm25.doc_len
+        arrays["bm25.avgdl"] = np.asarray([bm25.avgdl], dtype=np.float64)
+    return arrays
+
+
+# === 3. WORKER: SKOR SATU (KONFIGURASI, POTONGAN QUERY) ===
+_worker = {}
+_MAX_CACHED_WEIGHTS = 4
+
+
+def _init_worker(descriptor):
+    _worker["arrays"] = SharedArrays.attach(descriptor)
+    _worker["weights"] = {}
+
+
+def _doc_matrix(config):
+    arrays = _worker["arrays"]
+    model, sublinear, k1, b = config
+    if model == "tfidf":
+        return arrays.csr(f"tfidf{int(sublinear)}.docs")
+    # Bobot BM25 per (k1, b) di-cache; hanya beberapa terakhir agar memori worker terbatas
+    cache = _worker["weights"]
+    if (k1, b) not in cache:
+        if len(cache) >= _MAX_CACHED_WEIGHTS:
+            cache.pop(next(iter(cache)))
+        cache[(k1, b)] = bm25_weights(arrays.csr("bm25.tf"), arrays["bm25.idf"], arrays["bm25.doc_len"],
+                                      float(arrays["bm25.avgdl"][0]), k1, b)
+    return cache[(k1, b)]
+
+
+def _query_matrix(config):
+    model, sublinear, _, _ = config
+    return _worker["arrays"].csr(f"tfidf{int(sublinear)}.queries" if model == "tfidf" else "bm25.queries")
+
+
+def _run_task(config, start, stop, k):
+    """Top-k untuk query[start:stop]: (config, start, indeks dokumen, skor)."""
+    scores = (_query_matrix(config)[start:stop] @ _doc_matrix(config).T).toarray()
+    top = top_k(scores, k)
+    return config, start, top.astype(np.int32), np.take_along_axis(scores, top, axis=1)
+
+
+# === 4. HARNESS ===
+def _chunk_size(n_queries, n_docs, n_configs, workers):
+    # Cukup potongan agar semua core terpakai, tapi sesedikit mungkin (bobot BM25 dihitung per worker)
+    per_config = max(1, math.ceil(workers / max(n_configs, 1)))
+    size = math.ceil(n_queries / per_config)
+    return max(1, min(size, MAX_SCORE_CELLS // max(n_docs, 1)))
+
+
+def run_grid(docs, queries, configs, k, workers=None):
+    """
+    Jalankan semua konfigurasi untuk semua query. Model dibangun sekali, array-nya
+    dibagikan ke worker lewat shared memory, lalu grid konfigurasi x potongan query
+    dibagi ke pool proses. Mengembalikan {config: (indeks top-k, skor)} (query x k).
+    """
+    doc_names = list(docs)
+    workers = workers or os.cpu_count() or 1
+    shared = SharedArrays.publish(build_models(docs, queries, configs))
+    try:
+        size = _chunk_size(len(queries), len(doc_names), len(configs), workers)
+        tasks = [(config, start, min(start + size, len(queries)), k)
+                 for config in configs for start in range(0, len(queries), size)]
+        k = min(k, len(doc_names))
+        results = {c: (np.zeros((len(queries), k), dtype=np.int32), np.zeros((len(queries), k))) for c in configs}
+
+        if workers == 1:
+            # Tanpa pool: proses ini sendiri yang menjadi worker
+            _init_worker(shared.descriptor)
+            try:
+                outputs = [_run_task(*task) for task in tasks]
+            finally:
+                _worker.pop("arrays").close()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.descriptor,)) as pool:
+                outputs = [f.result() for f in [pool.submit(_run_task, *task) for task in tasks]]
+
+        for config, start, top, scores in outputs:
+            results[config][0][start:start + len(top)] = top
+            results[config][1][start:start + len(top)] = scores
+        return results
+    finally:
+        shared.close()
+
+
+def evaluate_grid(results, doc_names, qids, qrels, k_values, ap_norm="min_k", gain="linear"):
+    """Satu baris per (konfigurasi, k): parameter + rata-rata metrik (trec_eval.evaluate)."""
+    doc_names = np.asarray(doc_names, dtype=str)
+    qids = np.asarray(qids, dtype=str)
+    rows = []
+    for config, (top, scores) in results.items():
+        model, sublinear, k1, b = config
+        for k in k_values:
+            k_eff = min(k, top.shape[1])
+            run = (np.repeat(qids, k_eff), doc_names[top[:, :k_eff]].ravel(), scores[:, :k_eff].ravel())
+            _, per_query = evaluate(run, qrels, k, ap_norm, gain)
+            rows.append({"model": model, "label": config_label(config), "sublinear": sublinear,
+                         "k1": k1, "b": b, "k": k, **summarize(per_query)})
+    return rows
+
+
+# === 5. INPUT QUERY & QRELS ===
+def read_queries(path):
+    """Satu query per baris: "qid<TAB>query", atau hanya query (qid = nomor baris)."""
+    qids, queries = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            qid, _, query = line.partition("\t") if "\t" in line else (str(lineno), "", line)
+            qids.append(qid.strip())
+            queries.append(query.strip())
+    return qids, queries
+
+
+def print_table(rows, sort_by="MAP"):
+    print(f"{'konfigurasi':<26} {'k':>4} " + " ".join(f"{m:>8}" for m in METRICS))
+    for row in sorted(rows, key=lambda r: (r["k"], -r[sort_by])):
+        print(f"{row['label']:<26} {row['k']:>4} " + " ".join(f"{row[m]:>8.4f}" for m in METRICS))
+
+
+# === 6. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluasi paralel grid model x query x parameter")
+    parser.add_argument("--docs", default="data/processed", help="Folder dokumen, file .jsonl, atau file multi-dokumen")
+    parser.add_argument("--qrels", default=None, help="File qrels TREC (default: gold set bawaan eval.py)")
+    parser.add_argument("--queries", default=None, help="File query: qid<TAB>query per baris (wajib dengan --qrels)")
+    parser.add_argument("--models", nargs="+", choices=["tfidf", "bm25"], default=["tfidf", "bm25"])
+    parser.add_argument("--k", type=int, nargs="+", default=[3], help="Cutoff evaluasi (boleh lebih dari satu)")
+    parser.add_argument("--k1", type=float, nargs="+", default=[1.5])
+    parser.add_argument("--b", type=float, nargs="+", default=[0.75])
+    parser.add_argument("--sublinear", type=int, nargs="+", choices=[0, 1], default=[0, 1],
+                        help="Nilai sublinear_tf TF-IDF yang dicoba")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses worker (default: jumlah core)")
+    parser.add_argument("--ap-norm", choices=["min_k", "relevant"], default="min_k")
+    parser.add_argument("--gain", choices=["linear", "exponential"], default="linear")
+    parser.add_argument("--sort", choices=METRICS, default="MAP", help="Urutkan hasil per k berdasarkan metrik ini")
+    parser.add_argument("--out", default=None, help="Simpan semua baris hasil ke file JSON")
+    args = parser.parse_args()
+
+    if args.qrels:
+        if not args.queries:
+            parser.error("--queries wajib diisi jika memakai --qrels.")
+        qrels = read_qrels(args.qrels)
+        qids, queries = read_queries(args.queries)
+    else:
+        qrels = qrels_from_gold(DEFAULT_GOLD)
+        qids = queries = list(DEFAULT_GOLD)
+
+    docs = load_texts(args.docs)
+    if not docs or not queries:
+        print("⚠️ Tidak ada dokumen atau query untuk dievaluasi.")
+        exit()
+
+    configs = parameter_grid(args.models, args.sublinear, args.k1, args.b)
+    print(f"ℹ️ {len(docs)} dokumen | {len(queries)} query | {len(configs)} konfigurasi | k={args.k}")
+    start = time.perf_counter()
+    results = run_grid(docs, queries, configs, max(args.k), args.workers)
+    search_s = time.perf_counter() - start
+    rows = evaluate_grid(results, list(docs), qids, qrels, args.k, args.ap_norm, args.gain)
+    print(f"✅ Grid selesai dalam {search_s:.2f} s (evaluasi {time.perf_counter() - start - search_s:.2f} s)\n")
+    print_table(rows, args.sort)
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n✅ Hasil disimpan di {args.out}")
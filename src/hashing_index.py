@@ -0,0 +1,296 @@
+# src/hashing_index.py
+
+import os
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from corpus import iter_token_docs
+from ranking import ranked_results
+from quantize import ranking_diff
+from profiling import span
+
+HASH_META = "hash_meta.json"
+DEFAULT_N_FEATURES = 2 ** 20
+
+
+def make_hasher(n_features=DEFAULT_N_FEATURES):
+    """Hitungan term mentah di ruang hash; analyzer sama dengan TfidfVectorizer() (huruf kecil, token 2+ karakter)."""
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+
+
+# === 1. BUILD STREAMING (memori tetap: satu batch + counter df) ===
+class HashingIndexWriter:
+    """
+    Index TF-IDF tanpa vocabulary: term di-hash ke n_features kolom
+    (HashingVectorizer), dokumen diproses per batch, dan hitungan tiap batch,
+    panjang baris, serta nama dokumen langsung ditulis ke file sementara.
+    Yang tinggal di memori hanya satu batch dan counter df (n_features int64),
+    berapa pun ukuran korpus; array per dokumen (indptr, norma) ditulis lewat memmap.
+    IDF tidak dipakai saat menulis: df disimpan, lalu IDF dan norma dokumen
+    dihitung sekali di close(); bobot TF-IDF diterapkan saat query.
+    """
+
+    def __init__(self, out_dir, n_features=DEFAULT_N_FEATURES, batch_size=1000):
+        self.out_dir = out_dir
+        self.hasher = make_hasher(n_features)
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self.nnz = 0
+        self._batch = []
+        os.makedirs(out_dir, exist_ok=True)
+        # data/indices: postings mentah; row_nnz: jumlah kolom per dokumen (-> indptr di close())
+        self._files = {name: open(os.path.join(out_dir, f"tf_{name}.bin"), "wb")
+                       for name in ("data", "indices", "row_nnz")}
+        # Nama dokumen satu per baris (JSON string), digabung jadi doc_names.json di close()
+        self._names = open(os.path.join(out_dir, "doc_names.tmp"), "w", encoding="utf-8")
+
+    def add(self, name, text):
+        self._batch.append((name, text))
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        if not self._batch:
+            return
+        names, texts = zip(*self._batch)
+        with span("hash.transform"):
+            counts = self.hasher.transform(texts).tocsr()
+        counts.sort_indices()
+        self.df += np.bincount(counts.indices, minlength=self.n_features)
+        self._files["data"].write(counts.data.astype(np.int32).tobytes())
+        self._files["indices"].write(counts.indices.astype(np.int32).tobytes())
+        self._files["row_nnz"].write(np.diff(counts.indptr).astype(np.int32).tobytes())
+        self._names.writelines(json.dumps(name) + "\n" for name in names)
+        self.n_docs += len(names)
+        self.nnz += counts.nnz
+        self._batch = []
+
+    def close(self, chunk_size=100_000):
+        """Tulis batch terakhir, ubah file sementara ke .npy/.json, hitung norma dokumen, lalu hash_meta.json."""
+        self._flush_batch()
+        for f in self._files.values():
+            f.close()
+        self._names.close()
+        n_docs = self.n_docs
+
+        # indptr = cumsum panjang baris, per potongan langsung ke .npy (memmap)
+        indptr = np.lib.format.open_memmap(os.path.join(self.out_dir, "tf_indptr.npy"), mode="w+",
+                                           dtype=np.int64, shape=(n_docs + 1,))
+        indptr[0] = 0
+        row_nnz = self._raw("row_nnz", n_docs)
+        for start in range(0, n_docs, chunk_size):
+            end = min(start + chunk_size, n_docs)
+            indptr[start + 1:end + 1] = indptr[start] + np.cumsum(row_nnz[start:end])
+        del row_nnz
+        os.remove(os.path.join(self.out_dir, "tf_row_nnz.bin"))
+        for name in ("data", "indices"):
+            raw = self._raw(name, self.nnz)
+            np.save(os.path.join(self.out_dir, f"tf_{name}.npy"), raw)
+            del raw
+            os.remove(os.path.join(self.out_dir, f"tf_{name}.bin"))
+        np.save(os.path.join(self.out_dir, "df.npy"), self.df)
+
+        # Norma l2 TF-IDF tiap dokumen (IDF final baru diketahui di sini), per potongan baris
+        idf = hashed_idf(self.df, n_docs)
+        data = np.load(os.path.join(self.out_dir, "tf_data.npy"), mmap_mode="r")
+        indices = np.load(os.path.join(self.out_dir, "tf_indices.npy"), mmap_mode="r")
+        norms = np.lib.format.open_memmap(os.path.join(self.out_dir, "doc_norms.npy"), mode="w+",
+                                          dtype=np.float64, shape=(n_docs,))
+        with span("hash.norms"):
+            for start in range(0, n_docs, chunk_size):
+                end = min(start + chunk_size, n_docs)
+                lo, hi = indptr[start], indptr[end]
+                rows = np.repeat(np.arange(end - start), np.diff(indptr[start:end + 1]))
+                weights = data[lo:hi] * idf[indices[lo:hi]]
+                chunk = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=end - start))
+                chunk[chunk == 0] = 1.0
+                norms[start:end] = chunk
+        norms.flush()
+        indptr.flush()
+        del norms, indptr, data, indices
+
+        # doc_names.json ditulis per nama dari file sementara (tanpa list seluruh nama di memori)
+        names_tmp = os.path.join(self.out_dir, "doc_names.tmp")
+        with open(names_tmp, "r", encoding="utf-8") as src, \
+                open(os.path.join(self.out_dir, "doc_names.json"), "w", encoding="utf-8") as f:
+            f.write("[")
+            for i, line in enumerate(src):
+                f.write((", " if i else "") + line.rstrip("\n"))
+            f.write("]")
+        os.remove(names_tmp)
+
+        # hash_meta.json ditulis terakhir: index dianggap valid hanya jika file ini ada
+        meta = {"n_docs": n_docs, "n_features": self.n_features, "nnz": int(self.nnz),
+                "batch_size": self.batch_size, "buckets_used": int((self.df > 0).sum())}
+        with open(os.path.join(self.out_dir, HASH_META), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+    def _raw(self, name, length):
+        """Isi file sementara tf_<name>.bin sebagai array int32 (np.memmap tidak bisa memetakan file kosong)."""
+        if not length:
+            return np.empty(0, dtype=np.int32)
+        return np.memmap(os.path.join(self.out_dir, f"tf_{name}.bin"), dtype=np.int32, mode="r")
+
+
+def hashed_idf(df, n_docs):
+    """smooth_idf TfidfVectorizer, per kolom hash."""
+    return np.log((1 + n_docs) / (1 + df)) + 1
+
+
+def build_hashing_index(docs, out_dir, n_features=DEFAULT_N_FEATURES, batch_size=1000):
+    """docs: dict {nama file: list token} atau generator (nama, list token), mis. corpus.iter_token_docs(sumber)."""
+    writer = HashingIndexWriter(out_dir, n_features, batch_size)
+    for name, tokens in (docs.items() if isinstance(docs, dict) else docs):
+        writer.add(name, " ".join(tokens))
+    return writer.close()
+
+
+# === 2. QUERY (IDF diterapkan saat query) ===
+class HashingIndex:
+    """Index hasil HashingIndexWriter (array mmap). Skor = cosine TF-IDF di ruang hash."""
+
+    def __init__(self, index_dir, mmap=True):
+        meta_path = os.path.join(index_dir, HASH_META)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Index hashing belum dibangun di '{index_dir}'.")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, "doc_names.json"), "r", encoding="utf-8") as f:
+            self.doc_names = json.load(f)
+        mmap_mode = "r" if mmap else None
+        load = lambda name: np.load(os.path.join(index_dir, name), mmap_mode=mmap_mode)
+        self.hasher = make_hasher(self.meta["n_features"])
+        self.df = load("df.npy")
+        self.idf = hashed_idf(np.asarray(self.df), self.meta["n_docs"])
+        self.doc_norms = load("doc_norms.npy")
+        self.tf_matrix = sp.csr_matrix((load("tf_data.npy"), load("tf_indices.npy"), load("tf_indptr.npy")),
+                                       shape=(self.meta["n_docs"], self.meta["n_features"]))
+
+    def transform_batch(self, queries):
+        """Matriks TF-IDF query di ruang hash (baris l2-normalized)."""
+        query_matrix = sp.csr_matrix(self.hasher.transform(queries))
+        query_matrix.data *= self.idf[query_matrix.indices]
+        norms = np.sqrt(np.asarray(query_matrix.multiply(query_matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1 / norms) @ query_matrix)
+
+    def vsm_scores(self, query_matrix):
+        """Cosine = (q · idf) · tf_d / ‖d‖: IDF dilipat ke query, hitungan dokumen dipakai mentah."""
+        weighted = sp.csr_matrix(query_matrix @ sp.diags(self.idf))
+        with span("hash.dot"):
+            return (weighted @ self.tf_matrix.T).toarray() / self.doc_norms
+
+    def vsm_search_batch(self, queries, k=3):
+        return ranked_results(self.vsm_scores(self.transform_batch(queries)), self.doc_names, k)
+
+    def vsm_search(self, query, k=3):
+        return self.vsm_search_batch([query], k)[0]
+
+
+# === 3. LAPORAN: TABRAKAN HASH & DRIFT RANKING VS VECTORIZER EKSAK ===
+def collision_report(terms, n_features):
+    """
+    terms: vocabulary eksak. Mengembalikan jumlah term, bucket terpakai, dan
+    collision_rate = fraksi term yang berbagi bucket dengan term lain.
+    """
+    terms = list(terms)
+    if not terms:
+        return {"n_terms": 0, "buckets_used": 0, "collision_rate": 0.0}
+    # Satu term per "dokumen": indeks kolom = bucket term itu
+    buckets = make_hasher(n_features).transform(terms).tocsr().indices
+    _, inverse, sizes = np.unique(buckets, return_inverse=True, return_counts=True)
+    return {"n_terms": len(terms), "buckets_used": len(sizes),
+            "collision_rate": float((sizes[inverse] > 1).mean())}
+
+
+def ranking_drift(index, texts, queries, k=10):
+    """
+    Bandingkan skor index hashing dengan TfidfVectorizer eksak pada korpus yang
+    sama (urutan dokumen sama). texts: teks dokumen sesuai index.doc_names.
+    Memuat seluruh korpus ke memori, jadi hanya untuk laporan / sampel.
+    """
+    vectorizer = TfidfVectorizer()
+    tfidf_matrix = vectorizer.fit_transform(texts)
+    exact = (vectorizer.transform(queries) @ tfidf_matrix.T).toarray()
+    report = ranking_diff(exact, index.vsm_scores(index.transform_batch(queries)), k)
+    report.update(collision_report(vectorizer.get_feature_names_out(), index.meta["n_features"]))
+    return report
+
+
+# === 4. MAIN ===
+if __name__ == "__main__":
+    from quantize import sample_queries
+
+    parser = argparse.ArgumentParser(description="Index TF-IDF streaming dengan feature hashing (memori tetap)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Bangun index hashing per batch")
+    build.add_argument("--docs", default="data/processed",
+                       help="Folder dokumen hasil preprocessing, file .jsonl, atau file multi-dokumen")
+    build.add_argument("--out", default="data/hash_index", help="Folder output index")
+    build.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="Jumlah bucket hash")
+    build.add_argument("--batch-size", type=int, default=1000, help="Jumlah dokumen per batch")
+    build.add_argument("--memory", action="store_true", help="Ukur puncak alokasi memori (tracemalloc, lebih lambat)")
+    search = sub.add_parser("search", help="Cari di index hashing")
+    search.add_argument("--index", default="data/hash_index")
+    search.add_argument("--query", required=True)
+    search.add_argument("--k", type=int, default=3)
+    report = sub.add_parser("report", help="Tingkat tabrakan hash & drift ranking vs TfidfVectorizer eksak")
+    report.add_argument("--index", default="data/hash_index")
+    report.add_argument("--docs", default="data/processed", help="Sumber dokumen yang sama dengan saat build")
+    report.add_argument("--queries-file", default=None, help="Satu query per baris (default: query acak dari korpus)")
+    report.add_argument("--n-queries", type=int, default=200)
+    report.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not os.path.exists(args.docs):
+            print(f"⚠️ {args.docs} tidak ditemukan. Jalankan preprocess.py dulu.")
+            exit()
+        start = time.perf_counter()
+        if args.memory:
+            tracemalloc.start()
+        meta = build_hashing_index(iter_token_docs(args.docs), args.out, args.n_features, args.batch_size)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if args.memory else None
+        tracemalloc.stop()
+        print(f"✅ Index hashing tersimpan di {args.out} ({time.perf_counter() - start:.1f} s)")
+        print(f"Dokumen: {meta['n_docs']} | Bucket: {meta['n_features']} ({meta['buckets_used']} terpakai) "
+              f"| Batch: {meta['batch_size']}" + (f" | Puncak memori: {peak:.1f} MB" if peak is not None else ""))
+        exit()
+
+    try:
+        index = HashingIndex(args.index)
+    except FileNotFoundError as e:
+        print(f"⚠️ {e}")
+        exit()
+
+    if args.command == "search":
+        print(f"\nModel: VSM (feature hashing, {index.meta['n_features']} bucket)")
+        print(f"Query: {args.query}")
+        print("=" * 60)
+        for rank, (doc, score) in enumerate(index.vsm_search(args.query, args.k), 1):
+            print(f"{rank}. {doc:<25} | cosine={score:.4f}")
+    else:
+        texts = {name: " ".join(tokens) for name, tokens in iter_token_docs(args.docs)}
+        if sorted(texts) != sorted(index.doc_names):
+            print("⚠️ Dokumen di --docs tidak sama dengan isi index. Bangun ulang index hashing.")
+            exit()
+        if args.queries_file:
+            with open(args.queries_file, "r", encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            vocabulary = sorted({t for text in texts.values() for t in text.split()})
+            queries = sample_queries(vocabulary, args.n_queries)
+        result = ranking_drift(index, [texts[name] for name in index.doc_names], queries, args.k)
+        print(f"ℹ️ {len(queries)} query | k={args.k} | {index.meta['n_features']} bucket\n")
+        print(f"Term eksak      : {result['n_terms']} ({result['buckets_used']} bucket terpakai)")
+        print(f"Collision rate  : {result['collision_rate']:.4%} term berbagi bucket")
+        print(f"Overlap top-k   : {result['overlap']:.4f}")
+        print(f"Urutan identik  : {result['same_order']:.4f}")
+        print(f"Selisih skor    : max {result['max_abs_err']:.2e} | rata-rata {result['mean_abs_err']:.2e}")
@@ -0,0 +1,625 @@
+# src/index_store.py
+
+import os
+import json
+import uuid
+import shutil
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from array import array
+from collections import Counter
+from sklearn.feature_extraction.text import TfidfTransformer
+from sklearn.preprocessing import normalize
+from postings import CompactIndex
+from term_dict import TermDictionary
+from positional import PositionLists, PositionalPostings
+from term_lookup import NgramTermIndex, TermExpander
+from bm25 import BM25Index
+from ranking import ranked_results
+from dynamic_pruning import WandIndex
+from quantize import ImpactScorer, QUANTIZE_MODES, term_scale, quantize_weights, dequantize
+from manifest import load_manifest, save_manifest, diff_folder
+from corpus import iter_token_docs, to_tokens, feature_tokens
+from snippets import build_snippet_store
+from profiling import span, count, profile_session
+
+# Versi format index di disk. Naikkan angka ini jika layout file berubah.
+FORMAT_VERSION = 5
+
+
+# === 2. BUILD INDEX & SIMPAN KE DISK ===
+def _doc_features(tokens):
+    """Hitungan fitur TF-IDF (analyzer default TfidfVectorizer)."""
+    return Counter(feature_tokens(" ".join(tokens)))
+
+
+def _term_positions(tokens):
+    """Posisi (urut) setiap term Boolean di dokumen."""
+    positions = {}
+    for i, token in enumerate(tokens):
+        positions.setdefault(token, []).append(i)
+    return positions
+
+
+def _stream_to_csr(doc_iter):
+    """
+    Bangun matriks hitungan fitur TF-IDF dan matriks insiden Boolean dari
+    generator (nama, list token) dalam satu lintasan. Hanya ID integer yang
+    disimpan per dokumen (bukan token / Counter), lalu kolom diurutkan sesuai
+    vocabulary terurut di akhir.
+
+    Data matriks insiden berisi ID posting (1-based) ke PositionLists yang
+    dikembalikan, sehingga position list ikut terurut saat matriks diiris,
+    ditumpuk, atau diubah ke CSC.
+    """
+    doc_names = []
+    feature_ids, term_ids = {}, {}
+    f_indices, f_data, f_indptr = array("i"), array("i"), array("q", [0])
+    t_indices, t_indptr = array("i"), array("q", [0])
+    pos_lengths, pos_flat = array("q"), array("i")
+    for name, tokens in doc_iter:
+        features = _doc_features(tokens)
+        doc_names.append(name)
+        for feature, n in features.items():
+            f_indices.append(feature_ids.setdefault(feature, len(feature_ids)))
+            f_data.append(n)
+        f_indptr.append(len(f_indices))
+        for term, plist in _term_positions(tokens).items():
+            t_indices.append(term_ids.setdefault(term, len(term_ids)))
+            pos_lengths.append(len(plist))
+            pos_flat.extend(plist)
+        t_indptr.append(len(t_indices))
+
+    def finish(ids, indices, data, indptr):
+        vocab = sorted(ids)
+        # ID sementara (urutan kemunculan) -> kolom di vocabulary terurut
+        remap = np.empty(len(vocab), dtype=np.int32)
+        remap[[ids[t] for t in vocab]] = np.arange(len(vocab), dtype=np.int32)
+        indices = remap[np.frombuffer(indices, dtype=np.int32)] if len(indices) else np.empty(0, np.int32)
+        if data is not None:
+            data = np.frombuffer(data, dtype=np.int32).copy()
+        else:
+            data = np.arange(1, len(indices) + 1, dtype=np.int32)  # ID posting (lihat docstring)
+        matrix = sp.csr_matrix((data, indices, np.frombuffer(indptr, dtype=np.int64).copy()),
+                               shape=(len(indptr) - 1, len(vocab)))
+        matrix.sort_indices()
+        return vocab, matrix
+
+    vocab, counts = finish(feature_ids, f_indices, f_data, f_indptr)
+    terms, incidence = finish(term_ids, t_indices, None, t_indptr)
+    positions = PositionLists(np.frombuffer(pos_lengths, dtype=np.int64), np.frombuffer(pos_flat, dtype=np.int32))
+    return doc_names, vocab, counts, terms, incidence, positions
+
+
+def _drop_empty_columns(matrix, vocab):
+    used = np.bincount(matrix.indices, minlength=matrix.shape[1]) > 0
+    if used.all():
+        return matrix, vocab
+    return matrix[:, used].tocsr(), [t for t, u in zip(vocab, used) if u]
+
+
+def global_stats(counts):
+    """Statistik korpus penuh untuk index yang dibagi ke beberapa shard (lihat sharding.py)."""
+    n_docs = counts.shape[0]
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    return {
+        "n_docs": n_docs,
+        "df": df,
+        "idf": np.log((1 + n_docs) / (1 + df)) + 1,  # smooth_idf TfidfVectorizer
+        "avgdl": float(counts.sum()) / n_docs if n_docs else 0.0,
+    }
+
+
+def _write_index(out_dir, doc_names, vocab, counts, terms, incidence, positions=None, manifest=None, stats=None,
+                 extra_meta=None, quantize="float64"):
+    """
+    Tulis index ke out_dir:
+    - meta.json            : versi format & ukuran index
+    - doc_names.json       : tabel doc ID -> nama file
+    - vocab_*.npy          : TermDictionary fitur TF-IDF/BM25 (term ID = kolom matriks)
+    - idf.npy              : vektor IDF
+    - tf_*.npy             : matriks hitungan term mentah (untuk update inkremental)
+    - tfidf_*.npy          : matriks TF-IDF (CSR: data, indices, indptr)
+    - impact_*.npy         : postings TF-IDF per term (doc ID, bobot) + skor maksimum term
+    - tfidf_scale.npy      : skala int8 per term (hanya quantize="int8")
+    - terms_*.npy          : TermDictionary term Boolean (term ID = urutan postings);
+                             tidak ditulis jika sama dengan vocab (meta "shared_terms")
+    - ngram_*.npy          : index trigram term Boolean untuk query wildcard/substring
+    - postings_*.npy       : postings (offsets + doc ID terurut)
+    - positions_*.npy      : position list per posting, delta + varint (jika positions diberikan)
+    - manifest.json        : hash dokumen sumber (lihat manifest.py)
+    - bm25_df.npy          : df global untuk BM25 (hanya jika stats global diberikan)
+
+    stats: hasil global_stats() korpus penuh. Jika diberikan, vocabulary dan
+    IDF tidak dihitung dari dokumen di out_dir saja, sehingga skor shard sama
+    dengan skor index tunggal.
+
+    positions: PositionLists yang dirujuk oleh data matriks insiden (ID posting 1-based).
+
+    quantize: dtype bobot TF-IDF di tfidf_data & impact_weights: "float64",
+    "float32" (1/2 ukuran), atau "int8" (1/8, bobot / skala term, lihat quantize.py).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    incidence, terms = _drop_empty_columns(incidence, terms)
+
+    if stats is None:
+        counts, vocab = _drop_empty_columns(counts, vocab)
+        # IDF & normalisasi dihitung dari hitungan mentah -> identik dengan TfidfVectorizer()
+        transformer = TfidfTransformer()
+        tfidf_matrix = transformer.fit_transform(counts).tocsr()
+        idf = transformer.idf_
+    else:
+        idf = stats["idf"]
+        weighted = sp.csr_matrix(counts, dtype=np.float64)
+        weighted.data *= idf[weighted.indices]
+        tfidf_matrix = normalize(weighted, norm="l2")
+        np.save(os.path.join(out_dir, "bm25_df.npy"), stats["df"])
+    tfidf_matrix.sort_indices()
+    counts.sort_indices()
+
+    # --- Postings berbobot per term untuk skor term-at-a-time & top-k WAND ---
+    wand = WandIndex.from_matrix(tfidf_matrix, doc_names)
+    # Skala int8 dari bobot maksimum term, dipakai bersama oleh tfidf_data dan impact_weights
+    scale = term_scale(wand.max_weights, quantize)
+    impact_terms = np.repeat(np.arange(len(wand.offsets) - 1), np.diff(wand.offsets))
+
+    np.save(os.path.join(out_dir, "idf.npy"), idf)
+    tfidf_data = quantize_weights(tfidf_matrix.data, tfidf_matrix.indices, quantize, scale)
+    for prefix, matrix, data in (("tf", counts, counts.data), ("tfidf", tfidf_matrix, tfidf_data)):
+        np.save(os.path.join(out_dir, f"{prefix}_data.npy"), data)
+        np.save(os.path.join(out_dir, f"{prefix}_indices.npy"), matrix.indices.astype(np.int32))
+        np.save(os.path.join(out_dir, f"{prefix}_indptr.npy"), matrix.indptr.astype(np.int64))
+    if scale is not None:
+        np.save(os.path.join(out_dir, "tfidf_scale.npy"), scale)
+
+    np.save(os.path.join(out_dir, "impact_offsets.npy"), wand.offsets.astype(np.int64))
+    np.save(os.path.join(out_dir, "impact_docs.npy"), wand.doc_ids.astype(np.int32))
+    np.save(os.path.join(out_dir, "impact_weights.npy"), quantize_weights(wand.weights, impact_terms, quantize, scale))
+    np.save(os.path.join(out_dir, "impact_max.npy"), wand.max_weights)
+
+    # --- Postings Boolean: kolom CSC matriks insiden = doc ID terurut per term ---
+    by_term = incidence.tocsc()
+    by_term.sort_indices()
+    np.save(os.path.join(out_dir, "postings_offsets.npy"), by_term.indptr.astype(np.int64))
+    np.save(os.path.join(out_dir, "postings_docs.npy"), by_term.indices.astype(np.int32))
+    if positions is not None:
+        # Position list diurutkan ulang mengikuti urutan postings (term, doc ID)
+        pos_offsets, pos_data = positions.take(by_term.data.astype(np.int64) - 1).encode()
+        np.save(os.path.join(out_dir, "positions_offsets.npy"), pos_offsets)
+        np.save(os.path.join(out_dir, "positions_data.npy"), pos_data)
+
+    with open(os.path.join(out_dir, "doc_names.json"), "w", encoding="utf-8") as f:
+        json.dump(doc_names, f)
+    # Satu kamus term untuk semua model jika tokenisasi Boolean & TF-IDF menghasilkan term yang sama
+    shared_terms = list(terms) == list(vocab)
+    TermDictionary.build(vocab).save(out_dir, "vocab")
+    if not shared_terms:
+        TermDictionary.build(terms).save(out_dir, "terms")
+    # Index trigram disimpan agar TermExpander tidak dibangun ulang dari seluruh vocabulary per proses
+    n_grams = NgramTermIndex(terms).save(out_dir)
+    if manifest is not None:
+        save_manifest(os.path.join(out_dir, "manifest.json"), manifest)
+
+    # meta.json ditulis terakhir: index dianggap valid hanya jika file ini ada
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "n_docs": len(doc_names),
+        "n_features": len(vocab),
+        "n_terms": len(terms),
+        "positional": positions is not None,
+        "shared_terms": shared_terms,
+        "n_grams": n_grams,
+        "quantize": quantize,
+        # ID unik tiap build/patch: cache hasil query dibuang jika ID ini berubah
+        "build_id": uuid.uuid4().hex,
+    }
+    if stats is not None:
+        meta["global_stats"] = {"n_docs": int(stats["n_docs"]), "avgdl": stats["avgdl"]}
+    meta.update(extra_meta or {})
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def build_index(docs, out_dir, manifest=None, quantize="float64"):
+    """
+    Bangun index lengkap lalu simpan ke out_dir. docs: dict {nama file: list token}
+    atau generator (nama, list token), mis. corpus.iter_token_docs(sumber),
+    sehingga korpus tidak perlu dimuat seluruhnya ke memori.
+    quantize: dtype bobot TF-IDF ("float64", "float32", "int8").
+    """
+    with span("index.features"):
+        doc_names, vocab, counts, terms, incidence, positions = _stream_to_csr(
+            docs.items() if isinstance(docs, dict) else docs)
+    count("index.docs", len(doc_names))
+    with span("index.write"):
+        return _write_index(out_dir, doc_names, vocab, counts, terms, incidence, positions, manifest,
+                            quantize=quantize)
+
+
+def _extend_columns(matrix, old_vocab, new_vocab):
+    """Pindahkan kolom matrix dari old_vocab ke posisi di new_vocab (superset terurut)."""
+    remap = np.searchsorted(np.asarray(list(new_vocab), dtype=object), np.asarray(list(old_vocab), dtype=object))
+    matrix = matrix.tocsr()
+    return sp.csr_matrix(
+        (matrix.data, remap[matrix.indices].astype(np.int32), matrix.indptr),
+        shape=(matrix.shape[0], len(new_vocab)),
+    )
+
+
+def staging_dir(index_dir):
+    """Folder sementara di samping index_dir: index baru ditulis di sini, lalu ditukar dengan swap_index_dir."""
+    return f"{os.path.normpath(index_dir)}.tmp-{uuid.uuid4().hex[:8]}"
+
+
+def swap_index_dir(staging, index_dir):
+    """
+    Ganti index_dir dengan folder staging lewat rename, bukan menulis ulang
+    file di tempat: pembaca yang masih me-mmap file lama (server, VSMSearcher,
+    chat) tetap membaca versi lama yang utuh sampai memuat ulang, dan file lama
+    baru dihapus setelah versi baru terpasang.
+    """
+    index_dir = os.path.normpath(index_dir)
+    old = None
+    if os.path.exists(index_dir):
+        old = f"{index_dir}.old-{uuid.uuid4().hex[:8]}"
+        os.rename(index_dir, old)
+    os.rename(staging, index_dir)
+    if old:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def update_index(index_dir, docs_folder, changed, deleted, manifest=None, out_dir=None, quantize=None):
+    """
+    Patch index yang sudah ada: baris dokumen yang dihapus/berubah dibuang,
+    hanya dokumen baru/berubah yang dibaca & ditokenisasi ulang. IDF,
+    TF-IDF, dan postings dihitung ulang dari hitungan mentah (operasi
+    sparse O(nnz)), sehingga hasilnya sama dengan build penuh.
+    Index baru ditulis ke out_dir; tanpa out_dir, ke folder staging yang
+    langsung ditukar dengan index_dir (index lama tidak pernah ditulis ulang di tempat).
+    quantize: mode bobot index baru (default: mode index lama).
+    """
+    old = SavedIndex(index_dir, mmap=False)
+    drop = set(changed) | set(deleted)
+    keep = np.array([name not in drop for name in old.doc_names], dtype=bool)
+
+    def read_changed():
+        for filename in changed:
+            with open(os.path.join(docs_folder, filename), "r", encoding="utf-8") as f:
+                yield filename, to_tokens(f.read())
+
+    new_names, new_vocab, new_counts, new_terms, new_incidence, new_positions = _stream_to_csr(read_changed())
+    vocab = sorted(set(old.feature_names).union(new_vocab))
+    terms = sorted(set(old.compact.terms).union(new_terms))
+
+    counts = sp.vstack([
+        _extend_columns(old.tf_matrix[keep], old.feature_names, vocab),
+        _extend_columns(new_counts, new_vocab, vocab),
+    ]).tocsr()
+
+    # ID posting dokumen baru digeser setelah ID posting index lama
+    old_positions = old.position_lists()
+    new_incidence.data += len(old_positions)
+    incidence = sp.vstack([
+        _extend_columns(old.incidence_matrix()[keep], old.compact.terms, terms),
+        _extend_columns(new_incidence, new_terms, terms),
+    ]).tocsr()
+    positions = PositionLists.concat([old_positions, new_positions])
+
+    doc_names = [name for name, k in zip(old.doc_names, keep) if k] + new_names
+    target = out_dir or staging_dir(index_dir)
+    meta = _write_index(target, doc_names, vocab, counts, terms, incidence, positions, manifest,
+                        quantize=quantize or old.quantize)
+    if out_dir is None:
+        swap_index_dir(target, index_dir)
+    return meta
+
+
+# === 3. VIEW POSTINGS (kompatibel dengan dict inverted index) ===
+class PostingsView:
+    """Mapping term -> set nama dokumen di atas CompactIndex (array mmap)."""
+
+    def __init__(self, compact, positional=None, term_index=None):
+        self._compact = compact
+        self.positional = positional
+        self._term_index = term_index
+        self._expander = None
+
+    @property
+    def expander(self):
+        """TermExpander untuk token wildcard/substring, dibuat sekali per view (cache pola ikut dipakai ulang)."""
+        if self._expander is None:
+            term_index = self._term_index() if callable(self._term_index) else self._term_index
+            self._expander = TermExpander(self, term_index=term_index)
+        return self._expander
+
+    @property
+    def doc_names(self):
+        return self._compact.doc_names
+
+    def keys(self):
+        return self._compact.terms
+
+    def __contains__(self, term):
+        return term in self._compact.term_ids
+
+    def __len__(self):
+        return len(self._compact.terms)
+
+    def doc_ids(self, term):
+        return self._compact.lookup(term)
+
+    def to_names(self, doc_ids):
+        return self._compact.to_names(doc_ids)
+
+    def get(self, term, default=None):
+        if term not in self._compact.term_ids:
+            return default
+        return set(self._compact.to_names(self._compact.lookup(term)))
+
+    def __getitem__(self, term):
+        if term not in self._compact.term_ids:
+            raise KeyError(term)
+        return self.get(term)
+
+
+# === 4. INDEX YANG SUDAH DISIMPAN ===
+class SavedIndex:
+    def __init__(self, index_dir, mmap=True):
+        meta_path = os.path.join(index_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Index belum dibangun di '{index_dir}'.")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Versi index {self.meta.get('format_version')} tidak cocok "
+                f"(dibutuhkan {FORMAT_VERSION}). Bangun ulang index."
+            )
+
+        self.index_dir = index_dir
+        self.mmap_mode = "r" if mmap else None
+        with open(os.path.join(index_dir, "doc_names.json"), "r", encoding="utf-8") as f:
+            self.doc_names = json.load(f)
+        # Kamus term (front-coded, mmap) dipakai bersama oleh TF-IDF, BM25, dan WAND
+        self.vocabulary = TermDictionary.load(index_dir, "vocab", self.meta["n_features"], self.mmap_mode)
+        self.feature_names = self.vocabulary
+
+        # Array besar di-memory-map, tidak dibaca penuh ke RAM
+        self.idf = self._load("idf.npy")
+        self.quantize = self.meta.get("quantize", "float64")
+        self.scale = self._load("tfidf_scale.npy") if self.quantize == "int8" else None
+        self._tfidf_matrix = None
+        self._impacts = None
+        self._postings = None
+        self._compact = None
+        self._positional = None
+        self._term_index = None
+
+    @property
+    def version(self):
+        """Versi isi index (berubah setiap build ulang atau patch incremental)."""
+        return self.meta.get("build_id") or os.stat(os.path.join(self.index_dir, "meta.json")).st_mtime_ns
+
+    def _load(self, name):
+        return np.load(os.path.join(self.index_dir, name), mmap_mode=self.mmap_mode)
+
+    @property
+    def tfidf_matrix(self):
+        """Matriks TF-IDF dokumen x fitur (float; bobot int8 di-dequantize sekali saat pertama diakses)."""
+        if self._tfidf_matrix is None:
+            indices = self._load("tfidf_indices.npy")
+            data = self._load("tfidf_data.npy")
+            if self.scale is not None:
+                data = dequantize(data, indices, self.scale)
+            self._tfidf_matrix = sp.csr_matrix(
+                (data, indices, self._load("tfidf_indptr.npy")),
+                shape=(self.meta["n_docs"], self.meta["n_features"]),
+                copy=False,
+            )
+        return self._tfidf_matrix
+
+    def impacts(self):
+        """ImpactScorer di atas postings TF-IDF tersimpan (mmap, dtype sesuai mode kuantisasi)."""
+        if self._impacts is None:
+            self._impacts = ImpactScorer(self._load("impact_offsets.npy"), self._load("impact_docs.npy"),
+                                         self._load("impact_weights.npy"), self.meta["n_docs"], self.scale)
+        return self._impacts
+
+    @property
+    def tf_matrix(self):
+        """Hitungan term mentah (dokumen x fitur TF-IDF)."""
+        return sp.csr_matrix(
+            (self._load("tf_data.npy"), self._load("tf_indices.npy"), self._load("tf_indptr.npy")),
+            shape=(self.meta["n_docs"], self.meta["n_features"]),
+        )
+
+    def incidence_matrix(self):
+        """
+        Matriks insiden dokumen x term Boolean, dibangun dari postings.
+        Data = ID posting (1-based) dalam urutan postings, sesuai position_lists().
+        """
+        compact = self.compact
+        return sp.csc_matrix(
+            (np.arange(1, len(compact.postings) + 1, dtype=np.int32), compact.postings, compact.offsets),
+            shape=(self.meta["n_docs"], len(compact.terms)),
+        ).tocsr()
+
+    def position_lists(self):
+        """Seluruh position list (urutan postings) di-decode, untuk update inkremental."""
+        return PositionLists.decode(self._load("positions_offsets.npy"), self._load("positions_data.npy"))
+
+    @property
+    def positional(self):
+        """PositionalPostings untuk query frasa & NEAR (None jika index tanpa posisi)."""
+        if self._positional is None and self.meta.get("positional"):
+            self._positional = PositionalPostings(
+                self.compact, self._load("positions_offsets.npy"), self._load("positions_data.npy"))
+        return self._positional
+
+    @property
+    def postings(self):
+        # Postings hanya dimuat saat model boolean dipakai
+        if self._postings is None:
+            self._postings = PostingsView(self.compact, self.positional, self.term_index)
+        return self._postings
+
+    def term_index(self):
+        """NgramTermIndex term Boolean: dimuat dari ngram_*.npy, atau dibangun sekali untuk index lama."""
+        if self._term_index is None:
+            terms = self.compact.terms
+            if self.meta.get("n_grams") is not None:
+                self._term_index = NgramTermIndex.load(self.index_dir, terms, self.meta["n_grams"],
+                                                       mmap_mode=self.mmap_mode)
+            else:
+                self._term_index = NgramTermIndex(terms)
+        return self._term_index
+
+    @property
+    def compact(self):
+        """CompactIndex di atas array mmap (untuk boolean_query tanpa set Python)."""
+        if self._compact is None:
+            if self.meta.get("shared_terms"):
+                terms = self.vocabulary
+            else:
+                terms = TermDictionary.load(self.index_dir, "terms", self.meta["n_terms"], self.mmap_mode)
+            self._compact = CompactIndex(
+                terms, self._load("postings_offsets.npy"), self._load("postings_docs.npy"), self.doc_names
+            )
+        return self._compact
+
+    def bm25(self, k1=1.5, b=0.75):
+        """Model BM25 dari hitungan term yang tersimpan (tanpa tokenisasi ulang korpus)."""
+        stats = self.meta.get("global_stats")
+        if stats:
+            # Shard dengan statistik global: df, N, dan avgdl dari korpus penuh
+            return BM25Index(self.tf_matrix, self.vocabulary, self.doc_names, k1=k1, b=b,
+                             tokenize=feature_tokens, df=self._load("bm25_df.npy"),
+                             n_docs=stats["n_docs"], avgdl=stats["avgdl"])
+        return BM25Index(self.tf_matrix, self.vocabulary, self.doc_names, k1=k1, b=b,
+                         tokenize=feature_tokens)
+
+    def wand(self):
+        """WandIndex TF-IDF dari postings berbobot yang tersimpan (mmap)."""
+        return WandIndex(self._load("impact_offsets.npy"), self._load("impact_docs.npy"),
+                         self._load("impact_weights.npy"), self.doc_names, self._load("impact_max.npy"),
+                         scale=self.scale)
+
+    def transform(self, query):
+        """Vektor TF-IDF query (l2-normalized), setara vectorizer.transform([query])."""
+        return self.transform_batch([query])
+
+    def transform_batch(self, queries):
+        """Matriks TF-IDF banyak query (baris l2-normalized), setara vectorizer.transform(queries)."""
+        indptr, indices, counts = [0], [], []
+        for query in queries:
+            ids = (self.vocabulary.get(t) for t in feature_tokens(query))
+            row = Counter(i for i in ids if i is not None)
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+        indices = np.asarray(indices, dtype=np.int32)
+        vals = np.asarray(counts, dtype=np.float64) * self.idf[indices]
+
+        # Normalisasi l2 per baris, vectorized
+        rows = np.repeat(np.arange(len(queries)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=vals ** 2, minlength=len(queries)))
+        norms[norms == 0] = 1.0
+        vals /= norms[rows]
+        return sp.csr_matrix((vals, indices, indptr), shape=(len(queries), len(self.feature_names)))
+
+    def vsm_search(self, query, k=3):
+        return self.vsm_search_batch([query], k)[0]
+
+    def vsm_scores(self, query_matrix):
+        """Skor cosine = Q · Dᵀ (baris sudah l2-normalized), hanya dari postings term query."""
+        return self.impacts().scores(query_matrix)
+
+    def vsm_search_batch(self, queries, k=3):
+        with span("vsm.transform"):
+            query_matrix = self.transform_batch(queries)
+        with span("vsm.dot"):
+            scores = self.vsm_scores(query_matrix)
+        return ranked_results(scores, self.doc_names, k)
+
+
+def load_index(index_dir):
+    return SavedIndex(index_dir)
+
+
+# === 5. MAIN: BUILD INDEX ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bangun index Mini Search Engine ke disk")
+    parser.add_argument("--docs", default="data/processed",
+                        help="Folder dokumen hasil preprocessing, file .jsonl, atau file multi-dokumen")
+    parser.add_argument("--out", default="data/index", help="Folder output index")
+    parser.add_argument("--raw", default="data/raw",
+                        help="Folder teks asli untuk snippet (jika tidak ada, snippet dari dokumen hasil preprocessing)")
+    parser.add_argument("--quantize", choices=QUANTIZE_MODES, default=None,
+                        help="Dtype bobot TF-IDF: float64 (default), float32 (1/2 memori), int8 (1/8, skala per term); "
+                             "dengan --incremental default-nya mode index yang ada")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Patch index yang ada: hanya dokumen baru/berubah/terhapus yang diproses")
+    parser.add_argument("--profile", action="store_true", help="Tampilkan breakdown waktu per tahap")
+    parser.add_argument("--profile-out", default=None, help="Simpan hasil cProfile (.pstats) ke file ini")
+    args = parser.parse_args()
+
+    with profile_session(args.profile, args.profile_out):
+        manifest_path = os.path.join(args.out, "manifest.json")
+        can_patch = False
+        if args.incremental and os.path.isdir(args.docs) and os.path.exists(manifest_path):
+            try:
+                current = load_index(args.out).quantize
+                # Ganti mode kuantisasi = semua bobot ditulis ulang, jadi tidak bisa di-patch
+                if args.quantize and args.quantize != current:
+                    print(f"ℹ️ Mode bobot berubah ({current} -> {args.quantize}). Build penuh ...")
+                else:
+                    can_patch = True
+            except (FileNotFoundError, ValueError) as e:
+                print(f"ℹ️ {e} Build penuh ...")
+
+        if can_patch:
+            changed, deleted, manifest = diff_folder(args.docs, load_manifest(manifest_path))
+            if not changed and not deleted:
+                print("✅ Index sudah up-to-date, tidak ada dokumen berubah.")
+                exit()
+            print(f"Incremental: {len(changed)} berubah/baru, {len(deleted)} dihapus")
+        elif not os.path.exists(args.docs):
+            print(f"⚠️ {args.docs} tidak ditemukan. Jalankan preprocess.py dulu.")
+            exit()
+
+        # Index baru (termasuk snippet store) ditulis ke folder staging lalu ditukar dengan args.out:
+        # proses yang sedang me-mmap index lama tidak pernah melihat file setengah tertulis
+        staging = staging_dir(args.out)
+        try:
+            if can_patch:
+                with span("index.patch"):
+                    meta = update_index(args.out, args.docs, changed, deleted, manifest, out_dir=staging,
+                                        quantize=args.quantize)
+            else:
+                manifest = None
+                if os.path.isdir(args.docs):
+                    # Manifest hanya untuk sumber berupa folder (dipakai --incremental)
+                    with span("index.manifest"):
+                        _, _, manifest = diff_folder(args.docs, {})
+                # Dokumen dialirkan langsung dari sumber ke builder (tanpa dict korpus penuh)
+                meta = build_index(iter_token_docs(args.docs), staging, manifest, args.quantize or "float64")
+                if not meta["n_docs"]:
+                    print("⚠️ Tidak ada dokumen. Jalankan preprocess.py dulu.")
+                    exit()
+
+            if os.path.isdir(args.docs):
+                # Offset token -> byte di file sumber, untuk snippet query-biased tanpa membaca seluruh dokumen
+                with span("index.snippets"):
+                    snippet_info = build_snippet_store(args.docs, staging, load_index(staging).doc_names, args.raw,
+                                                       previous_dir=args.out)
+                print(f"Snippet: {snippet_info['raw_docs']}/{snippet_info['n_docs']} dokumen dipetakan ke teks asli "
+                      f"({snippet_info['reused']} dipakai ulang)")
+            swap_index_dir(staging, args.out)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        print(f"✅ Index tersimpan di {args.out}")
+        print(f"Dokumen: {meta['n_docs']} | Fitur TF-IDF: {meta['n_features']} | Term Boolean: {meta['n_terms']} "
+              f"| Bobot: {meta['quantize']}")
@@ -0,0 +1,144 @@
+# src/loadgen.py
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+from urllib.parse import urlencode
+
+# Query bawaan jika tidak ada file query (diambil dari contoh README & gold set eval)
+DEFAULT_QUERIES = [
+    "pedang hutan", "penyihir kerajaan", "cinta sejati", "detektif pembunuhan",
+    "petualangan laut", "hantu rumah tua", "teknologi masa depan", "motivasi sukses",
+    "filsafat kehidupan", "komedi lucu",
+]
+
+
+# === 1. KLIEN HTTP KEEP-ALIVE SEDERHANA ===
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, target):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode("latin-1"))
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        body = await self.reader.readexactly(length)
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# === 2. GENERATOR BEBAN ===
+async def run_load(host, port, queries, model="vsm", k=3, concurrency=8, requests=1000, duration=None,
+                   snippet=False, seed=42):
+    """
+    Kirim request dari `concurrency` klien paralel (masing-masing satu koneksi keep-alive)
+    sampai `requests` request terkirim atau `duration` detik habis.
+    Mengembalikan ringkasan QPS dan persentil latensi (ms).
+    """
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    sent = 0
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def next_target():
+        nonlocal sent
+        if (deadline is not None and time.perf_counter() >= deadline) or (deadline is None and sent >= requests):
+            return None
+        sent += 1
+        params = {"q": rng.choice(queries), "model": model, "k": k, "snippet": int(snippet)}
+        return "/search?" + urlencode(params)
+
+    async def client():
+        nonlocal errors
+        conn = Connection(host, port)
+        try:
+            while (target := next_target()) is not None:
+                t0 = time.perf_counter()
+                try:
+                    status, _ = await conn.request(target)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    conn = Connection(host, port)
+                    status = None
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if status != 200:
+                    errors += 1
+        finally:
+            conn.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    lat = np.asarray(latencies)
+    p50, p90, p99 = np.percentile(lat, [50, 90, 99]) if len(lat) else (0.0, 0.0, 0.0)
+    return {
+        "model": model,
+        "concurrency": concurrency,
+        "requests": len(lat),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "qps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 3),
+        "p90_ms": round(float(p90), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(lat.max()), 3) if len(lat) else 0.0,
+    }
+
+
+# === 3. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator untuk server.py (QPS & latensi p50/p99)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", choices=["boolean", "vsm", "bm25"], default="vsm")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries-file", type=str, default=None, help="File berisi satu query per baris")
+    parser.add_argument("--concurrency", type=int, default=8, help="Jumlah klien paralel")
+    parser.add_argument("--requests", type=int, default=1000, help="Jumlah request total")
+    parser.add_argument("--duration", type=float, default=None, help="Durasi (detik), menggantikan --requests")
+    parser.add_argument("--snippet", action="store_true", help="Minta snippet di setiap hasil")
+    parser.add_argument("--json", action="store_true", help="Cetak ringkasan sebagai JSON")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    try:
+        report = asyncio.run(run_load(args.host, args.port, queries, args.model, args.k, args.concurrency,
+                                      args.requests, args.duration, args.snippet))
+    except OSError as e:
+        print(f"⚠️ Tidak bisa terhubung ke {args.host}:{args.port} ({e}). Jalankan dulu: python src/server.py")
+        exit()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Model: {report['model'].upper()} | klien: {report['concurrency']} | request: {report['requests']}")
+        print("=" * 60)
+        print(f"QPS      : {report['qps']}")
+        print(f"Latensi  : p50={report['p50_ms']} ms | p90={report['p90_ms']} ms | p99={report['p99_ms']} ms")
+        print(f"Error    : {report['errors']}")
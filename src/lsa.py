@@ -0,0 +1,265 @@
+# src/lsa.py
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from positional import _ranges
+from ranking import top_k
+from profiling import span
+
+LSA_META = "lsa_meta.json"
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# === 1. LSA: VEKTOR PADAT DARI MATRIKS TF-IDF ===
+class LSAModel:
+    """
+    Proyeksi TF-IDF ke ruang laten berdimensi rendah (TruncatedSVD). Term yang
+    sering muncul di konteks yang sama (mis. sinonim) jatuh ke arah yang
+    berdekatan, sehingga dokumen bisa cocok dengan query tanpa berbagi term.
+    - components  : (n_components x fitur) proyeksi term -> ruang laten
+    - doc_vectors : (dokumen x n_components) float32, l2-normalized -> cosine = dot
+    """
+
+    def __init__(self, components, doc_vectors):
+        self.components = components
+        self.doc_vectors = doc_vectors
+
+    @classmethod
+    def fit(cls, tfidf_matrix, n_components=100, n_iter=5, seed=0):
+        # TruncatedSVD butuh n_components < jumlah fitur; korpus kecil dibatasi otomatis
+        n_components = max(1, min(n_components, min(tfidf_matrix.shape) - 1))
+        svd = TruncatedSVD(n_components, algorithm="randomized", n_iter=n_iter, random_state=seed)
+        with span("lsa.svd"):
+            doc_vectors = svd.fit_transform(tfidf_matrix)
+        return cls(svd.components_.astype(np.float32), _normalize_rows(doc_vectors).astype(np.float32))
+
+    @property
+    def n_components(self):
+        return self.components.shape[0]
+
+    def transform(self, query_matrix):
+        """Matriks TF-IDF query (sparse) -> vektor laten l2-normalized (float32)."""
+        return _normalize_rows(np.asarray(query_matrix @ self.components.T, dtype=np.float32))
+
+
+# === 2. ANN: INVERTED FILE (IVF) DENGAN K-MEANS ===
+def assign_clusters(vectors, centroids, chunk_size=65536):
+    """Cluster terdekat (dot product terbesar) tiap vektor, dihitung per potongan agar memori terbatas."""
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        assign[start:start + chunk_size] = np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+    return assign
+
+
+def kmeans(vectors, n_clusters, n_iter=10, seed=0):
+    """
+    Spherical k-means (centroid l2-normalized, kemiripan = dot product).
+    Cluster yang kosong mempertahankan centroid lamanya.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].astype(np.float32)
+    for _ in range(n_iter):
+        assign = assign_clusters(vectors, centroids)
+        sizes = np.bincount(assign, minlength=n_clusters)
+        order = np.argsort(assign, kind="stable")
+        filled = sizes > 0
+        starts = np.r_[0, np.cumsum(sizes)[:-1]][filled]
+        centroids[filled] = _normalize_rows(np.add.reduceat(vectors[order], starts, axis=0))
+    return centroids
+
+
+class IVFIndex:
+    """
+    Dokumen dikelompokkan ke n_lists cluster k-means; vektor disimpan berurutan
+    per cluster (offsets). Query hanya dibandingkan dengan dokumen di n_probe
+    cluster dengan centroid terdekat, jadi biayanya ~ n_probe / n_lists dari
+    brute force. n_probe mengatur trade-off recall@k vs latensi
+    (n_probe = n_lists -> hasil sama dengan brute force).
+    """
+
+    def __init__(self, centroids, offsets, doc_ids, vectors):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, doc_vectors, n_lists=None, n_iter=10, seed=0, train_per_list=256):
+        """n_lists default ~ sqrt(jumlah dokumen); k-means dilatih pada sampel train_per_list x n_lists vektor."""
+        n_docs = len(doc_vectors)
+        n_lists = max(1, min(n_lists or int(round(np.sqrt(n_docs))), n_docs))
+        rng = np.random.default_rng(seed)
+        train = doc_vectors
+        if n_docs > train_per_list * n_lists:
+            train = doc_vectors[np.sort(rng.choice(n_docs, train_per_list * n_lists, replace=False))]
+        with span("lsa.kmeans"):
+            centroids = kmeans(train, n_lists, n_iter, seed)
+            assign = assign_clusters(doc_vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.r_[0, np.cumsum(np.bincount(assign, minlength=n_lists))].astype(np.int64)
+        return cls(centroids, offsets, order.astype(np.int32), np.ascontiguousarray(doc_vectors[order]))
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def search(self, query_vectors, k, n_probe=8):
+        """Top-k per query: list (doc ID, skor), masing-masing array urut skor menurun."""
+        n_probe = max(1, min(n_probe, self.n_lists))
+        probes = top_k(query_vectors @ self.centroids.T, n_probe)
+        results = []
+        for query, lists in zip(query_vectors, probes):
+            starts = self.offsets[lists]
+            candidates = _ranges(starts, self.offsets[lists + 1] - starts)
+            scores = self.vectors[candidates] @ query
+            top = top_k(scores, k)[0]
+            results.append((self.doc_ids[candidates[top]], scores[top]))
+        return results
+
+    def exact_search(self, query_vectors, k):
+        """Brute force atas semua dokumen (referensi recall@k)."""
+        scores = query_vectors @ self.vectors.T
+        top = top_k(scores, k)
+        return [(self.doc_ids[row], s[row]) for row, s in zip(top, scores)]
+
+
+def recall_at_k(exact, approx):
+    """Rata-rata |top-k ANN ∩ top-k brute force| / k atas semua query."""
+    recalls = [len(np.intersect1d(e_ids, a_ids)) / len(e_ids) for (e_ids, _), (a_ids, _) in zip(exact, approx)
+               if len(e_ids)]
+    return float(np.mean(recalls)) if recalls else 1.0
+
+
+# === 3. LSA + IVF UNTUK INDEX DI DISK ===
+class LSAIndex:
+    """
+    Pencarian semantik: query -> TF-IDF (transform) -> vektor LSA -> top-k IVF.
+    Disimpan di folder index (lsa_*.npy, ivf_*.npy, lsa_meta.json) dan terikat
+    build_id index: setelah index dibangun ulang / di-patch, LSA harus dibangun ulang.
+    """
+
+    def __init__(self, model, ivf, doc_names, transform):
+        self.model = model
+        self.ivf = ivf
+        self.doc_names = doc_names
+        self.transform = transform  # list query -> matriks TF-IDF (baris = query)
+
+    @classmethod
+    def fit(cls, tfidf_matrix, doc_names, transform, n_components=100, n_lists=None, seed=0):
+        model = LSAModel.fit(tfidf_matrix, n_components, seed=seed)
+        return cls(model, IVFIndex.build(model.doc_vectors, n_lists, seed=seed), doc_names, transform)
+
+    def save(self, out_dir, build_id=None):
+        np.save(os.path.join(out_dir, "lsa_components.npy"), self.model.components)
+        np.save(os.path.join(out_dir, "ivf_centroids.npy"), self.ivf.centroids)
+        np.save(os.path.join(out_dir, "ivf_offsets.npy"), self.ivf.offsets)
+        np.save(os.path.join(out_dir, "ivf_doc_ids.npy"), self.ivf.doc_ids)
+        np.save(os.path.join(out_dir, "ivf_vectors.npy"), self.ivf.vectors)
+        # lsa_meta.json ditulis terakhir, sama seperti meta.json index
+        meta = {"build_id": build_id, "n_docs": len(self.doc_names), "n_components": self.model.n_components,
+                "n_lists": self.ivf.n_lists}
+        with open(os.path.join(out_dir, LSA_META), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+    @classmethod
+    def load(cls, index):
+        """LSAIndex tersimpan untuk SavedIndex; FileNotFoundError / ValueError jika belum ada atau usang."""
+        meta_path = os.path.join(index.index_dir, LSA_META)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Index LSA belum dibangun di '{index.index_dir}'.")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("build_id") != index.version:
+            raise ValueError("Index LSA usang (index sudah dibangun ulang).")
+        ivf = IVFIndex(index._load("ivf_centroids.npy"), index._load("ivf_offsets.npy"),
+                       index._load("ivf_doc_ids.npy"), index._load("ivf_vectors.npy"))
+        model = LSAModel(index._load("lsa_components.npy"), None)
+        return cls(model, ivf, index.doc_names, index.transform_batch)
+
+    @classmethod
+    def open(cls, index, n_components=100, n_lists=None):
+        """LSA tersimpan jika masih sesuai index; jika tidak, fit di memori dari matriks TF-IDF index."""
+        try:
+            return cls.load(index)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"ℹ️ {e} Fit LSA di memori (simpan dengan: python src/lsa.py build) ...")
+            return cls.fit(index.tfidf_matrix, index.doc_names, index.transform_batch, n_components, n_lists)
+
+    def query_vectors(self, queries):
+        with span("lsa.transform"):
+            return self.model.transform(self.transform(queries))
+
+    def search_batch(self, queries, k=3, n_probe=8):
+        vectors = self.query_vectors(queries)
+        with span("lsa.ivf"):
+            hits = self.ivf.search(vectors, k, n_probe)
+        return [[(self.doc_names[i], float(s)) for i, s in zip(ids, scores)] for ids, scores in hits]
+
+    def search(self, query, k=3, n_probe=8):
+        return self.search_batch([query], k, n_probe)[0]
+
+
+# === 4. MAIN: BUILD & LAPORAN RECALL@K VS LATENSI ===
+if __name__ == "__main__":
+    from index_store import load_index
+    from quantize import sample_queries
+
+    parser = argparse.ArgumentParser(description="LSA (TruncatedSVD) + index ANN IVF untuk pencarian semantik")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Fit LSA + IVF dari index TF-IDF dan simpan ke folder index")
+    build.add_argument("--index", default="data/index", help="Folder index hasil index_store.py")
+    build.add_argument("--components", type=int, default=100, help="Dimensi vektor LSA")
+    build.add_argument("--lists", type=int, default=0, help="Jumlah cluster IVF (0 = ~sqrt(jumlah dokumen))")
+    build.add_argument("--seed", type=int, default=0)
+    bench = sub.add_parser("bench", help="Recall@k dan latensi IVF untuk beberapa n_probe")
+    bench.add_argument("--index", default="data/index", help="Folder index hasil index_store.py")
+    bench.add_argument("--queries-file", default=None, help="Satu query per baris (default: query acak dari vocabulary)")
+    bench.add_argument("--n-queries", type=int, default=200)
+    bench.add_argument("--k", type=int, default=10)
+    bench.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    try:
+        index = load_index(args.index)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ {e}")
+        exit()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        lsa = LSAIndex.fit(index.tfidf_matrix, index.doc_names, index.transform_batch, args.components,
+                           args.lists or None, args.seed)
+        meta = lsa.save(args.index, index.version)
+        print(f"✅ LSA tersimpan di {args.index} ({time.perf_counter() - start:.1f} s)")
+        print(f"Dokumen: {meta['n_docs']} | Dimensi: {meta['n_components']} | Cluster IVF: {meta['n_lists']}")
+    else:
+        lsa = LSAIndex.open(index)
+        if args.queries_file:
+            with open(args.queries_file, "r", encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            queries = sample_queries(index.vocabulary, args.n_queries)
+        if not queries:
+            print("⚠️ Tidak ada query.")
+            exit()
+        vectors = lsa.query_vectors(queries)
+        start = time.perf_counter()
+        exact = lsa.ivf.exact_search(vectors, args.k)
+        exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        print(f"ℹ️ {len(queries)} query | k={args.k} | {lsa.ivf.n_lists} cluster | brute force: {exact_ms:.3f} ms/query\n")
+        print(f"{'n_probe':>8} {'recall@k':>9} {'ms/query':>9} {'speedup':>8}")
+        for n_probe in args.nprobe:
+            start = time.perf_counter()
+            approx = lsa.ivf.search(vectors, args.k, n_probe)
+            ms = (time.perf_counter() - start) * 1000 / len(queries)
+            print(f"{n_probe:>8} {recall_at_k(exact, approx):>9.4f} {ms:>9.3f} {exact_ms / ms if ms else 0:>7.1f}x")
@@ -0,0 +1,60 @@
+# src/manifest.py
+
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = ".manifest.json"
+
+
+# === 1. HASH ISI FILE ===
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# === 2. LOAD / SIMPAN MANIFEST ===
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# === 3. BANDINGKAN FOLDER DENGAN MANIFEST ===
+def diff_folder(folder, manifest, suffix=".txt"):
+    """
+    Kembalikan (changed, deleted, new_manifest).
+    - changed : file baru atau isinya berubah (terurut)
+    - deleted : file di manifest yang sudah tidak ada
+    File dengan mtime & ukuran sama dianggap tidak berubah tanpa di-hash;
+    jika mtime berubah, hash isi menentukan apakah benar-benar berubah.
+    """
+    new_manifest = {}
+    changed = []
+    names = sorted(f for f in os.listdir(folder) if f.endswith(suffix)) if os.path.exists(folder) else []
+
+    for filename in names:
+        st = os.stat(os.path.join(folder, filename))
+        entry = manifest.get(filename)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            new_manifest[filename] = entry
+            continue
+
+        digest = file_digest(os.path.join(folder, filename))
+        new_manifest[filename] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+        if not entry or entry["sha256"] != digest:
+            changed.append(filename)
+
+    deleted = sorted(set(manifest) - set(new_manifest))
+    return changed, deleted, new_manifest
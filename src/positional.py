@@ -0,0 +1,225 @@
+# src/positional.py
+
+import numpy as np
+from collections import defaultdict
+from postings import encode_postings, decode_postings, encode_varints, decode_varints, intersect_sorted
+
+# Doc dan posisi digabung jadi satu kunci int64: (doc << 32) | posisi
+_SHIFT = np.int64(32)
+
+
+# === 1. POSITION LIST TERKOMPRESI ===
+# Posisi token per posting (term, dokumen) disimpan terurut sebagai selisih
+# (delta) + varint, format yang sama dengan encode_postings. Dokumen
+# berulang-ulang memakai kata umum, jadi selisih posisi hampir selalu 1 byte.
+class PositionLists:
+    """
+    Position list banyak posting sekaligus (tanpa kompresi):
+    posting i punya posisi flat[starts[i]:starts[i] + lengths[i]].
+    """
+
+    def __init__(self, lengths, flat):
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.flat = np.asarray(flat, dtype=np.int64)
+        self.starts = np.cumsum(self.lengths) - self.lengths
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def take(self, ids):
+        """Posting diurutkan ulang / dipilih sesuai ids (mis. urutan CSC postings)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        lengths = self.lengths[ids]
+        return PositionLists(lengths, self.flat[_ranges(self.starts[ids], lengths)])
+
+    @staticmethod
+    def concat(parts):
+        return PositionLists(np.concatenate([p.lengths for p in parts]), np.concatenate([p.flat for p in parts]))
+
+    def encode(self):
+        """-> (offsets byte per posting, bytes varint) siap disimpan sebagai .npy."""
+        gaps = self.flat.copy()
+        gaps[1:] -= self.flat[:-1]
+        first = self.starts[self.lengths > 0]
+        gaps[first] = self.flat[first]  # posisi pertama tiap posting disimpan utuh
+        data, n_bytes = encode_varints(gaps)
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(n_bytes)[np.cumsum(self.lengths) - 1] if len(gaps) else 0
+        return offsets, data
+
+    @classmethod
+    def decode(cls, offsets, data):
+        """Kebalikan encode(): seluruh position list dalam satu lintasan vectorized."""
+        data = np.asarray(data)
+        gaps = decode_varints(data)
+        ends = np.flatnonzero(data < 0x80)  # byte terakhir tiap nilai
+        lengths = np.diff(np.searchsorted(ends, np.asarray(offsets)))
+        return cls(lengths, _segment_cumsum(gaps, lengths))
+
+
+def _ranges(starts, lengths):
+    """Gabungan arange(s, s + n) untuk setiap pasangan (s, n), vectorized."""
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    seg_start = np.cumsum(lengths) - lengths
+    return np.repeat(starts - seg_start, lengths) + np.arange(total)
+
+
+def _segment_cumsum(values, lengths):
+    """Cumsum yang diulang dari nol di awal setiap segmen (delta -> posisi absolut)."""
+    if not len(values):
+        return values
+    total = np.cumsum(values)
+    seg_start = np.cumsum(lengths) - lengths
+    before = total[seg_start[lengths > 0]] - values[seg_start[lengths > 0]]
+    return total - np.repeat(before, lengths[lengths > 0])
+
+
+# === 2. PENCOCOKAN FRASA & PROKSIMITAS ===
+# Input: kemunculan satu term sebagai pasangan array (doc, posisi) terurut.
+def match_phrase(occurrences):
+    """
+    Dokumen tempat term ke-i muncul di posisi p + i untuk semua i (frasa berurutan).
+    Posisi term ke-i digeser -i lalu kunci (doc, posisi awal) diiriskan antar term.
+    """
+    keys = None
+    for i, (docs, positions) in enumerate(occurrences):
+        valid = positions >= i
+        k = (docs[valid].astype(np.int64) << _SHIFT) | (positions[valid] - i)
+        keys = k if keys is None else np.intersect1d(keys, k, assume_unique=True)
+        if not len(keys):
+            break
+    return np.unique(keys >> _SHIFT)
+
+
+def match_near(occ_a, occ_b, distance):
+    """
+    Dokumen tempat a dan b muncul berjarak paling jauh `distance` kata (urutan bebas).
+    Untuk setiap kemunculan b cukup dicek tetangga terdekat a di kiri dan kanan.
+    """
+    key_a = (occ_a[0].astype(np.int64) << _SHIFT) | occ_a[1]
+    docs_b, pos_b = occ_b
+    key_b = (docs_b.astype(np.int64) << _SHIFT) | pos_b
+    if not len(key_a) or not len(key_b):
+        return np.empty(0, dtype=np.int64)
+    left = np.searchsorted(key_a, key_b, side="left") - 1    # kemunculan a sebelum b
+    right = np.searchsorted(key_a, key_b, side="right")      # kemunculan a sesudah b
+    left_a = key_a[np.maximum(left, 0)]
+    right_a = key_a[np.minimum(right, len(key_a) - 1)]
+    ok = (left >= 0) & (left_a >> _SHIFT == docs_b) & (key_b - left_a <= distance)
+    ok |= (right < len(key_a)) & (right_a >> _SHIFT == docs_b) & (right_a - key_b <= distance)
+    return np.unique(docs_b[ok])
+
+
+# === 3. INDEX POSISIONAL DI MEMORI (dict) ===
+class PositionalIndex(defaultdict):
+    """
+    Inverted index biasa (term -> set dokumen) ditambah position list
+    terkompresi per (term, dokumen): positions[term][doc] = bytes varint.
+    """
+
+    def __init__(self):
+        super().__init__(set)
+        self.positions = defaultdict(dict)
+        self.doc_order = {}
+
+    @classmethod
+    def from_docs(cls, docs):
+        index = cls()
+        for doc, tokens in docs.items():
+            index.doc_order[doc] = len(index.doc_order)
+            term_positions = defaultdict(list)
+            for i, token in enumerate(tokens):
+                term_positions[token].append(i)
+            for token, plist in term_positions.items():
+                index[token].add(doc)
+                index.positions[token][doc] = encode_postings(plist)
+        return index
+
+    def term_positions(self, term, doc):
+        if doc not in self.positions.get(term, {}):
+            return np.empty(0, dtype=np.int64)
+        return decode_postings(self.positions[term][doc])
+
+    def _occurrences(self, term, docs):
+        lists = [self.term_positions(term, doc) for doc in docs]
+        ids = np.repeat(np.arange(len(docs)), [len(p) for p in lists])
+        return ids, np.concatenate(lists).astype(np.int64) if lists else np.empty(0, dtype=np.int64)
+
+    def _candidates(self, terms):
+        if any(t not in self for t in terms):
+            return []
+        docs = set.intersection(*(self[t] for t in terms))
+        return sorted(docs, key=self.doc_order.get)
+
+    def phrase(self, terms):
+        """Set dokumen yang memuat frasa persis (term berurutan)."""
+        docs = self._candidates(terms)
+        if not docs or len(terms) == 1:
+            return set(docs)
+        return {docs[i] for i in match_phrase([self._occurrences(t, docs) for t in terms])}
+
+    def near(self, a, b, distance):
+        """Set dokumen tempat a dan b berjarak <= distance kata."""
+        docs = self._candidates([a, b])
+        if not docs:
+            return set()
+        return {docs[i] for i in match_near(self._occurrences(a, docs), self._occurrences(b, docs), distance)}
+
+
+# === 4. INDEX POSISIONAL DI DISK (array mmap) ===
+class PositionalPostings:
+    """
+    Position list di atas CompactIndex: posting ke-p (urutan postings_docs)
+    punya posisi di data[offsets[p]:offsets[p + 1]] (delta + varint).
+    """
+
+    def __init__(self, compact, offsets, data):
+        self.compact = compact
+        self.offsets = offsets
+        self.data = data
+
+    def term_positions(self, term, doc_id):
+        """Posisi term di satu dokumen (array kosong jika term tidak muncul di sana)."""
+        postings = self.compact.lookup(term)
+        i = np.searchsorted(postings, doc_id)
+        if i == len(postings) or postings[i] != doc_id:
+            return np.empty(0, dtype=np.int64)
+        return self._occurrences(term, np.asarray([doc_id]))[1]
+
+    def _occurrences(self, term, doc_ids):
+        """(doc ID, posisi) kemunculan term di doc_ids (subset postings term, terurut)."""
+        tid = self.compact.term_ids[term]
+        start, end = self.compact.offsets[tid], self.compact.offsets[tid + 1]
+        postings = self.compact.postings[start:end]
+        p = start + np.searchsorted(postings, doc_ids)
+        byte_start, byte_end = self.offsets[p], self.offsets[p + 1]
+        # Hanya byte milik dokumen kandidat yang di-decode
+        buf = np.asarray(self.data[_ranges(byte_start, byte_end - byte_start)])
+        gaps = decode_varints(buf)
+        ends = np.flatnonzero(buf < 0x80)
+        lengths = np.diff(np.searchsorted(ends, np.concatenate([[0], np.cumsum(byte_end - byte_start)])))
+        return np.repeat(doc_ids, lengths), _segment_cumsum(gaps, lengths)
+
+    def _candidates(self, terms):
+        if any(t not in self.compact.term_ids for t in terms):
+            return np.empty(0, dtype=np.int32)
+        lists = sorted((self.compact.lookup(t) for t in terms), key=len)
+        result = lists[0]
+        for postings in lists[1:]:
+            result = intersect_sorted(result, postings)
+        return result
+
+    def phrase(self, terms):
+        """Doc ID terurut yang memuat frasa persis."""
+        docs = self._candidates(terms)
+        if not len(docs) or len(terms) == 1:
+            return docs
+        return match_phrase([self._occurrences(t, docs) for t in terms]).astype(np.int32)
+
+    def near(self, a, b, distance):
+        docs = self._candidates([a, b])
+        if not len(docs):
+            return docs
+        return match_near(self._occurrences(a, docs), self._occurrences(b, docs), distance).astype(np.int32)
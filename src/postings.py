@@ -0,0 +1,194 @@
+# src/postings.py
+
+import sys
+import numpy as np
+from term_dict import TermDictionary
+
+# Semua postings disimpan sebagai doc ID integer terurut (int32)
+DOC_ID_DTYPE = np.int32
+EMPTY = np.empty(0, dtype=DOC_ID_DTYPE)
+
+
+# === 1. OPERASI POSTINGS TERURUT ===
+def intersect_sorted(a, b):
+    """
+    Irisan dua postings terurut. List terpendek dicari di list terpanjang
+    dengan binary search (galloping): O(m log n) dan bukan O(m + n),
+    sehingga AND term langka vs term umum tetap murah.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return EMPTY
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = len(b) - 1
+    return a[b[pos] == a]
+
+
+def union_sorted(lists):
+    """Gabungan k postings terurut (k-way merge + buang duplikat)."""
+    lists = [p for p in lists if len(p)]
+    if not lists:
+        return EMPTY
+    if len(lists) == 1:
+        return np.asarray(lists[0], dtype=DOC_ID_DTYPE)
+    # Sort stable (timsort) mendeteksi run terurut -> efektif merge k-way O(N log k)
+    merged = np.sort(np.concatenate(lists), kind="stable")
+    keep = np.empty(len(merged), dtype=bool)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep]
+
+
+def difference_sorted(a, b):
+    """Dokumen di a yang tidak ada di b (a AND NOT b) tanpa membangun komplemen."""
+    if len(a) == 0 or len(b) == 0:
+        return a
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = len(b) - 1
+    return a[b[pos] != a]
+
+
+# === 2. KOMPRESI DELTA + VARINT ===
+def encode_postings(doc_ids):
+    """Simpan selisih antar doc ID sebagai varint (7 bit per byte)."""
+    out = bytearray()
+    prev = 0
+    for doc_id in doc_ids:
+        gap = int(doc_id) - prev
+        prev = int(doc_id)
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+
+def decode_postings(buf):
+    ids = []
+    value = shift = prev = 0
+    for byte in buf:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            prev += value
+            ids.append(prev)
+            value = shift = 0
+    return np.asarray(ids, dtype=DOC_ID_DTYPE)
+
+
+def encode_varints(values):
+    """Versi vectorized: array integer non-negatif -> (bytes varint uint8, jumlah byte per nilai)."""
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        n_bytes += values >= np.uint64(1 << shift)
+    ends = np.cumsum(n_bytes)
+    starts = ends - n_bytes
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(int(n_bytes.max()) if len(values) else 0):
+        sel = n_bytes > k
+        chunk = (values[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (n_bytes[sel] - 1 > k).astype(np.uint64) << np.uint64(7)
+        out[starts[sel] + k] = chunk | more
+    return out, n_bytes
+
+
+def decode_varints(buf):
+    """Versi vectorized decode: bytes varint (uint8) -> array nilai int64 (tanpa delta)."""
+    if isinstance(buf, (bytes, bytearray, memoryview)):
+        buf = np.frombuffer(buf, dtype=np.uint8)
+    buf = np.asarray(buf, dtype=np.uint8)
+    ends = np.flatnonzero(buf < 0x80)
+    if not len(ends):
+        return np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    shift = (np.arange(len(buf)) - np.repeat(starts, ends - starts + 1)) * 7
+    values = (buf & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    return np.add.reduceat(values, starts).astype(np.int64)
+
+
+# === 3. INDEX POSTINGS KOMPAK ===
+class CompactIndex:
+    """
+    Inverted index berbasis array:
+    - terms       : TermDictionary (term terurut, term ID = posisi)
+    - offsets     : postings term i ada di postings[offsets[i]:offsets[i+1]]
+    - postings    : seluruh doc ID (int32) disambung jadi satu array
+    - doc_names   : tabel doc ID -> nama file (dan doc_ids untuk sebaliknya)
+    """
+
+    def __init__(self, terms, offsets, postings, doc_names):
+        # List term terurut dikompres jadi TermDictionary; terms dan term_ids objek yang sama
+        if not isinstance(terms, TermDictionary):
+            terms = TermDictionary.build(terms)
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.doc_names = doc_names
+        self.term_ids = terms
+        self.doc_ids = {name: i for i, name in enumerate(doc_names)}
+
+    @classmethod
+    def from_docs(cls, docs):
+        doc_names = list(docs.keys())
+        term_docs = {}
+        for doc_id, tokens in enumerate(docs.values()):
+            for token in set(tokens):
+                term_docs.setdefault(token, []).append(doc_id)
+
+        terms = sorted(term_docs)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(term_docs[t]) for t in terms])
+        postings = np.empty(offsets[-1], dtype=DOC_ID_DTYPE)
+        for i, term in enumerate(terms):
+            # doc ID ditambahkan berurutan, jadi list sudah terurut
+            postings[offsets[i]:offsets[i + 1]] = term_docs[term]
+        return cls(terms, offsets, postings, doc_names)
+
+    @classmethod
+    def from_inverted_index(cls, inverted_index, doc_names):
+        doc_ids = {name: i for i, name in enumerate(doc_names)}
+        terms = sorted(inverted_index.keys())
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        chunks = []
+        for i, term in enumerate(terms):
+            ids = np.sort(np.fromiter((doc_ids[d] for d in inverted_index[term]), dtype=DOC_ID_DTYPE))
+            chunks.append(ids)
+            offsets[i + 1] = offsets[i] + len(ids)
+        postings = np.concatenate(chunks) if chunks else EMPTY
+        return cls(terms, offsets, postings, doc_names)
+
+    @property
+    def n_docs(self):
+        return len(self.doc_names)
+
+    def lookup(self, term):
+        tid = self.term_ids.get(term)
+        if tid is None:
+            return EMPTY
+        return self.postings[self.offsets[tid]:self.offsets[tid + 1]]
+
+    def all_doc_ids(self):
+        return np.arange(self.n_docs, dtype=DOC_ID_DTYPE)
+
+    def to_names(self, doc_ids):
+        return [self.doc_names[i] for i in doc_ids]
+
+    def nbytes(self, compressed=False):
+        """Perkiraan memori postings (tanpa string term)."""
+        if not compressed:
+            return self.postings.nbytes + self.offsets.nbytes
+        return sum(len(encode_postings(self.lookup(t))) for t in self.terms) + self.offsets.nbytes
+
+
+def set_index_nbytes(inverted_index):
+    """
+    Perkiraan memori dict-of-set, untuk perbandingan: hanya objek set. String nama
+    file dipakai bersama oleh semua set dan tidak dihitung, sama seperti CompactIndex.nbytes().
+    """
+    total = 0
+    for doc_set in inverted_index.values():
+        total += sys.getsizeof(doc_set)
+    return total
@@ -3,19 +3,52 @@
 import os
 import re
 import string
+import argparse
 import nltk
+from functools import lru_cache
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 from nltk.corpus import stopwords
 from nltk.stem import PorterStemmer
 from collections import Counter
+from manifest import MANIFEST_NAME, load_manifest, save_manifest, diff_folder
+from profiling import span, count, profile_session
+from corpus import iter_documents
 
 # Download resource NLTK jika belum ada
 nltk.download('stopwords')
 
+# Resource berat dibuat sekali per proses (bukan per dokumen / per pemanggilan)
+_STOP_WORDS = None
+_STEMMER = None
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def get_stop_words():
+    global _STOP_WORDS
+    if _STOP_WORDS is None:
+        _STOP_WORDS = frozenset(stopwords.words('indonesian'))
+    return _STOP_WORDS
+
+
+def get_stemmer():
+    global _STEMMER
+    if _STEMMER is None:
+        _STEMMER = PorterStemmer()  # ganti dengan Sastrawi untuk Bahasa Indonesia jika ingin lebih akurat
+    return _STEMMER
+
+
+@lru_cache(maxsize=200_000)
+def stem_token(token):
+    # Memoisasi per token: kata yang sama di korpus cukup di-stem sekali
+    return get_stemmer().stem(token)
+
+
 # === 1. CASE FOLDING & CLEANING ===
 def clean(text):
     text = text.lower()  # case folding
     text = re.sub(r'\d+', '', text)  # hapus angka
-    text = text.translate(str.maketrans("", "", string.punctuation))  # hapus tanda baca
+    text = text.translate(_PUNCT_TABLE)  # hapus tanda baca
     text = text.strip()
     return text
 
@@ -26,51 +59,164 @@ def tokenize(text):
 
 # === 3. STOPWORD REMOVAL ===
 def remove_stopwords(tokens):
-    stop_words = set(stopwords.words('indonesian'))
+    stop_words = get_stop_words()
     filtered = [t for t in tokens if t not in stop_words]
     return filtered
 
 # === 4. STEMMING ===
 def stem(tokens):
-    stemmer = PorterStemmer()  # ganti dengan Sastrawi untuk Bahasa Indonesia jika ingin lebih akurat
-    stemmed = [stemmer.stem(t) for t in tokens]
+    stemmed = [stem_token(t) for t in tokens]
     return stemmed
 
 # === 5. PIPELINE UTAMA ===
 def preprocess_document(text):
-    text = clean(text)
-    tokens = tokenize(text)
-    tokens = remove_stopwords(tokens)
-    tokens = stem(tokens)
+    # Span per tahap hanya tercatat di proses ini (mode --workers 1)
+    with span("preprocess.clean"):
+        text = clean(text)
+    with span("preprocess.tokenize"):
+        tokens = tokenize(text)
+    with span("preprocess.stopwords"):
+        tokens = remove_stopwords(tokens)
+    with span("preprocess.stem"):
+        tokens = stem(tokens)
     return tokens
 
 # === 6. PROSES SEMUA FILE DI FOLDER RAW ===
-def preprocess_all(input_folder, output_folder):
+def _init_worker():
+    # Dipanggil sekali per proses worker: siapkan stopword set & stemmer
+    get_stop_words()
+    get_stemmer()
+
+
+def _process_file(args):
+    input_folder, filename = args
+    with open(os.path.join(input_folder, filename), "r", encoding="utf-8") as f:
+        text = f.read()
+    return filename, preprocess_document(text)
+
+
+def _output_name(name):
+    # Nama dokumen dari JSONL / file multi-dokumen -> nama file .txt yang aman
+    name = name.replace("/", "_").replace(os.sep, "_")
+    return name if name.endswith(".txt") else name + ".txt"
+
+
+def _process_text(args):
+    name, text = args
+    return _output_name(name), preprocess_document(text)
+
+
+def _bounded_map(pool, fn, jobs, window, chunksize):
+    """pool.map per jendela `window` job, supaya generator input tidak dikonsumsi habis sekaligus."""
+    jobs = iter(jobs)
+    while True:
+        chunk = list(islice(jobs, window))
+        if not chunk:
+            return
+        yield from pool.map(fn, chunk, chunksize=chunksize)
+
+
+def _write_batch(output_folder, batch):
+    for filename, tokens in batch:
+        output_path = os.path.join(output_folder, filename)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(" ".join(tokens))
+
+
+def _report(filename, tokens):
+    # Hitung token paling sering
+    counter = Counter(tokens)
+    print(f"\nDokumen: {filename}")
+    print("10 token paling sering:", counter.most_common(10))
+    print("Jumlah token total:", len(tokens))
+
+
+def preprocess_all(input_folder, output_folder, workers=1, batch_size=256, verbose=True, incremental=False):
+    """
+    Proses semua file .txt di input_folder. input_folder juga boleh file .jsonl
+    atau file multi-dokumen (lihat corpus.py): dokumen dibaca secara streaming.
+    workers > 1     : dokumen dialirkan ke process pool (stopword & stemmer dibuat
+                      sekali per worker), hasil ditulis per batch berisi batch_size dokumen.
+    incremental     : hanya proses file baru/berubah menurut manifest hash di
+                      output_folder, dan hapus hasil untuk file yang sudah dihapus
+                      (hanya untuk input berupa folder).
+    """
     os.makedirs(output_folder, exist_ok=True)
-    
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".txt"):
-            with open(os.path.join(input_folder, filename), "r", encoding="utf-8") as f:
-                text = f.read()
-            
-            tokens = preprocess_document(text)
-
-            # Simpan hasil ke data/processed
+    is_folder = os.path.isdir(input_folder)
+    if incremental and not is_folder:
+        print("ℹ️ Mode incremental hanya untuk input berupa folder, memproses semua dokumen ...")
+        incremental = False
+    if not is_folder:
+        jobs, process = iter_documents(input_folder), _process_text
+    elif incremental:
+        manifest_path = os.path.join(output_folder, MANIFEST_NAME)
+        changed, deleted, new_manifest = diff_folder(input_folder, load_manifest(manifest_path))
+        for filename in deleted:
             output_path = os.path.join(output_folder, filename)
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(" ".join(tokens))
-            
-            # Hitung token paling sering
-            counter = Counter(tokens)
-            print(f"\nDokumen: {filename}")
-            print("10 token paling sering:", counter.most_common(10))
-            print("Jumlah token total:", len(tokens))
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        if verbose:
+            print(f"Incremental: {len(changed)} berubah/baru, {len(deleted)} dihapus")
+        jobs, process = ((input_folder, f) for f in changed), _process_file
+    else:
+        names = sorted(f for f in os.listdir(input_folder) if f.endswith(".txt"))
+        jobs, process = ((input_folder, f) for f in names), _process_file
+
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        # chunksize besar mengurangi overhead IPC; input diambil per jendela sehingga
+        # korpus besar (JSONL / multi-dokumen) tidak dimuat seluruhnya ke memori
+        results = _bounded_map(pool, process, jobs, window=4 * batch_size * workers,
+                               chunksize=max(1, batch_size // workers))
+    else:
+        pool = None
+        results = map(process, jobs)
+
+    batch = []
+    n_docs = 0
+    try:
+        for filename, tokens in results:
+            batch.append((filename, tokens))
+            n_docs += 1
+            count("preprocess.docs")
+            count("preprocess.tokens", len(tokens))
+            if verbose:
+                _report(filename, tokens)
+            # Simpan hasil ke data/processed per batch
+            if len(batch) >= batch_size:
+                with span("preprocess.write_batch"):
+                    _write_batch(output_folder, batch)
+                batch = []
+        with span("preprocess.write_batch"):
+            _write_batch(output_folder, batch)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Manifest disimpan setelah semua output tertulis
+    if incremental:
+        save_manifest(manifest_path, new_manifest)
+    return n_docs
 
 # === 7. MAIN ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocessing dokumen data/raw -> data/processed")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah proses worker (pipeline paralel jika > 1)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Jumlah dokumen per batch penulisan")
+    parser.add_argument("--quiet", action="store_true", help="Jangan tampilkan statistik per dokumen")
+    parser.add_argument("--incremental", action="store_true", help="Hanya proses file baru/berubah (manifest hash)")
+    parser.add_argument("--profile", action="store_true", help="Tampilkan breakdown waktu per tahap")
+    parser.add_argument("--profile-out", default=None, help="Simpan hasil cProfile (.pstats) ke file ini")
+    parser.add_argument("--input", default=None,
+                        help="Folder, file .jsonl, atau file multi-dokumen (default: data/raw)")
+    parser.add_argument("--output", default=None, help="Folder output (default: data/processed)")
+    args = parser.parse_args()
+
     # Pastikan path selalu benar, tidak tergantung dari lokasi eksekusi
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  
-    raw_dir = os.path.join(base_dir, "data", "raw")
-    processed_dir = os.path.join(base_dir, "data", "processed")
+    raw_dir = args.input or os.path.join(base_dir, "data", "raw")
+    processed_dir = args.output or os.path.join(base_dir, "data", "processed")
 
-    preprocess_all(raw_dir, processed_dir)
+    with profile_session(args.profile, args.profile_out):
+        preprocess_all(raw_dir, processed_dir, workers=args.workers, batch_size=args.batch_size,
+                       verbose=not args.quiet, incremental=args.incremental)
@@ -0,0 +1,173 @@
+# src/profiling.py
+
+import sys
+import time
+import math
+import cProfile
+import pstats
+from contextlib import contextmanager
+
+# Status global: saat nonaktif, span()/count()/observe() tidak mencatat apa pun
+_enabled = False
+_started = None
+_histograms = {}
+_counters = {}
+
+
+# === 1. HISTOGRAM LATENSI (bucket logaritmik) ===
+class Histogram:
+    """
+    Histogram latensi dengan bucket log2 (dalam mikrodetik): memori konstan,
+    persentil diperkirakan dari bucket (galat relatif < 2x, cukup untuk breakdown).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = max(0, int(seconds * 1e6)).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q):
+        """Batas atas bucket yang memuat persentil q (detik), dibatasi min/max teramati."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                upper = (2 ** bucket - 1) / 1e6 if bucket else 1e-6
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+# === 2. SPAN, COUNTER, OBSERVASI ===
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """
+    Ukur durasi blok `with span("search.vsm.transform"): ...`.
+    Saat profiling nonaktif mengembalikan objek no-op yang sama (tanpa alokasi / timer).
+    """
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def count(name, n=1):
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name, seconds):
+    if _enabled:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(seconds)
+
+
+# === 3. KONTROL & LAPORAN ===
+def enable():
+    global _enabled, _started
+    _enabled = True
+    if _started is None:
+        _started = time.perf_counter()
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _started
+    _histograms.clear()
+    _counters.clear()
+    _started = time.perf_counter() if _enabled else None
+
+
+def report(file=None):
+    """Cetak breakdown per tahap: jumlah panggilan, total, rata-rata, p50/p99, dan % waktu wall."""
+    file = file or sys.stderr
+    wall = time.perf_counter() - _started if _started is not None else 0.0
+    print("\n=== PROFIL PER TAHAP ===", file=file)
+    print(f"{'tahap':<32} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'%wall':>6}",
+          file=file)
+    for name, h in sorted(_histograms.items(), key=lambda item: -item[1].total):
+        share = 100 * h.total / wall if wall else 0.0
+        print(f"{name:<32} {h.count:>7} {h.total * 1e3:>10.2f} {h.mean * 1e3:>9.3f} "
+              f"{h.percentile(50) * 1e3:>8.3f} {h.percentile(99) * 1e3:>8.3f} {share:>5.1f}%", file=file)
+    if _counters:
+        print("--- counter ---", file=file)
+        for name, value in sorted(_counters.items()):
+            print(f"{name:<32} {value:>7}", file=file)
+    print(f"Total wall time: {wall * 1e3:.2f} ms", file=file)
+
+
+@contextmanager
+def profile_session(enabled, pstats_path=None, file=None):
+    """
+    Aktifkan profiling untuk satu eksekusi CLI/chat. Jika pstats_path diberikan,
+    cProfile juga dijalankan dan hasilnya disimpan (buka dengan `python -m pstats`).
+    Breakdown dicetak ke stderr saat selesai.
+    """
+    if not enabled and not pstats_path:
+        yield
+        return
+    enable()
+    profiler = cProfile.Profile() if pstats_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(pstats_path)
+        report(file)
+        if profiler is not None:
+            print(f"\nTop 10 fungsi (cumulative), lengkapnya di {pstats_path}:", file=file or sys.stderr)
+            pstats.Stats(pstats_path, stream=file or sys.stderr).sort_stats("cumulative").print_stats(10)
+        disable()
@@ -0,0 +1,172 @@
+# src/quantize.py
+
+import time
+import argparse
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from positional import _ranges
+from ranking import top_k
+
+# Mode penyimpanan bobot dokumen: float64 (asli), float32 (1/2 memori), int8 (1/8 memori + skala per term)
+QUANTIZE_MODES = ("float64", "float32", "int8")
+INT8_MAX = 127
+
+
+# === 1. KUANTISASI BOBOT ===
+def term_scale(max_weights, mode):
+    """Skala int8 per term: bobot maksimum term dipetakan ke 127 (None untuk mode float)."""
+    if mode != "int8":
+        return None
+    max_weights = np.asarray(max_weights, dtype=np.float64)
+    return np.where(max_weights > 0, max_weights / INT8_MAX, 1.0)
+
+
+def quantize_weights(weights, terms, mode, scale=None):
+    """weights[i] milik term terms[i] -> array bobot dalam dtype mode."""
+    if mode == "float64":
+        return np.asarray(weights, dtype=np.float64)
+    if mode == "float32":
+        return np.asarray(weights, dtype=np.float32)
+    if mode == "int8":
+        q = np.rint(np.asarray(weights, dtype=np.float64) / scale[terms])
+        return np.clip(q, -INT8_MAX, INT8_MAX).astype(np.int8)
+    raise ValueError(f"Mode kuantisasi '{mode}' tidak dikenal (pilih: {', '.join(QUANTIZE_MODES)}).")
+
+
+def dequantize(values, terms, scale=None):
+    values = np.asarray(values, dtype=np.float64)
+    return values if scale is None else values * scale[terms]
+
+
+# === 2. SKOR DOT PRODUCT TERM-AT-A-TIME ===
+class ImpactScorer:
+    """
+    Bobot dokumen per term (postings: doc ID + bobot float64/float32/int8).
+    Baris dokumen TF-IDF sudah l2-normalized, jadi cosine = q · d: skor cukup
+    dijumlahkan dari postings term query saja (tanpa cosine_similarity yang
+    menormalisasi ulang, dan tanpa menyentuh dokumen lain). Untuk int8, skala
+    term dilipat ke bobot query sekali per term, bukan per posting.
+    """
+
+    def __init__(self, offsets, doc_ids, values, n_docs, scale=None):
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.values = values
+        self.n_docs = n_docs
+        self.scale = scale
+
+    @classmethod
+    def from_matrix(cls, weight_matrix, mode="float64"):
+        """weight_matrix: sparse dokumen x term (mis. TF-IDF float64) -> scorer dalam mode tertentu."""
+        by_term = sp.csc_matrix(weight_matrix)
+        by_term.sort_indices()
+        terms = np.repeat(np.arange(by_term.shape[1]), np.diff(by_term.indptr))
+        max_weights = np.zeros(by_term.shape[1])
+        np.maximum.at(max_weights, terms, np.abs(by_term.data))
+        scale = term_scale(max_weights, mode)
+        values = quantize_weights(by_term.data, terms, mode, scale)
+        return cls(by_term.indptr, by_term.indices, values, by_term.shape[0], scale)
+
+    @property
+    def mode(self):
+        return {np.dtype(np.float32): "float32", np.dtype(np.int8): "int8"}.get(self.values.dtype, "float64")
+
+    @property
+    def nbytes(self):
+        """Memori bobot + doc ID (tanpa offsets)."""
+        scale = self.scale.nbytes if self.scale is not None else 0
+        return self.values.nbytes + self.doc_ids.nbytes + scale
+
+    def scores(self, query_matrix):
+        """Matriks skor padat (jumlah query x dokumen) untuk query sparse (baris l2-normalized)."""
+        query_matrix = sp.csr_matrix(query_matrix)
+        n_queries = query_matrix.shape[0]
+        terms = query_matrix.indices
+        q_weights = query_matrix.data.astype(np.float64)
+        if self.scale is not None:
+            q_weights = q_weights * self.scale[terms]
+        starts = np.asarray(self.offsets[terms], dtype=np.int64)
+        lengths = np.asarray(self.offsets[terms + 1], dtype=np.int64) - starts
+        postings = _ranges(starts, lengths)
+        rows = np.repeat(np.repeat(np.arange(n_queries), np.diff(query_matrix.indptr)), lengths)
+        contrib = np.asarray(self.values[postings], dtype=np.float64) * np.repeat(q_weights, lengths)
+        keys = rows * self.n_docs + np.asarray(self.doc_ids[postings], dtype=np.int64)
+        return np.bincount(keys, weights=contrib, minlength=n_queries * self.n_docs).reshape(n_queries, self.n_docs)
+
+
+# === 3. SELISIH AKURASI TERHADAP FLOAT64 ===
+def ranking_diff(reference_scores, scores, k=10):
+    """
+    Bandingkan ranking top-k skor terkuantisasi dengan skor float64:
+    - overlap  : rata-rata |top-k ∩ top-k referensi| / k
+    - same_order: fraksi query dengan urutan top-k identik
+    - max_abs_err / mean_abs_err: selisih skor di dokumen top-k referensi
+    """
+    reference_scores = np.atleast_2d(reference_scores)
+    scores = np.atleast_2d(scores)
+    ref_top, top = top_k(reference_scores, k), top_k(scores, k)
+    k = ref_top.shape[1]
+    if not k or not len(ref_top):
+        return {"overlap": 1.0, "same_order": 1.0, "max_abs_err": 0.0, "mean_abs_err": 0.0}
+    overlap = np.mean([len(np.intersect1d(a, b)) / k for a, b in zip(ref_top, top)])
+    err = np.abs(np.take_along_axis(reference_scores, ref_top, axis=1) - np.take_along_axis(scores, ref_top, axis=1))
+    return {
+        "overlap": float(overlap),
+        "same_order": float(np.mean((ref_top == top).all(axis=1))),
+        "max_abs_err": float(err.max()),
+        "mean_abs_err": float(err.mean()),
+    }
+
+
+def sample_queries(vocabulary, n, max_terms=3, seed=0):
+    """Query acak 1..max_terms term dari vocabulary (untuk laporan akurasi tanpa query log)."""
+    rng = np.random.default_rng(seed)
+    terms = list(vocabulary)
+    return [" ".join(rng.choice(terms, size=rng.integers(1, max_terms + 1))) for _ in range(n)] if terms else []
+
+
+# === 4. MAIN: LAPORAN AKURASI & MEMORI PER MODE ===
+if __name__ == "__main__":
+    from index_store import load_index
+
+    parser = argparse.ArgumentParser(description="Bandingkan ranking TF-IDF float32/int8 dengan float64")
+    parser.add_argument("--index", default="data/index", help="Folder index hasil index_store.py")
+    parser.add_argument("--queries-file", default=None, help="Satu query per baris (default: query acak dari vocabulary)")
+    parser.add_argument("--n-queries", type=int, default=200, help="Jumlah query acak jika tanpa --queries-file")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", choices=QUANTIZE_MODES, default=["float32", "int8"])
+    args = parser.parse_args()
+
+    try:
+        index = load_index(args.index)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ {e}")
+        exit()
+    if args.queries_file:
+        with open(args.queries_file, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sample_queries(index.vocabulary, args.n_queries)
+    if not queries:
+        print("⚠️ Tidak ada query.")
+        exit()
+
+    # Referensi float64 dihitung ulang dari hitungan mentah + IDF (sama dengan saat build)
+    weighted = sp.csr_matrix(index.tf_matrix, dtype=np.float64)
+    weighted.data *= index.idf[weighted.indices]
+    reference = ImpactScorer.from_matrix(normalize(weighted, norm="l2"))
+    query_matrix = index.transform_batch(queries)
+    reference_scores = reference.scores(query_matrix)
+
+    scorers = [(f"index ({index.quantize})", index.impacts())]
+    scorers += [(mode, ImpactScorer.from_matrix(normalize(weighted, norm="l2"), mode)) for mode in args.modes]
+    print(f"ℹ️ {len(queries)} query | k={args.k} | referensi float64: {reference.nbytes / 2 ** 20:.2f} MB\n")
+    print(f"{'mode':<18} {'MB':>8} {'ms/query':>9} {'overlap':>8} {'urutan':>8} {'max_err':>10} {'mean_err':>10}")
+    for name, scorer in scorers:
+        start = time.perf_counter()
+        scores = scorer.scores(query_matrix)
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        diff = ranking_diff(reference_scores, scores, args.k)
+        print(f"{name:<18} {scorer.nbytes / 2 ** 20:>8.2f} {ms:>9.3f} {diff['overlap']:>8.4f} "
+              f"{diff['same_order']:>8.4f} {diff['max_abs_err']:>10.2e} {diff['mean_abs_err']:>10.2e}")
@@ -0,0 +1,346 @@
+# src/query_parser.py
+
+import re
+import numpy as np
+from postings import intersect_sorted, union_sorted, difference_sorted
+
+# Token query: frasa dalam kutip, kurung, operator NEAR/k, atau term
+# (huruf/angka/underscore + wildcard '*')
+TOKEN_RE = re.compile(r'"[^"]*"|\(|\)|(?i:NEAR)/\d+|[\w*]+')
+NEAR_RE = re.compile(r"(?i:NEAR)/(\d+)$")
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+# === 1. NODE AST ===
+class Term:
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return f"Term({self.text!r})"
+
+
+class Phrase:
+    """Frasa persis "a b c": term harus muncul berurutan (butuh index posisional)."""
+
+    def __init__(self, terms):
+        self.terms = terms
+
+    def __repr__(self):
+        return f"Phrase({self.terms!r})"
+
+
+class Near:
+    """a NEAR/k b: kedua term muncul berjarak paling jauh k kata, urutan bebas."""
+
+    def __init__(self, left, right, distance):
+        self.left = left
+        self.right = right
+        self.distance = distance
+
+    def __repr__(self):
+        return f"Near({self.left!r}, {self.right!r}, {self.distance})"
+
+
+class And:
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return f"And({self.children!r})"
+
+
+class Or:
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return f"Or({self.children!r})"
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return f"Not({self.child!r})"
+
+
+# === 2. PARSER (recursive descent) ===
+# Prioritas: NEAR > NOT > AND > OR. Dua term berdampingan dianggap AND,
+# dan "a NOT b" dibaca sebagai "a AND NOT b". Rantai "a NEAR/2 b NEAR/3 c"
+# dibaca sebagai "(a NEAR/2 b) AND (b NEAR/3 c)".
+#
+#   expr   := and_expr ("OR" and_expr)*
+#   and    := unary (["AND"] unary)*
+#   unary  := "NOT" unary | near
+#   near   := atom ("NEAR/k" TERM)*
+#   atom   := TERM | PHRASE | "(" expr ")"
+def parse(query):
+    if query.count('"') % 2:
+        raise QuerySyntaxError("Tanda kutip '\"' tidak ditutup.")
+    tokens = TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        tok = tokens[pos]
+        pos += 1
+        return tok
+
+    def parse_or():
+        children = [parse_and()]
+        while peek() is not None and peek().upper() == "OR":
+            take()
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and():
+        children = [parse_unary()]
+        while peek() is not None and peek() != ")" and peek().upper() != "OR":
+            if peek().upper() == "AND":
+                take()
+            children.append(parse_unary())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_unary():
+        tok = peek()
+        if tok is not None and tok.upper() == "NOT":
+            take()
+            return Not(parse_unary())
+        return parse_near()
+
+    def parse_near():
+        node = parse_atom()
+        pairs = []
+        while peek() is not None and NEAR_RE.match(peek()):
+            distance = int(NEAR_RE.match(take()).group(1))
+            right = parse_atom()
+            left = pairs[-1].right if pairs else node
+            if not isinstance(left, Term) or not isinstance(right, Term) or "*" in left.text + right.text:
+                raise QuerySyntaxError("Operand NEAR harus berupa satu term (tanpa wildcard).")
+            pairs.append(Near(left, right, distance))
+        if not pairs:
+            return node
+        return pairs[0] if len(pairs) == 1 else And(pairs)
+
+    def parse_atom():
+        tok = peek()
+        if tok is None:
+            raise QuerySyntaxError("Query berakhir sebelum term ditemukan.")
+        if tok == "(":
+            take()
+            node = parse_or()
+            if peek() != ")":
+                raise QuerySyntaxError("Kurung buka '(' tidak ditutup.")
+            take()
+            return node
+        if tok == ")" or tok.upper() in OPERATORS or NEAR_RE.match(tok):
+            raise QuerySyntaxError(f"Token '{tok}' tidak diharapkan di posisi {pos}.")
+        take()
+        if tok.startswith('"'):
+            # Isi frasa dicocokkan persis per token (tanpa ekspansi substring/wildcard)
+            words = re.findall(r"\w+", tok.lower())
+            if not words:
+                raise QuerySyntaxError("Frasa dalam kutip kosong.")
+            return Phrase(words)
+        return Term(tok.lower())
+
+    if not tokens:
+        return None
+    node = parse_or()
+    if pos != len(tokens):
+        raise QuerySyntaxError(f"Token '{tokens[pos]}' tidak diharapkan di posisi {pos}.")
+    return simplify(node)
+
+
+def simplify(node):
+    """Ratakan And/Or bersarang dan hilangkan NOT ganda."""
+    if isinstance(node, Not):
+        child = simplify(node.child)
+        return child.child if isinstance(child, Not) else Not(child)
+    if isinstance(node, (And, Or)):
+        flat = []
+        for child in map(simplify, node.children):
+            flat.extend(child.children if type(child) is type(node) else [child])
+        return type(node)(flat)
+    return node
+
+
+def canonical(node):
+    """
+    Bentuk kanonik AST (untuk kunci cache). AND/OR komutatif, jadi operand
+    diurutkan: "hutan AND pedang" dan "(pedang hutan)" menghasilkan kunci sama.
+    """
+    if node is None:
+        return ""
+    if isinstance(node, Term):
+        return node.text
+    if isinstance(node, Phrase):
+        return '"' + " ".join(node.terms) + '"'
+    if isinstance(node, Near):
+        # NEAR simetris: operand diurutkan
+        left, right = sorted([node.left.text, node.right.text])
+        return f"{left} NEAR/{node.distance} {right}"
+    if isinstance(node, Not):
+        return f"NOT {canonical(node.child)}"
+    op = " AND " if isinstance(node, And) else " OR "
+    return "(" + op.join(sorted(map(canonical, node.children))) + ")"
+
+
+# === 3. BACKEND OPERASI HIMPUNAN ===
+class _PositionalMixin:
+    """Frasa & NEAR diteruskan ke index posisional (positional.py), jika ada."""
+
+    def _positions(self):
+        if self.positions is None:
+            raise QuerySyntaxError("Frasa dan NEAR butuh index posisional (build dengan positional=True).")
+        return self.positions
+
+    def phrase(self, terms):
+        return self._positions().phrase(terms)
+
+    def near(self, a, b, distance):
+        return self._positions().near(a, b, distance)
+
+
+class ArrayBackend(_PositionalMixin):
+    """Postings berupa array doc ID terurut (CompactIndex / PostingsView)."""
+
+    def __init__(self, lookup, n_docs, positions=None):
+        self.lookup = lookup
+        self.n_docs = n_docs
+        self.positions = positions
+
+    def size(self, docs):
+        return len(docs)
+
+    def intersect(self, a, b):
+        return intersect_sorted(a, b)
+
+    def union(self, parts):
+        return union_sorted(parts)
+
+    def difference(self, a, b):
+        return difference_sorted(a, b)
+
+    def all_docs(self):
+        return np.arange(self.n_docs, dtype=np.int32)
+
+
+class SetBackend(_PositionalMixin):
+    """Postings berupa set nama dokumen (dict inverted index biasa)."""
+
+    def __init__(self, lookup, all_docs, positions=None):
+        self.lookup = lookup
+        self._all_docs = all_docs
+        self.positions = positions
+
+    def size(self, docs):
+        return len(docs)
+
+    def intersect(self, a, b):
+        return a & b
+
+    def union(self, parts):
+        return set().union(*parts)
+
+    def difference(self, a, b):
+        return a - b
+
+    def all_docs(self):
+        return self._all_docs() if callable(self._all_docs) else self._all_docs
+
+
+# === 4. PLANNER & EKSEKUSI ===
+class QueryPlanner:
+    """
+    Eksekusi AST dengan rencana berbasis biaya:
+    - operand AND diurutkan dari postings terpendek
+    - "a AND NOT b" dihitung sebagai selisih a - b (tanpa komplemen penuh)
+    - berhenti lebih awal begitu hasil antara kosong
+    - jika ada cache (ResultCache), hasil subekspresi dipakai ulang antar query
+    """
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache
+        self._lookups = {}
+
+    def lookup(self, term):
+        if term not in self._lookups:
+            self._lookups[term] = self.backend.lookup(term)
+        return self._lookups[term]
+
+    def estimate(self, node):
+        """Perkiraan ukuran hasil (batas atas) untuk mengurutkan operand."""
+        if isinstance(node, Term):
+            return self.backend.size(self.lookup(node.text))
+        if isinstance(node, Phrase):
+            # Hasil ekspansi term mencakup term persisnya -> tetap batas atas
+            return min(self.backend.size(self.lookup(t)) for t in node.terms)
+        if isinstance(node, Near):
+            return min(self.estimate(node.left), self.estimate(node.right))
+        if isinstance(node, And):
+            positives = [c for c in node.children if not isinstance(c, Not)]
+            return min(map(self.estimate, positives)) if positives else float("inf")
+        if isinstance(node, Or):
+            return sum(map(self.estimate, node.children))
+        return float("inf")  # NOT murni: komplemen, paling mahal
+
+    def execute(self, node):
+        if isinstance(node, Term):
+            return self.lookup(node.text)
+        if self.cache is None:
+            return self._execute(node)
+        # Subekspresi (mis. "pedang AND hutan") di-cache dengan kunci kanonik
+        return self.cache.get_or_compute(("boolean", canonical(node)), lambda: self._execute(node))
+
+    def _execute(self, node):
+        backend = self.backend
+
+        if isinstance(node, Phrase):
+            return backend.phrase(node.terms)
+
+        if isinstance(node, Near):
+            return backend.near(node.left.text, node.right.text, node.distance)
+
+        if isinstance(node, Or):
+            return backend.union([self.execute(c) for c in node.children])
+
+        if isinstance(node, Not):
+            return backend.difference(backend.all_docs(), self.execute(node.child))
+
+        # And: operand positif dulu (termurah), lalu kurangi operand NOT
+        positives = sorted((c for c in node.children if not isinstance(c, Not)), key=self.estimate)
+        negatives = [c.child for c in node.children if isinstance(c, Not)]
+
+        if positives:
+            result = self.execute(positives[0])
+            for child in positives[1:]:
+                if not backend.size(result):
+                    return result
+                result = backend.intersect(result, self.execute(child))
+        else:
+            # Semua operand NOT: NOT a AND NOT b = semua - (a OR b)
+            return backend.difference(backend.all_docs(), backend.union([self.execute(c) for c in negatives]))
+
+        for child in sorted(negatives, key=self.estimate):
+            if not backend.size(result):
+                break
+            result = backend.difference(result, self.execute(child))
+        return result
+
+
+def run_query(query, backend, cache=None):
+    node = parse(query)
+    if node is None:
+        return backend.union([])
+    return QueryPlanner(backend, cache).execute(node)
@@ -0,0 +1,44 @@
+# src/ranking.py
+
+import numpy as np
+from profiling import span
+
+
+# === 1. TOP-K TANPA SORT PENUH ===
+def top_k(scores, k):
+    """
+    Indeks top-k per baris matriks skor (query x dokumen), urut skor menurun.
+    Kandidat dipilih dengan partisi O(n) (bukan sort penuh), lalu hanya k itu yang diurutkan.
+    Skor sama diurutkan dari indeks dokumen terbesar, sama seperti argsort()[::-1].
+    """
+    scores = np.atleast_2d(np.asarray(scores))
+    n_queries, n_docs = scores.shape
+    k = max(0, min(k, n_docs))
+    if k == 0:
+        return np.empty((n_queries, 0), dtype=np.intp)
+
+    if k < n_docs:
+        # Nilai ke-k terbesar per baris (partisi O(n)); semua skor di atasnya masuk,
+        # sisa slot diisi skor yang sama dengan nilai itu dari indeks terbesar
+        kth = np.partition(scores, n_docs - k, axis=1)[:, n_docs - k][:, None]
+        above = scores > kth
+        need = k - above.sum(axis=1, keepdims=True)
+        tied = scores == kth
+        from_right = np.cumsum(tied[:, ::-1], axis=1)[:, ::-1]
+        mask = above | (tied & (from_right <= need))
+        candidates = np.nonzero(mask)[1].reshape(n_queries, k)
+    else:
+        candidates = np.broadcast_to(np.arange(n_docs), (n_queries, n_docs))
+    # Urutkan kandidat: skor menurun, lalu indeks dokumen menurun
+    candidates = np.sort(candidates, axis=1)[:, ::-1]
+    cand_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-cand_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def ranked_results(scores, doc_names, k):
+    """Matriks skor -> list hasil per query: [[(nama dokumen, skor), ...], ...]."""
+    scores = np.atleast_2d(np.asarray(scores))
+    with span("rank.top_k"):
+        top = top_k(scores, k)
+    return [[(doc_names[i], scores[q, i]) for i in row] for q, row in enumerate(top)]
@@ -0,0 +1,151 @@
+# src/result_cache.py
+
+import sys
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# === 1. NORMALISASI KUNCI QUERY ===
+def normalize_query(query):
+    """
+    Kunci query ranking (VSM/BM25): huruf kecil, spasi dirapikan, token diurutkan.
+    Kedua model berbasis bag-of-words, jadi "Hutan  Pedang" == "pedang hutan".
+    """
+    return " ".join(sorted(query.lower().split()))
+
+
+def _sizeof(value):
+    """Perkiraan ukuran nilai cache dalam byte (array numpy, set, atau list hasil)."""
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return sys.getsizeof(value) + 64 * len(value)
+    return sys.getsizeof(value)
+
+
+# === 2. CACHE LRU TERIKAT VERSI INDEX ===
+class ResultCache:
+    """
+    Cache hasil query (ranking maupun Boolean) dengan eviksi LRU.
+    - maxsize   : jumlah entri maksimum
+    - max_bytes : batas perkiraan ukuran total (None = tanpa batas)
+    Setiap entri terikat pada versi index; begitu versi berubah (index
+    dibangun ulang / di-patch / folder di-refit) seluruh isi cache dibuang.
+    """
+
+    def __init__(self, maxsize=1024, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()  # key -> (nilai, ukuran)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def check_version(self, version):
+        """Kosongkan cache jika versi index berbeda dari versi saat entri disimpan."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.nbytes = 0
+                self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def record_hit(self):
+        """Catat hit tanpa lookup (mis. query duplikat dalam satu batch)."""
+        with self._lock:
+            self.hits += 1
+
+    def put(self, key, value, version=_MISSING):
+        """version: versi index asal nilai; jika cache sudah pindah ke versi lain, nilai tidak disimpan."""
+        if self.maxsize <= 0:
+            return
+        size = _sizeof(value)
+        with self._lock:
+            if version is not _MISSING and version != self.version:
+                return
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while len(self._entries) > self.maxsize or (
+                    self.max_bytes is not None and self.nbytes > self.max_bytes and len(self._entries) > 1):
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self.nbytes -= old_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "nbytes": self.nbytes,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"Cache: {s['hits']} hit, {s['misses']} miss (hit rate {s['hit_rate']:.0%}), "
+                f"{s['entries']} entri, {s['evictions']} eviksi")
+
+
+# === 3. PENCARIAN RANKING DENGAN CACHE ===
+def cached_search_batch(cache, search_batch, queries, model, k, params=(), version=None):
+    """
+    Bungkus fungsi search_batch(queries, k): query yang sudah ada di cache
+    langsung dijawab, sisanya (unik) dihitung dalam satu batch.
+    """
+    cache.check_version(version)
+    keys = [(model, normalize_query(q), k) + tuple(params) for q in queries]
+    results = [None] * len(queries)
+
+    pending = {}
+    for i, key in enumerate(keys):
+        if key in pending:
+            # Duplikat di batch yang sama: dihitung sekali, dianggap hit
+            pending[key].append(i)
+            cache.record_hit()
+            continue
+        result = cache.get(key, _MISSING)
+        if result is _MISSING:
+            pending[key] = [i]
+        else:
+            results[i] = result
+    if pending:
+        fresh = search_batch([queries[rows[0]] for rows in pending.values()], k)
+        for (key, rows), result in zip(pending.items(), fresh):
+            # Index bisa berganti selagi batch dihitung: hasil versi lama tidak masuk cache versi baru
+            cache.put(key, result, version)
+            for i in rows:
+                results[i] = result
+    return results
@@ -1,64 +1,59 @@
 import argparse
-import os
+import sys
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from boolean_retrieval import build_inverted_index
-import numpy as np
+from corpus import load_documents
+from index_store import load_index
+from term_lookup import TermExpander
+from bm25 import BM25Index
+from ranking import ranked_results
+from dynamic_pruning import WandIndex
+from query_parser import run_query, ArrayBackend, SetBackend, QuerySyntaxError
+from result_cache import ResultCache, cached_search_batch
+from profiling import span, count, profile_session
+from snippets import SnippetStore, read_snippet
+from lsa import LSAIndex
 
 # === 1. LOAD DOKUMEN ===
-def load_documents(folder):
-    docs = {}
-    if not os.path.exists(folder):
-        print(f"⚠️ Folder {folder} tidak ditemukan!")
-        return docs
-    for filename in os.listdir(folder):
-        if filename.endswith(".txt"):
-            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
-                # 🟢 ubah ke list token (sesuai format hasil preprocessing)
-                docs[filename] = f.read().lower().split()
-    return docs
-
-
-# === 2. BOOLEAN SEARCH (versi final fix) ===
-def boolean_search(query, inverted_index):
+# load_documents diimpor dari corpus.py: reader streaming bersama (folder, JSONL,
+# file multi-dokumen) dengan satu aturan normalisasi untuk semua model.
+
+
+# === 2. BOOLEAN SEARCH ===
+def boolean_search(query, inverted_index, expander=None, cache=None):
     """
     Boolean Search:
-    - Mendukung AND, OR, NOT
-    - Mencari token mirip (substring match)
+    - Mendukung AND, OR, NOT dengan prioritas (NOT > AND > OR) dan kurung
+    - Frasa "rumah tua" dan proksimitas pedang NEAR/3 hutan (index posisional)
+    - Mencari token mirip (substring match) dan wildcard '*' lewat index trigram
+    - cache (ResultCache) opsional: hasil subekspresi dipakai ulang antar query
     """
-    tokens = query.lower().split()
-    result = set()
-    operator = None
-
-    for token in tokens:
-        token = token.strip().lower()
-
-        if token in ["and", "or", "not"]:
-            operator = token
-            continue
+    if expander is None:
+        # Index tersimpan (PostingsView) menyimpan expander-nya sendiri; dict biasa dibuatkan baru
+        with span("boolean.term_index"):
+            expander = getattr(inverted_index, "expander", None) or TermExpander(inverted_index)
 
-        # cari token yang mirip (misal 'pedang' cocok dengan 'pedang' atau 'pedangnya')
-        matched_terms = [t for t in inverted_index.keys() if token in t]
+    # cari token yang mirip (misal 'pedang' cocok dengan 'pedang' atau 'pedangnya')
+    if expander.compact:
+        backend = ArrayBackend(expander.expand, len(inverted_index.doc_names), inverted_index.positional)
+        with span("boolean.query"):
+            return inverted_index.to_names(run_query(query, backend, cache))
 
-        docs = set()
-        for term in matched_terms:
-            docs |= set(inverted_index.get(term, []))
-
-        if not result:
-            result = docs
-        else:
-            if operator == "and":
-                result &= docs
-            elif operator == "or":
-                result |= docs
-            elif operator == "not":
-                result -= docs
-
-    return list(result)
+    all_docs = lambda: set().union(*inverted_index.values())
+    positions = inverted_index if hasattr(inverted_index, "phrase") else None
+    backend = SetBackend(lambda t: set(expander.expand(t)), all_docs, positions)
+    with span("boolean.query"):
+        return list(run_query(query, backend, cache))
 
 
 # === 3. VECTOR SPACE MODEL ===
 def vsm_search(query, docs, k=3):
+    results, vectorizer = vsm_search_batch([query], docs, k)
+    return (results[0] if results else []), vectorizer
+
+
+def vsm_search_batch(queries, docs, k=3):
+    """Banyak query sekaligus: satu matriks query Q, skor = cosine(Q, D) sekali hitung."""
     if len(docs) == 0:
         print("⚠️ Tidak ada dokumen untuk diproses.")
         return [], None
@@ -67,57 +62,213 @@ def vsm_search(query, docs, k=3):
     doc_texts = {name: " ".join(tokens) for name, tokens in docs.items()}
 
     vectorizer = TfidfVectorizer()
-    tfidf_matrix = vectorizer.fit_transform(doc_texts.values())
-    query_vec = vectorizer.transform([query])
+    with span("vsm.fit_transform"):
+        tfidf_matrix = vectorizer.fit_transform(doc_texts.values())
+    with span("vsm.transform"):
+        query_matrix = vectorizer.transform(queries)
 
-    cosine_sim = cosine_similarity(query_vec, tfidf_matrix).flatten()
-    ranked_indices = cosine_sim.argsort()[::-1]
+    # Baris TF-IDF (dokumen & query) sudah l2-normalized: cosine = dot product, tanpa normalisasi ulang
+    with span("vsm.dot"):
+        cosine_sim = (query_matrix @ tfidf_matrix.T).toarray()
     doc_names = list(doc_texts.keys())
-    results = [(doc_names[i], cosine_sim[i]) for i in ranked_indices[:k]]
-    return results, vectorizer
+    return ranked_results(cosine_sim, doc_names, k), vectorizer
+
+
+def vsm_search_wand(query, docs, k=3):
+    """Seperti vsm_search, tetapi top-k dengan WAND (dokumen yang tidak mungkin masuk top-k dilewati)."""
+    doc_texts = {name: " ".join(tokens) for name, tokens in docs.items()}
+    vectorizer = TfidfVectorizer()
+    with span("vsm.fit_transform"):
+        tfidf_matrix = vectorizer.fit_transform(doc_texts.values())
+        wand = WandIndex.from_matrix(tfidf_matrix, list(doc_texts.keys()))
+    with span("wand.search"):
+        results, scored = wand.search(vectorizer.transform([query]), k)
+    return results, vectorizer, scored
+
+
+def lsa_index(index, docs, n_components=100):
+    """LSAIndex dari index di disk (tersimpan atau fit di memori), atau fit dari dokumen."""
+    if index:
+        return LSAIndex.open(index, n_components)
+    doc_texts = {name: " ".join(tokens) for name, tokens in docs.items()}
+    vectorizer = TfidfVectorizer()
+    with span("vsm.fit_transform"):
+        tfidf_matrix = vectorizer.fit_transform(doc_texts.values())
+    return LSAIndex.fit(tfidf_matrix, list(doc_texts.keys()), vectorizer.transform, n_components)
 
 
-# === 4. MAIN ===
+# === 4. SNIPPET LANGSUNG DARI FILE (tanpa load seluruh korpus) ===
+def snippet_function(index, folder):
+    """
+    Fungsi (doc, query) -> snippet. Jika index punya snippet store, passage di
+    sekitar term query dibaca langsung dari file sumber; jika tidak, kepala dokumen.
+    """
+    store = SnippetStore.open(index) if index else None
+    if store is None:
+        return lambda doc, query: read_snippet(folder, doc)
+    return store.snippet
+
+
+# === 5. MAIN ===
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Mini Search Engine CLI")
-    parser.add_argument("--model", choices=["boolean", "vsm"], required=True, help="Pilih model pencarian")
-    parser.add_argument("--k", type=int, default=3, help="Jumlah dokumen hasil (untuk VSM)")
-    parser.add_argument("--query", type=str, required=True, help="Masukkan query pencarian")
+    parser.add_argument("--model", choices=["boolean", "vsm", "bm25", "lsa"], required=True, help="Pilih model pencarian")
+    parser.add_argument("--k", type=int, default=3, help="Jumlah dokumen hasil (untuk VSM/BM25)")
+    query_group = parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument("--query", type=str, help="Masukkan query pencarian")
+    query_group.add_argument("--queries-file", type=str,
+                             help="File berisi satu query per baris (mode batch, output TSV)")
+    parser.add_argument("--k1", type=float, default=1.5, help="Parameter k1 BM25")
+    parser.add_argument("--b", type=float, default=0.75, help="Parameter b BM25")
+    parser.add_argument("--topk", choices=["exhaustive", "wand"], default="exhaustive",
+                        help="Strategi top-k VSM/BM25: hitung semua dokumen atau WAND (dynamic pruning)")
+    parser.add_argument("--nprobe", type=int, default=8,
+                        help="Jumlah cluster IVF yang diperiksa model LSA (lebih besar = recall lebih tinggi, lebih lambat)")
+    parser.add_argument("--lsa-components", type=int, default=100,
+                        help="Dimensi LSA jika harus di-fit saat query (tanpa lsa.py build)")
+    parser.add_argument("--index", type=str, default="data/index", help="Folder index hasil index_store.py")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="Jumlah entri cache hasil query di mode batch (0 = tanpa cache)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Tampilkan breakdown waktu per tahap (load, fit/transform, skor, top-k, snippet)")
+    parser.add_argument("--profile-out", type=str, default=None, help="Simpan hasil cProfile (.pstats) ke file ini")
     args = parser.parse_args()
 
-    data_folder = "data/processed"
-    docs = load_documents(data_folder)
+    with profile_session(args.profile, args.profile_out):
+        data_folder = "data/processed"
 
-    if len(docs) == 0:
-        print("⚠️ Folder data/processed kosong atau belum ada hasil preprocessing.")
-        exit()
-
-    # === BOOLEAN ===
-    if args.model == "boolean":
-        inverted_index = build_inverted_index(docs)
-        hasil = boolean_search(args.query, inverted_index)
-
-        print(f"\nModel: BOOLEAN RETRIEVAL")
-        print(f"Query: {args.query}")
-        print("=" * 60)
-        if len(hasil) == 0:
-            print("Tidak ada dokumen ditemukan.")
-        else:
-            for i, doc in enumerate(hasil, 1):
-                snippet = " ".join(docs[doc])[:120]
-                print(f"{i}. {doc:<25} | {snippet}")
-        print(f"\nTotal hasil: {len(hasil)} dokumen.")
-
-    # === VSM ===
-    elif args.model == "vsm":
-        results, vectorizer = vsm_search(args.query, docs, args.k)
-        print(f"\nModel: VECTOR SPACE MODEL")
-        print(f"Query: {args.query}")
-        print("=" * 60)
-        for rank, (doc, score) in enumerate(results, 1):
-            snippet = " ".join(docs[doc])[:120]
-            feature_array = np.array(vectorizer.get_feature_names_out())
+        # Pakai index di disk jika ada; jika tidak, bangun ulang dari dokumen
+        try:
+            with span("load.index"):
+                index = load_index(args.index)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"ℹ️ {e} Membangun ulang dari {data_folder} ...")
+            index = None
+
+        show_snippet = snippet_function(index, data_folder)
+        docs = None
+        if index is None:
+            with span("load.documents"):
+                docs = load_documents(data_folder)
+            count("load.documents", len(docs))
+            if len(docs) == 0:
+                print("⚠️ Folder data/processed kosong atau belum ada hasil preprocessing.")
+                exit()
+
+        # === MODE BATCH: seluruh query log dalam satu perkalian matriks ===
+        if args.queries_file:
+            with open(args.queries_file, "r", encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip()]
+            # Query yang berulang (dan subekspresi Boolean yang sama) dijawab dari cache
+            cache = ResultCache(args.cache_size)
+            version = index.version if index else None
+            if args.model == "boolean":
+                cache.check_version(version)
+                inverted_index = index.postings if index else build_inverted_index(docs, positional=True)
+                expander = getattr(inverted_index, "expander", None) or TermExpander(inverted_index)
+                batch = []
+                for query in queries:
+                    try:
+                        batch.append([(doc, 1.0) for doc in boolean_search(query, inverted_index, expander, cache)])
+                    except QuerySyntaxError as e:
+                        print(f"⚠️ Query tidak valid '{query}': {e}", file=sys.stderr)
+                        batch.append([])
+            elif args.model == "vsm":
+                search_batch = index.vsm_search_batch if index else (lambda qs, k: vsm_search_batch(qs, docs, k)[0])
+                batch = cached_search_batch(cache, search_batch, queries, "vsm", args.k, version=version)
+            elif args.model == "lsa":
+                lsa = lsa_index(index, docs, args.lsa_components)
+                batch = cached_search_batch(cache, lambda qs, k: lsa.search_batch(qs, k, args.nprobe), queries,
+                                            "lsa", args.k, params=(args.nprobe,), version=version)
+            else:
+                bm25 = index.bm25(args.k1, args.b) if index else BM25Index.from_documents(docs, args.k1, args.b)
+                batch = cached_search_batch(cache, bm25.search_batch, queries, "bm25", args.k,
+                                            params=(args.k1, args.b), version=version)
+            print("qid\tquery\trank\tdoc\tscore")
+            for qid, (query, results) in enumerate(zip(queries, batch), 1):
+                for rank, (doc, score) in enumerate(results, 1):
+                    print(f"{qid}\t{query}\t{rank}\t{doc}\t{score:.6f}")
+            print(f"ℹ️ {cache.summary()}", file=sys.stderr)
+            exit()
+
+        # === BOOLEAN ===
+        if args.model == "boolean":
+            with span("boolean.build_inverted_index"):
+                inverted_index = index.postings if index else build_inverted_index(docs, positional=True)
+            try:
+                hasil = boolean_search(args.query, inverted_index)
+            except QuerySyntaxError as e:
+                print(f"⚠️ Query tidak valid: {e}")
+                exit()
+
+            print(f"\nModel: BOOLEAN RETRIEVAL")
+            print(f"Query: {args.query}")
+            print("=" * 60)
+            if len(hasil) == 0:
+                print("Tidak ada dokumen ditemukan.")
+            else:
+                for i, doc in enumerate(hasil, 1):
+                    snippet = show_snippet(doc, args.query)
+                    print(f"{i}. {doc:<25} | {snippet}")
+            print(f"\nTotal hasil: {len(hasil)} dokumen.")
+
+        # === VSM ===
+        elif args.model == "vsm":
+            scored = None
+            if index:
+                if args.topk == "wand":
+                    with span("wand.search"):
+                        results, scored = index.wand().search(index.transform(args.query), args.k)
+                else:
+                    results = index.vsm_search(args.query, args.k)
+                feature_names = index.vocabulary
+            else:
+                if args.topk == "wand":
+                    results, vectorizer, scored = vsm_search_wand(args.query, docs, args.k)
+                else:
+                    results, vectorizer = vsm_search(args.query, docs, args.k)
+                feature_names = set(vectorizer.get_feature_names_out())
+            print(f"\nModel: VECTOR SPACE MODEL")
+            print(f"Query: {args.query}")
+            print("=" * 60)
             query_terms = args.query.lower().split()
-            top_terms = [term for term in query_terms if term in feature_array]
-            print(f"{rank}. {doc:<25} | cosine={score:.4f} | {snippet}")
-            print(f"   → Top terms match: {', '.join(top_terms) if top_terms else '-'}")
+            top_terms = [term for term in query_terms if term in feature_names]
+            for rank, (doc, score) in enumerate(results, 1):
+                snippet = show_snippet(doc, args.query)
+                print(f"{rank}. {doc:<25} | cosine={score:.4f} | {snippet}")
+                print(f"   → Top terms match: {', '.join(top_terms) if top_terms else '-'}")
+            if scored is not None:
+                count("wand.scored_docs", scored)
+                print(f"\nℹ️ WAND: {scored} dokumen dihitung penuh.")
+
+        # === LSA (semantik, top-k dari index ANN IVF) ===
+        elif args.model == "lsa":
+            with span("lsa.build"):
+                lsa = lsa_index(index, docs, args.lsa_components)
+            results = lsa.search(args.query, args.k, args.nprobe)
+            print(f"\nModel: LSA ({lsa.model.n_components} dimensi, IVF n_probe={args.nprobe}/{lsa.ivf.n_lists})")
+            print(f"Query: {args.query}")
+            print("=" * 60)
+            for rank, (doc, score) in enumerate(results, 1):
+                snippet = show_snippet(doc, args.query)
+                print(f"{rank}. {doc:<25} | cosine={score:.4f} | {snippet}")
+
+        # === BM25 ===
+        elif args.model == "bm25":
+            with span("bm25.build"):
+                bm25 = index.bm25(args.k1, args.b) if index else BM25Index.from_documents(docs, args.k1, args.b)
+            scored = None
+            if args.topk == "wand":
+                with span("wand.search"):
+                    results, scored = bm25.search_wand(args.query, args.k)
+            else:
+                results = bm25.search(args.query, args.k)
+            print(f"\nModel: BM25 (k1={args.k1}, b={args.b})")
+            print(f"Query: {args.query}")
+            print("=" * 60)
+            for rank, (doc, score) in enumerate(results, 1):
+                snippet = show_snippet(doc, args.query)
+                print(f"{rank}. {doc:<25} | bm25={score:.4f} | {snippet}")
+            if scored is not None:
+                count("wand.scored_docs", scored)
+                print(f"\nℹ️ WAND: {scored} dokumen dihitung penuh.")
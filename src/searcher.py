@@ -0,0 +1,151 @@
+# src/searcher.py
+
+import os
+import sys
+import threading
+from sklearn.feature_extraction.text import TfidfVectorizer
+from index_store import load_index
+from corpus import load_documents
+from ranking import ranked_results
+from result_cache import ResultCache, cached_search_batch
+from snippets import SnippetStore, read_snippet
+from profiling import span
+
+
+# === 1. SIDIK JARI FOLDER (untuk deteksi perubahan file) ===
+def folder_signature(folder):
+    if not os.path.exists(folder):
+        return ()
+    sig = []
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith(".txt"):
+            st = os.stat(os.path.join(folder, filename))
+            sig.append((filename, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+# === 2. STATE HASIL FIT (tidak pernah diubah setelah dibuat) ===
+class _FittedState:
+    def __init__(self, doc_names, transform, score, feature_names, signature, snippets=None):
+        self.doc_names = doc_names
+        self.transform = transform  # list query -> matriks TF-IDF (baris = query)
+        self.score = score  # matriks query -> skor padat (query x dokumen)
+        self.feature_names = feature_names
+        self.signature = signature
+        self.version = hash(signature)  # kunci cache: berubah jika isi folder berubah
+        self.snippets = snippets  # SnippetStore (hanya untuk index dari disk)
+
+
+# === 3. VSM SEARCHER YANG HIDUP LAMA ===
+class VSMSearcher:
+    """
+    Fit TF-IDF sekali (atau load dari index di disk), lalu setiap query
+    hanya transform + sparse dot product. Jika watch=True, thread latar
+    belakang memantau folder dan melakukan refit saat ada file berubah.
+    Hasil query disimpan di cache LRU yang otomatis kosong setelah refit.
+    """
+
+    def __init__(self, folder="data/processed", index_dir=None, loader=load_documents,
+                 watch=True, poll_interval=2.0, cache_size=1024):
+        self.folder = folder
+        self.index_dir = index_dir
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self.cache = ResultCache(cache_size)
+        self._stop = threading.Event()
+        self._state = self._load_saved_index() or self._fit()
+        self._thread = None
+        if watch:
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+
+    # --- load index dari disk jika masih sesuai dengan isi folder ---
+    def _load_saved_index(self):
+        if not self.index_dir:
+            return None
+        try:
+            index = load_index(self.index_dir)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        signature = folder_signature(self.folder)
+        index_mtime = os.stat(os.path.join(self.index_dir, "meta.json")).st_mtime_ns
+        names = [name for name, _, _ in signature]
+        if sorted(index.doc_names) != names or any(mtime > index_mtime for _, mtime, _ in signature):
+            print("ℹ️ Index di disk sudah usang, melakukan fit ulang ...")
+            return None
+        return _FittedState(index.doc_names, index.transform_batch, index.vsm_scores,
+                            index.vocabulary, signature, SnippetStore.open(index))
+
+    # --- fit TF-IDF dari dokumen di folder ---
+    def _fit(self):
+        signature = folder_signature(self.folder)
+        docs = self.loader(self.folder)
+        doc_names = list(docs.keys())
+        texts = [" ".join(v) if isinstance(v, list) else str(v) for v in docs.values()]
+        if not texts:
+            return _FittedState([], None, None, set(), signature)
+
+        vectorizer = TfidfVectorizer()
+        tfidf_matrix = vectorizer.fit_transform(texts).tocsr()
+        # Baris matriks sudah l2-normalized, jadi cosine = dot product: skor = Q · Dᵀ
+        return _FittedState(doc_names, vectorizer.transform, lambda q: (q @ tfidf_matrix.T).toarray(),
+                            vectorizer.vocabulary_, signature)
+
+    # --- thread pemantau perubahan folder ---
+    def _watch(self):
+        failed = None  # sidik jari folder yang terakhir gagal di-fit (peringatan cukup sekali)
+        while not self._stop.wait(self.poll_interval):
+            signature = folder_signature(self.folder)
+            if signature == self._state.signature:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                # State lama tetap dipakai; fit dicoba lagi pada polling berikutnya
+                if signature != failed:
+                    print(f"⚠️ Refit gagal, tetap memakai index lama: {e!r}", file=sys.stderr)
+                failed = signature
+
+    def reload(self):
+        with self._lock:
+            new_state = self._fit()
+            self._state = new_state  # swap atomik, query yang sedang jalan tetap pakai state lama
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def doc_names(self):
+        return self._state.doc_names
+
+    @property
+    def feature_names(self):
+        return self._state.feature_names
+
+    def search(self, query, k=3):
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries, k=3):
+        state = self._state
+        if not state.doc_names:
+            return [[] for _ in queries]
+        return cached_search_batch(self.cache, lambda qs, k: self._score_batch(state, qs, k),
+                                   queries, "vsm", k, version=state.version)
+
+    def _score_batch(self, state, queries, k):
+        with span("vsm.transform"):
+            query_matrix = state.transform(queries)
+        with span("vsm.dot"):
+            scores = state.score(query_matrix)
+        return ranked_results(scores, state.doc_names, k)
+
+    def snippet(self, doc, query="", n=120):
+        """Passage di sekitar term query jika index di disk punya snippet store, jika tidak kepala dokumen."""
+        store = self._state.snippets
+        if store is None:
+            return read_snippet(self.folder, doc, n)
+        return store.snippet(doc, query, n=n)
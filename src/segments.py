@@ -0,0 +1,607 @@
+# src/segments.py
+
+import os
+import sys
+import shutil
+import argparse
+import threading
+import numpy as np
+import scipy.sparse as sp
+from index_store import (SavedIndex, PostingsView, FORMAT_VERSION, _doc_features, _stream_to_csr,
+                         _write_index, _extend_columns)
+from postings import CompactIndex
+from term_dict import TermDictionary
+from positional import PositionLists, PositionalPostings, _ranges
+from ranking import ranked_results
+from manifest import load_manifest, save_manifest, diff_folder
+from corpus import to_tokens
+from profiling import span
+
+SEGMENTS_FILE = "segments.json"
+
+
+# === 1. SEGMENT (immutable) ===
+class Segment:
+    """
+    Satu segment index: hitungan term mentah (dokumen x fitur), postings
+    Boolean + posisi. Isi segment tidak pernah diubah; dokumen yang dihapus
+    hanya ditandai di tombstone (mask live milik SegmentIndex).
+    - Segment di disk : index biasa (index_store._write_index) di folder seg_XXXXXX
+    - Write buffer    : segment di memori, dibangun ulang setiap buffer berubah
+    """
+
+    def __init__(self, name, doc_names, features, tf, compact, positional=None, saved=None):
+        self.name = name
+        self.doc_names = list(doc_names)
+        self.features = features
+        self.tf = sp.csr_matrix(tf)
+        self.compact = compact
+        self.positional = positional
+        self.saved = saved
+        self.rows = {doc: i for i, doc in enumerate(self.doc_names)}
+        self.doc_len = np.asarray(self.tf.sum(axis=1)).ravel().astype(np.float64)
+        self.global_ids = None  # kolom fitur -> term ID global (diisi CorpusStats.register)
+        self._by_term = None
+        self._postings = None
+
+    @classmethod
+    def load(cls, path):
+        saved = SavedIndex(path)
+        return cls(os.path.basename(path), saved.doc_names, saved.vocabulary, saved.tf_matrix, saved.compact,
+                   saved.positional, saved)
+
+    @classmethod
+    def from_docs(cls, name, docs):
+        """Segment di memori dari dict {nama dokumen: list token} (tanpa menulis ke disk)."""
+        doc_names, vocab, counts, terms, incidence, positions = _stream_to_csr(docs.items())
+        by_term = incidence.tocsc()
+        by_term.sort_indices()
+        compact = CompactIndex(terms, by_term.indptr.astype(np.int64), by_term.indices.astype(np.int32), doc_names)
+        offsets, data = positions.take(by_term.data.astype(np.int64) - 1).encode()
+        return cls(name, doc_names, TermDictionary.build(vocab), counts, compact,
+                   PositionalPostings(compact, offsets, data))
+
+    def __len__(self):
+        return len(self.doc_names)
+
+    @property
+    def by_term(self):
+        """Hitungan term per kolom (CSC): postings TF untuk skor term-at-a-time."""
+        if self._by_term is None:
+            self._by_term = self.tf.tocsc()
+            self._by_term.sort_indices()
+        return self._by_term
+
+    def boolean(self, query):
+        """Nama dokumen segment yang cocok dengan query Boolean (termasuk yang sudah dihapus)."""
+        from search_engine import boolean_search
+        if self._postings is None:
+            # Segment di disk memakai index trigram tersimpan; segment di memori membangunnya sekali
+            self._postings = self.saved.postings if self.saved is not None else PostingsView(self.compact, self.positional)
+        return boolean_search(query, self._postings, self._postings.expander)
+
+
+# === 2. STATISTIK KORPUS INKREMENTAL ===
+class CorpusStats:
+    """
+    df per term, jumlah dokumen hidup, dan total panjang dokumen untuk seluruh
+    segment + write buffer. Diperbarui per dokumen saat add/delete (O(panjang
+    dokumen)), bukan dihitung ulang dari semua segment. Term ID global hanya
+    bertambah (term yang df-nya jatuh ke 0 tetap terdaftar, tetapi diabaikan
+    saat skor), sehingga ID yang sudah dipetakan ke segment tidak pernah bergeser.
+    """
+
+    def __init__(self):
+        self.term_ids = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        self.total_len = 0
+        self.version = 0
+
+    def ids(self, terms):
+        """Term -> term ID global (term baru didaftarkan)."""
+        ids = np.fromiter((self.term_ids.setdefault(t, len(self.term_ids)) for t in terms), dtype=np.int64)
+        if len(self.term_ids) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(len(self.term_ids) - len(self.df), dtype=np.int64)])
+        return ids
+
+    def register(self, segment):
+        segment.global_ids = self.ids(segment.features)
+
+    def add_doc(self, features):
+        """features: Counter fitur satu dokumen (index_store._doc_features)."""
+        self._update(self.ids(features.keys()), sum(features.values()), 1)
+
+    def remove_doc(self, features):
+        self._update(self.ids(features.keys()), sum(features.values()), -1)
+
+    def remove_row(self, segment, row):
+        cols = segment.tf.indices[segment.tf.indptr[row]:segment.tf.indptr[row + 1]]
+        self._update(segment.global_ids[cols], int(segment.doc_len[row]), -1)
+
+    def _update(self, ids, length, sign):
+        self.df[ids] += sign
+        self.n_docs += sign
+        self.total_len += sign * length
+        self.version += 1
+
+    def add_segment(self, segment, live):
+        """Tambahkan seluruh dokumen hidup segment (saat index dibuka)."""
+        tf = segment.tf[live]
+        self.df[segment.global_ids] += np.bincount(tf.indices, minlength=tf.shape[1])
+        self.n_docs += int(live.sum())
+        self.total_len += int(segment.doc_len[live].sum())
+        self.version += 1
+
+    def snapshot(self):
+        return {"df": self.df.copy(), "n_docs": self.n_docs,
+                "avgdl": self.total_len / self.n_docs if self.n_docs else 0.0, "version": self.version}
+
+
+def tfidf_idf(df, n_docs):
+    """smooth_idf TfidfVectorizer."""
+    return np.log((1 + n_docs) / (1 + df)) + 1
+
+
+def bm25_idf(df, n_docs, epsilon=0.25):
+    """IDF BM25Index: IDF negatif diganti epsilon * rata-rata IDF term yang ada di korpus."""
+    idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+    present = df > 0
+    eps = epsilon * idf[present].mean() if present.any() else 0.0
+    idf[idf < 0] = eps
+    return idf
+
+
+# === 3. INDEX LSM: SEGMENT + WRITE BUFFER + TOMBSTONE + MERGE ===
+class SegmentIndex:
+    """
+    Index yang bisa ditambah/dihapus dokumen tanpa refit penuh:
+    - add()    : dokumen masuk write buffer di memori (langsung bisa dicari);
+                 buffer penuh -> ditulis sebagai segment baru (flush)
+    - delete() : dokumen di segment hanya ditandai tombstone; di buffer langsung dibuang
+    - merge    : segment kecil digabung (tiered, merge_factor segment per tier)
+                 di thread latar, dokumen ber-tombstone dibuang secara fisik
+    df/IDF dan avgdl global dijaga CorpusStats, jadi skor VSM/BM25 sama dengan
+    index yang dibangun ulang penuh dari dokumen yang masih hidup.
+    segments.json (daftar segment + tombstone) adalah commit point: ditulis
+    atomik setelah segment baru selesai ditulis. Isi buffer yang belum di-flush
+    hilang jika proses mati, jadi panggil close() (atau flush()) sebelum keluar.
+    """
+
+    def __init__(self, index_dir, buffer_size=1000, merge_factor=4, background=True):
+        self.index_dir = index_dir
+        self.buffer_size = buffer_size
+        self.merge_factor = merge_factor
+        self.background = background
+        self.stats = CorpusStats()
+        self.segments = []
+        self.live = {}        # nama segment -> mask dokumen hidup (diganti, tidak diubah di tempat)
+        self.locations = {}   # nama dokumen -> nama segment (None = write buffer)
+        self.buffer = {}
+        self._buffer_segment = None
+        self._norms = {}
+        self._merging = set()
+        self._merge_thread = None
+        self.merge_error = None  # error terakhir dari merge latar (None = tidak ada)
+        self._dirty = False   # tombstone baru yang belum masuk segments.json
+        self._lock = threading.RLock()
+
+        os.makedirs(index_dir, exist_ok=True)
+        layout = load_manifest(os.path.join(index_dir, SEGMENTS_FILE))
+        if layout and layout.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Versi index {layout.get('format_version')} tidak cocok "
+                             f"(dibutuhkan {FORMAT_VERSION}). Bangun ulang index.")
+        self.next_id = layout.get("next_id", 1)
+        for entry in layout.get("segments", []):
+            segment = Segment.load(os.path.join(index_dir, entry["name"]))
+            deleted = set(entry["deleted"])
+            live = np.array([doc not in deleted for doc in segment.doc_names], dtype=bool)
+            self._attach(segment, live)
+            self.stats.add_segment(segment, live)
+
+    def _attach(self, segment, live):
+        self.stats.register(segment)
+        self.segments.append(segment)
+        self.live[segment.name] = live
+        for doc in np.asarray(segment.doc_names, dtype=object)[live]:
+            self.locations[doc] = segment.name
+
+    def _segment(self, name):
+        return next(s for s in self.segments if s.name == name)
+
+    def _commit(self):
+        # Commit point: segment yang tidak tercantum (mis. merge yang terputus) diabaikan saat dibuka
+        layout = {
+            "format_version": FORMAT_VERSION,
+            "next_id": self.next_id,
+            "segments": [{"name": s.name, "n_docs": len(s),
+                          "deleted": [d for d, alive in zip(s.doc_names, self.live[s.name]) if not alive]}
+                         for s in self.segments],
+        }
+        save_manifest(os.path.join(self.index_dir, SEGMENTS_FILE), layout)
+        self._dirty = False
+
+    def __len__(self):
+        return self.stats.n_docs
+
+    def __contains__(self, doc):
+        return doc in self.locations
+
+    # --- tulis ---
+    def add(self, doc, tokens):
+        """Tambah dokumen (atau ganti jika nama sudah ada)."""
+        with self._lock:
+            self.delete(doc)
+            self.buffer[doc] = list(tokens)
+            self.locations[doc] = None
+            self.stats.add_doc(_doc_features(tokens))
+            self._buffer_segment = None
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+
+    def delete(self, doc):
+        """Hapus dokumen. False jika dokumen tidak ada di index."""
+        with self._lock:
+            if doc not in self.locations:
+                return False
+            where = self.locations.pop(doc)
+            if where is None:
+                self.stats.remove_doc(_doc_features(self.buffer.pop(doc)))
+                self._buffer_segment = None
+                return True
+            segment = self._segment(where)
+            row = segment.rows[doc]
+            live = self.live[where].copy()
+            live[row] = False
+            self.live[where] = live
+            self.stats.remove_row(segment, row)
+            self._dirty = True
+            return True
+
+    def flush(self):
+        """Tulis write buffer sebagai segment baru (dan tombstone tertunda), lalu jadwalkan merge."""
+        with self._lock:
+            if not self.buffer:
+                if self._dirty:
+                    self._commit()
+                return None
+            name = f"seg_{self.next_id:06d}"
+            self.next_id += 1
+            with span("segments.flush"):
+                _write_index(os.path.join(self.index_dir, name), *_stream_to_csr(self.buffer.items()))
+                segment = Segment.load(os.path.join(self.index_dir, name))
+            self._attach(segment, np.ones(len(segment), dtype=bool))
+            self.buffer = {}
+            self._buffer_segment = None
+            self._commit()
+        self.maybe_merge()
+        return name
+
+    # --- merge ---
+    def _merge_candidates(self):
+        """Segment untuk satu merge: segment tanpa dokumen hidup, atau merge_factor segment di tier yang sama."""
+        tiers = {}
+        for segment in self.segments:
+            if segment.name in self._merging:
+                continue
+            n_live = int(self.live[segment.name].sum())
+            if not n_live:
+                return [segment]
+            # Tier = orde ukuran (basis merge_factor) relatif terhadap ukuran buffer
+            tier = int(np.log(max(n_live / self.buffer_size, 1)) / np.log(self.merge_factor))
+            tiers.setdefault(tier, []).append(segment)
+            if len(tiers[tier]) >= self.merge_factor:
+                return tiers[tier]
+        return []
+
+    def maybe_merge(self):
+        """Jalankan merge yang dibutuhkan: di thread latar (background=True) atau langsung."""
+        if not self.background:
+            self._merge_loop()
+            return
+        with self._lock:
+            if self._merge_thread is None:
+                self._merge_thread = threading.Thread(target=self._merge_loop, daemon=True)
+                self._merge_thread.start()
+
+    def _merge_loop(self):
+        try:
+            while True:
+                with self._lock:
+                    group = self._merge_candidates()
+                    if not group:
+                        if self._merge_thread is threading.current_thread():
+                            self._merge_thread = None
+                        return
+                    self._merging.update(s.name for s in group)
+                try:
+                    self._merge(group)
+                finally:
+                    with self._lock:
+                        self._merging.difference_update(s.name for s in group)
+        except Exception as e:
+            if self._merge_thread is not threading.current_thread():
+                raise  # merge sinkron (background=False): error diteruskan ke pemanggil
+            # Thread latar berhenti; segment lama tetap utuh, merge dicoba lagi pada flush berikutnya
+            self.merge_error = e
+            print(f"⚠️ Merge segment gagal: {e!r}", file=sys.stderr)
+        finally:
+            with self._lock:
+                if self._merge_thread is threading.current_thread():
+                    self._merge_thread = None
+
+    def _merge(self, group):
+        """Gabungkan group jadi satu segment baru; dokumen ber-tombstone tidak ikut ditulis."""
+        with self._lock:
+            lives = [self.live[s.name] for s in group]
+            name = f"seg_{self.next_id:06d}"
+            self.next_id += 1
+
+        # Bagian berat (baca segment lama + tulis segment baru) di luar lock: add/delete/search tetap jalan
+        merged = None
+        parts = [(s, live) for s, live in zip(group, lives) if live.any()]
+        if parts:
+            with span("segments.merge"):
+                try:
+                    _write_index(os.path.join(self.index_dir, name), *_merge_arrays(parts))
+                    merged = Segment.load(os.path.join(self.index_dir, name))
+                except Exception:
+                    shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+                    raise
+
+        with self._lock:
+            position = self.segments.index(group[0])
+            segments = [s for s in self.segments if s not in group]
+            if merged is not None:
+                # Tombstone yang masuk selama merge dipindahkan ke segment baru
+                live = np.ones(len(merged), dtype=bool)
+                for segment, before in zip(group, lives):
+                    gone = before & ~self.live[segment.name]
+                    live[[merged.rows[d] for d in np.asarray(segment.doc_names, dtype=object)[gone]]] = False
+                self.stats.register(merged)
+                segments.insert(position, merged)
+                self.live[merged.name] = live
+                for doc in np.asarray(merged.doc_names, dtype=object)[live]:
+                    self.locations[doc] = merged.name
+            for segment in group:
+                del self.live[segment.name]
+                self._norms.pop(segment.name, None)
+            self.segments = segments
+            self._commit()
+        for segment in group:
+            # Pembaca yang masih memegang snapshot lama tetap aman: file mmap tetap terbaca sampai ditutup
+            shutil.rmtree(os.path.join(self.index_dir, segment.name), ignore_errors=True)
+
+    def merge(self):
+        """Force merge: semua segment jadi satu, seluruh tombstone dibuang."""
+        self.wait()
+        with self._lock:
+            group = [s for s in self.segments if s.name not in self._merging]
+            if len(group) < 2 and not any((~self.live[s.name]).any() for s in group):
+                return
+            self._merging.update(s.name for s in group)
+        try:
+            self._merge(group)
+        finally:
+            with self._lock:
+                self._merging.difference_update(s.name for s in group)
+
+    def wait(self):
+        """Tunggu merge latar selesai."""
+        while True:
+            with self._lock:
+                thread = self._merge_thread
+            if thread is None:
+                return
+            thread.join()
+
+    def close(self):
+        self.flush()
+        self.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- baca ---
+    def _snapshot(self):
+        """(segment, mask live) + statistik korpus pada satu titik waktu; dipakai tanpa lock selama query."""
+        with self._lock:
+            parts = [(s, self.live[s.name]) for s in self.segments]
+            if self.buffer:
+                if self._buffer_segment is None:
+                    self._buffer_segment = Segment.from_docs("buffer", self.buffer)
+                    self.stats.register(self._buffer_segment)
+                parts.append((self._buffer_segment, np.ones(len(self._buffer_segment), dtype=bool)))
+            return parts, self.stats.snapshot()
+
+    def _doc_norms(self, segment, idf, version):
+        """Norma l2 TF-IDF dokumen segment untuk IDF global saat ini (dihitung ulang sekali per versi statistik)."""
+        cached = self._norms.get(segment.name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        tf = segment.tf
+        rows = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+        weights = tf.data * idf[segment.global_ids[tf.indices]]
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=tf.shape[0]))
+        norms[norms == 0] = 1.0
+        self._norms[segment.name] = (version, norms)
+        return norms
+
+    def search_batch(self, queries, model="vsm", k=3, k1=1.5, b=0.75):
+        """Top-k VSM (cosine TF-IDF) atau BM25 untuk banyak query, skor dari statistik global semua segment."""
+        parts, stats = self._snapshot()
+        df, n_docs = stats["df"], stats["n_docs"]
+        if model == "vsm":
+            idf = tfidf_idf(df, n_docs)
+        elif model == "bm25":
+            idf = bm25_idf(df, n_docs)
+        else:
+            raise ValueError(f"Model '{model}' tidak didukung untuk index segment.")
+
+        # Term query yang ada di korpus (df > 0): (baris query, term, bobot query)
+        q_rows, q_terms, q_weights = [], [], []
+        for row, query in enumerate(queries):
+            for term, n in _doc_features([query]).items():
+                gid = self.stats.term_ids.get(term)
+                if gid is not None and gid < len(df) and df[gid] > 0:
+                    q_rows.append(row)
+                    q_terms.append(term)
+                    q_weights.append(n * idf[gid])
+        q_rows = np.asarray(q_rows, dtype=np.int64)
+        q_weights = np.asarray(q_weights, dtype=np.float64)
+        if model == "vsm":
+            # Vektor query l2-normalized, lalu dikali IDF term (bobot dokumen = tf * idf / norma dokumen)
+            norms = np.sqrt(np.bincount(q_rows, weights=q_weights ** 2, minlength=len(queries)))
+            norms[norms == 0] = 1.0
+            q_gids = np.asarray([self.stats.term_ids[t] for t in q_terms], dtype=np.int64)
+            q_weights = q_weights / norms[q_rows] * idf[q_gids]
+
+        blocks, names = [], []
+        with span(f"segments.{model}"):
+            for segment, live in parts:
+                scores = self._segment_scores(segment, q_rows, q_terms, q_weights, len(queries), model, idf,
+                                              stats, k1, b)
+                blocks.append(scores[:, live])
+                names.extend(np.asarray(segment.doc_names, dtype=object)[live])
+        scores = np.hstack(blocks) if blocks else np.zeros((len(queries), 0))
+        return ranked_results(scores, names, k)
+
+    def search(self, query, model="vsm", k=3, k1=1.5, b=0.75):
+        return self.search_batch([query], model, k, k1, b)[0]
+
+    def _segment_scores(self, segment, q_rows, q_terms, q_weights, n_queries, model, idf, stats, k1, b):
+        """Skor padat (jumlah query x dokumen segment), term-at-a-time dari postings TF segment."""
+        local = np.fromiter((segment.features.get(t, -1) for t in q_terms), dtype=np.int64, count=len(q_terms))
+        found = local >= 0
+        rows, local, weights = q_rows[found], local[found], q_weights[found]
+        by_term = segment.by_term
+        starts = by_term.indptr[local].astype(np.int64)
+        lengths = by_term.indptr[local + 1].astype(np.int64) - starts
+        postings = _ranges(starts, lengths)
+        docs = by_term.indices[postings].astype(np.int64)
+        tf = by_term.data[postings].astype(np.float64)
+        weights = np.repeat(weights, lengths)
+        if model == "vsm":
+            contrib = weights * tf / self._doc_norms(segment, idf, stats["version"])[docs]
+        else:
+            avgdl = stats["avgdl"]
+            norm = k1 * (1 - b + b * segment.doc_len[docs] / avgdl) if avgdl else k1
+            contrib = weights * tf * (k1 + 1) / (tf + norm)
+        keys = np.repeat(rows, lengths) * len(segment) + docs
+        return np.bincount(keys, weights=contrib, minlength=n_queries * len(segment)).reshape(n_queries, len(segment))
+
+    def boolean_search(self, query):
+        """Query Boolean (AND/OR/NOT, frasa, NEAR, wildcard) per segment, dokumen ber-tombstone dibuang."""
+        parts, _ = self._snapshot()
+        results = []
+        for segment, live in parts:
+            results.extend(doc for doc in segment.boolean(query) if live[segment.rows[doc]])
+        return results
+
+    def info(self):
+        with self._lock:
+            return {
+                "n_docs": self.stats.n_docs,
+                "buffer": len(self.buffer),
+                "segments": [(s.name, len(s), int(self.live[s.name].sum())) for s in self.segments],
+            }
+
+
+def _merge_arrays(parts):
+    """Hitungan, insiden Boolean, dan posisi dokumen hidup beberapa segment -> argumen _write_index."""
+    vocab = sorted(set().union(*(segment.features for segment, _ in parts)))
+    terms = sorted(set().union(*(segment.compact.terms for segment, _ in parts)))
+    counts = sp.vstack([_extend_columns(segment.tf[live], segment.features, vocab) for segment, live in parts]).tocsr()
+
+    # ID posting tiap segment digeser setelah position list segment sebelumnya
+    incidence, positions, offset = [], [], 0
+    for segment, live in parts:
+        block = segment.saved.incidence_matrix()[live]
+        block.data += offset
+        incidence.append(_extend_columns(block, segment.compact.terms, terms))
+        plists = segment.saved.position_lists()
+        positions.append(plists)
+        offset += len(plists)
+    doc_names = [doc for segment, live in parts for doc, alive in zip(segment.doc_names, live) if alive]
+    return doc_names, vocab, counts, terms, sp.vstack(incidence).tocsr(), PositionLists.concat(positions)
+
+
+# === 4. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index segment (LSM): tambah/hapus dokumen tanpa build ulang")
+    parser.add_argument("--index", default="data/segments", help="Folder index segment")
+    parser.add_argument("--buffer-size", type=int, default=1000, help="Jumlah dokumen di write buffer sebelum flush")
+    parser.add_argument("--merge-factor", type=int, default=4, help="Jumlah segment se-tier yang digabung")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sync = sub.add_parser("sync", help="Samakan index dengan folder dokumen (hanya file baru/berubah/terhapus)")
+    sync.add_argument("--docs", default="data/processed", help="Folder dokumen hasil preprocessing")
+    add = sub.add_parser("add", help="Tambah / ganti dokumen dari file")
+    add.add_argument("files", nargs="+")
+    delete = sub.add_parser("delete", help="Hapus dokumen berdasarkan nama")
+    delete.add_argument("names", nargs="+")
+    search = sub.add_parser("search", help="Cari di index segment")
+    search.add_argument("--model", choices=["vsm", "bm25", "boolean"], default="vsm")
+    search.add_argument("--query", required=True)
+    search.add_argument("--k", type=int, default=3)
+    search.add_argument("--k1", type=float, default=1.5)
+    search.add_argument("--b", type=float, default=0.75)
+    sub.add_parser("merge", help="Gabungkan semua segment jadi satu (buang tombstone)")
+    sub.add_parser("info", help="Tampilkan segment dan jumlah dokumen")
+    args = parser.parse_args()
+
+    try:
+        index = SegmentIndex(args.index, args.buffer_size, args.merge_factor)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ {e}")
+        exit()
+
+    with index:
+        if args.command == "sync":
+            if not os.path.isdir(args.docs):
+                print(f"⚠️ {args.docs} tidak ditemukan. Jalankan preprocess.py dulu.")
+                exit()
+            manifest_path = os.path.join(args.index, "manifest.json")
+            changed, deleted, manifest = diff_folder(args.docs, load_manifest(manifest_path))
+            for filename in deleted:
+                index.delete(filename)
+            for filename in changed:
+                with open(os.path.join(args.docs, filename), "r", encoding="utf-8") as f:
+                    index.add(filename, to_tokens(f.read()))
+            index.flush()
+            save_manifest(manifest_path, manifest)
+            print(f"✅ Sync: {len(changed)} berubah/baru, {len(deleted)} dihapus")
+        elif args.command == "add":
+            for path in args.files:
+                with open(path, "r", encoding="utf-8") as f:
+                    index.add(os.path.basename(path), to_tokens(f.read()))
+            print(f"✅ {len(args.files)} dokumen ditambahkan")
+        elif args.command == "delete":
+            removed = sum(index.delete(name) for name in args.names)
+            print(f"✅ {removed} dokumen dihapus" + (f" ({len(args.names) - removed} tidak ditemukan)"
+                                                   if removed < len(args.names) else ""))
+        elif args.command == "merge":
+            index.wait()
+            index.flush()
+            index.merge()
+            print("✅ Semua segment digabung")
+        elif args.command == "search":
+            print(f"\nModel: {args.model.upper()} (segment)")
+            print(f"Query: {args.query}")
+            print("=" * 60)
+            if args.model == "boolean":
+                for rank, doc in enumerate(index.boolean_search(args.query), 1):
+                    print(f"{rank}. {doc}")
+            else:
+                for rank, (doc, score) in enumerate(index.search(args.query, args.model, args.k, args.k1, args.b), 1):
+                    print(f"{rank}. {doc:<25} | score={score:.4f}")
+
+        if args.command in ("info", "sync", "merge"):
+            index.wait()
+            info = index.info()
+            print(f"Dokumen hidup: {info['n_docs']} | buffer: {info['buffer']} | segment: {len(info['segments'])}")
+            for name, n_docs, n_live in info["segments"]:
+                print(f"  {name}: {n_live}/{n_docs} dokumen hidup")
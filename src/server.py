@@ -0,0 +1,276 @@
+# src/server.py
+
+import os
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from index_store import load_index
+from search_engine import boolean_search, snippet_function
+from query_parser import QuerySyntaxError, parse, simplify, canonical
+from ranking import ranked_results
+from result_cache import ResultCache, normalize_query
+
+MODELS = ("boolean", "vsm", "bm25")
+MAX_REQUEST_LINE = 8192
+
+
+# === 1. WORKER: INDEX TETAP "HANGAT" DI TIAP PROSES ===
+_worker = {}
+
+
+def _init_worker(index_dir):
+    # Index di-mmap sekali per proses; model BM25 dibuat saat pertama dipakai (expander Boolean ada di index.postings)
+    _worker["index_dir"] = index_dir
+    _worker["index"] = load_index(index_dir)
+    _worker["bm25"] = {}
+
+
+def _search(model, query, k, k1, b, version=None):
+    """
+    Jalankan satu query di proses worker: (total dokumen cocok, [(nama dokumen, skor)]).
+    total = jumlah dokumen yang cocok untuk semua model (Boolean: hasil query,
+    VSM/BM25: dokumen dengan skor != 0, yaitu memuat minimal satu term query).
+    version: versi index yang dilihat service; worker memuat ulang index jika berbeda.
+    """
+    if version is not None and _worker["index"].version != version:
+        _init_worker(_worker["index_dir"])
+    index = _worker["index"]
+    if model == "boolean":
+        docs = boolean_search(query, index.postings, index.postings.expander)
+        return len(docs), [(doc, 1.0) for doc in docs[:k]]
+    if model == "vsm":
+        scores = index.vsm_scores(index.transform_batch([query]))
+    else:
+        if (k1, b) not in _worker["bm25"]:
+            _worker["bm25"][(k1, b)] = index.bm25(k1, b)
+        scores = _worker["bm25"][(k1, b)].get_batch_scores([query])
+    results = ranked_results(scores, index.doc_names, k)[0]
+    return int((scores != 0).sum()), [(doc, float(score)) for doc, score in results]
+
+
+def cache_key(model, query, k, k1, b):
+    """
+    Kunci cache hasil. VSM/BM25 bag-of-words, jadi token cukup diurutkan;
+    Boolean memakai bentuk kanonik AST karena urutan operand NOT/NEAR penting
+    ("cinta AND NOT rumah" != "rumah AND NOT cinta"). QuerySyntaxError untuk query tidak valid.
+    """
+    if model == "boolean":
+        return model, canonical(simplify(parse(query))), k
+    return model, normalize_query(query), k, k1, b
+
+
+# === 2. SERVICE HTTP/JSON (asyncio, tanpa dependensi tambahan) ===
+class SearchService:
+    """
+    Server HTTP/1.1 kecil di atas asyncio: event loop hanya mengurus koneksi,
+    sedangkan skoring (CPU-bound) dikirim ke pool proses worker.
+    Endpoint:
+      GET /search?q=...&model=boolean|vsm|bm25&k=3[&k1=1.5&b=0.75]
+      GET /health
+      GET /stats
+    """
+
+    def __init__(self, index_dir="data/index", docs_folder="data/processed", workers=None, cache_size=1024):
+        self.index_dir = index_dir
+        self.index = load_index(index_dir)  # validasi index + versi untuk cache
+        self._meta_mtime = self._meta_stat()
+        self.docs_folder = docs_folder
+        self.snippet = snippet_function(self.index, docs_folder)
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(index_dir,))
+        self.cache = ResultCache(cache_size)
+        self.cache.check_version(self.index.version)
+        self._inflight = {}
+        self.requests = 0
+        self.errors = 0
+
+    def _meta_stat(self):
+        try:
+            return os.stat(os.path.join(self.index_dir, "meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def check_index(self):
+        """
+        Dipanggil setiap request (satu stat meta.json): jika index dibangun ulang /
+        di-patch, index dimuat ulang, cache dikosongkan, dan worker memuat ulang
+        index saat menerima versi baru.
+        """
+        mtime = self._meta_stat()
+        if mtime is None or mtime == self._meta_mtime:
+            return
+        try:
+            index = load_index(self.index_dir)
+        except (FileNotFoundError, ValueError):
+            return  # index sedang ditulis ulang: tetap pakai versi lama
+        self._meta_mtime = mtime
+        if index.version != self.index.version:
+            self.index = index
+            self.snippet = snippet_function(index, self.docs_folder)
+            self.cache.check_version(index.version)
+
+    async def search(self, model, query, k, k1, b):
+        self.check_index()
+        version = self.index.version
+        key = (version,) + cache_key(model, query, k, k1, b)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        # Query sama yang sedang dihitung: tunggu hasil yang sama, jangan kirim ulang ke worker
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key])
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, _search, model, query, k, k1, b, version)
+        self._inflight[key] = future
+        try:
+            result = await future
+        finally:
+            del self._inflight[key]
+        if version == self.index.version:  # hasil index lama tidak disimpan setelah index diganti
+            self.cache.put(key, result)
+        return result
+
+    async def handle_search(self, params):
+        query = params.get("q", "").strip()
+        model = params.get("model", "vsm")
+        if not query:
+            return 400, {"error": "Parameter 'q' wajib diisi."}
+        if model not in MODELS:
+            return 400, {"error": f"Model '{model}' tidak dikenal (pilih: {', '.join(MODELS)})."}
+        try:
+            k = int(params.get("k", 3))
+            k1 = float(params.get("k1", 1.5))
+            b = float(params.get("b", 0.75))
+        except ValueError:
+            return 400, {"error": "Parameter k, k1, dan b harus berupa angka."}
+        if k < 1:
+            return 400, {"error": "Parameter k minimal 1."}
+
+        start = time.perf_counter()
+        try:
+            total, results = await self.search(model, query, k, k1, b)
+        except QuerySyntaxError as e:
+            return 400, {"error": f"Query tidak valid: {e}"}
+        took_ms = (time.perf_counter() - start) * 1000
+
+        with_snippet = params.get("snippet", "1") != "0"
+        return 200, {
+            "query": query,
+            "model": model,
+            "k": k,
+            "total": total,
+            "took_ms": round(took_ms, 3),
+            "results": [
+                {"rank": rank, "doc": doc, "score": score,
+                 **({"snippet": self.snippet(doc, query)} if with_snippet else {})}
+                for rank, (doc, score) in enumerate(results, 1)
+            ],
+        }
+
+    async def route(self, method, target):
+        url = urlsplit(target)
+        if method != "GET":
+            return 405, {"error": "Hanya metode GET yang didukung."}
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/search":
+            return await self.handle_search(params)
+        if url.path == "/health":
+            return 200, {"status": "ok", "n_docs": len(self.index.doc_names)}
+        if url.path == "/stats":
+            return 200, {"requests": self.requests, "errors": self.errors, "cache": self.cache.stats()}
+        return 404, {"error": f"Path '{url.path}' tidak ditemukan."}
+
+    async def handle_connection(self, reader, writer):
+        # Koneksi keep-alive: banyak request berurutan di satu koneksi
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    await self._respond(writer, 414, {"error": "Request line terlalu panjang."}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0) or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                parts = request_line.decode("latin-1").split()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.requests += 1
+                if len(parts) != 3:
+                    status, body = 400, {"error": "Request line tidak valid."}
+                else:
+                    try:
+                        status, body = await self.route(parts[0], parts[1])
+                    except Exception as e:  # jangan biarkan satu query mematikan koneksi
+                        status, body = 500, {"error": str(e)}
+                if status >= 400:
+                    self.errors += 1
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, keep_alive):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  414: "URI Too Long", 500: "Internal Server Error"}.get(status, "")
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        # Pemanasan: paksa semua worker memuat index sebelum menerima request
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _search, "vsm", "warmup", 1, 1.5, 0.75)
+                               for _ in range(self.workers)))
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"✅ Search service berjalan di http://{host}:{port}  (worker: {self.workers})")
+        print(f"   Contoh: http://{host}:{port}/search?q=pedang+hutan&model=bm25&k=3")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown()
+
+
+# === 3. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON search service dengan index yang tetap dimuat")
+    parser.add_argument("--index", default="data/index", help="Folder index hasil index_store.py")
+    parser.add_argument("--docs", default="data/processed", help="Folder dokumen (untuk snippet)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses worker skoring (default: jumlah CPU)")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="Jumlah entri cache hasil query (0 = tanpa cache, untuk mengukur skoring murni)")
+    args = parser.parse_args()
+
+    try:
+        service = SearchService(args.index, args.docs, args.workers, args.cache_size)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ {e} Jalankan dulu: python src/index_store.py")
+        exit()
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Service dihentikan.")
+    finally:
+        service.close()
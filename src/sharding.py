@@ -0,0 +1,161 @@
+# src/sharding.py
+
+import os
+import json
+import heapq
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from index_store import load_index, global_stats, _stream_to_csr, _write_index, FORMAT_VERSION
+from corpus import iter_token_docs
+
+SHARDS_FILE = "shards.json"
+
+
+# === 1. BUILD INDEX TER-SHARD ===
+def build_sharded_index(docs, out_dir, n_shards, shared_stats=True):
+    """
+    docs: dict {nama file: list token} atau generator (nama, list token).
+    Bagi dokumen ke n_shards (round-robin, urutan relatif tetap) dan tulis
+    tiap shard sebagai index biasa di out_dir/shard_XX.
+    shared_stats=True : semua shard memakai vocabulary, IDF, dan statistik
+                        BM25 global -> ranking gabungan identik dengan index tunggal.
+    shared_stats=False: tiap shard punya statistik sendiri (lebih cepat dibangun
+                        ulang per shard, skor bisa sedikit berbeda).
+    """
+    doc_names, vocab, counts, terms, incidence, positions = _stream_to_csr(
+        docs.items() if isinstance(docs, dict) else docs)
+    n_shards = max(1, min(n_shards, len(doc_names)))
+    stats = global_stats(counts) if shared_stats else None
+
+    shard_dirs = []
+    for shard in range(n_shards):
+        rows = list(range(shard, len(doc_names), n_shards))
+        shard_dir = f"shard_{shard:02d}"
+        _write_index(
+            os.path.join(out_dir, shard_dir),
+            [doc_names[i] for i in rows],
+            vocab,
+            counts[rows],
+            terms,
+            incidence[rows],
+            positions,  # ID posting global: tiap shard mengambil position list miliknya
+            stats=stats,
+            # Posisi global dokumen, dipakai untuk urutan skor seri saat merge
+            extra_meta={"global_doc_ids": rows},
+        )
+        shard_dirs.append(shard_dir)
+
+    layout = {
+        "format_version": FORMAT_VERSION,
+        "n_docs": len(doc_names),
+        "shared_stats": shared_stats,
+        "shards": shard_dirs,
+    }
+    with open(os.path.join(out_dir, SHARDS_FILE), "w", encoding="utf-8") as f:
+        json.dump(layout, f, indent=2)
+    return layout
+
+
+# === 2. WORKER: CARI DI SATU SHARD ===
+_worker_indexes = {}
+_worker_bm25 = {}
+_worker_positions = {}
+
+
+def _get_shard(shard_dir):
+    # Tiap proses worker memuat (mmap) shard sekali, lalu dipakai ulang
+    if shard_dir not in _worker_indexes:
+        index = load_index(shard_dir)
+        # nama dokumen -> posisi lokal, untuk memetakan hasil ke doc ID global
+        _worker_positions[shard_dir] = {name: i for i, name in enumerate(index.doc_names)}
+        _worker_indexes[shard_dir] = index
+    return _worker_indexes[shard_dir]
+
+
+def _get_bm25(shard_dir, k1, b):
+    key = (shard_dir, k1, b)
+    if key not in _worker_bm25:
+        _worker_bm25[key] = _get_shard(shard_dir).bm25(k1, b)
+    return _worker_bm25[key]
+
+
+def search_shard(shard_dir, model, query, k, k1=1.5, b=0.75):
+    """Top-k satu shard: list (skor, doc ID global, nama dokumen)."""
+    index = _get_shard(shard_dir)
+    if model == "vsm":
+        results = index.vsm_search(query, k)
+    elif model == "bm25":
+        results = _get_bm25(shard_dir, k1, b).search(query, k)
+    else:
+        raise ValueError(f"Model '{model}' tidak didukung untuk pencarian shard.")
+    global_ids = index.meta["global_doc_ids"]
+    position = _worker_positions[shard_dir]
+    return [(float(score), global_ids[position[doc]], doc) for doc, score in results]
+
+
+def merge_topk(shard_results, k):
+    """Gabungkan top-k tiap shard dengan heap: skor menurun, seri -> doc ID global terbesar dulu."""
+    merged = heapq.nlargest(k, (hit for hits in shard_results for hit in hits), key=lambda h: (h[0], h[1]))
+    return [(doc, score) for score, _, doc in merged]
+
+
+# === 3. KOORDINATOR SCATTER-GATHER ===
+class ShardedSearcher:
+    def __init__(self, index_dir, workers=None):
+        with open(os.path.join(index_dir, SHARDS_FILE), "r", encoding="utf-8") as f:
+            self.layout = json.load(f)
+        self.shard_dirs = [os.path.join(index_dir, d) for d in self.layout["shards"]]
+        self.pool = ProcessPoolExecutor(max_workers=workers or len(self.shard_dirs))
+
+    def search(self, query, model="vsm", k=3, k1=1.5, b=0.75):
+        # Scatter: satu tugas per shard; gather: merge top-k per shard
+        futures = [self.pool.submit(search_shard, d, model, query, k, k1, b) for d in self.shard_dirs]
+        return merge_topk([f.result() for f in futures], k)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# === 4. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index ter-shard dengan pencarian scatter-gather")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Bangun index ter-shard")
+    build.add_argument("--docs", default="data/processed",
+                       help="Folder dokumen hasil preprocessing, file .jsonl, atau file multi-dokumen")
+    build.add_argument("--out", default="data/shards", help="Folder output shard")
+    build.add_argument("--shards", type=int, default=4, help="Jumlah shard")
+    build.add_argument("--local-stats", action="store_true", help="Statistik IDF/BM25 per shard (bukan global)")
+
+    search = sub.add_parser("search", help="Cari di index ter-shard")
+    search.add_argument("--index", default="data/shards", help="Folder index ter-shard")
+    search.add_argument("--model", choices=["vsm", "bm25"], default="vsm")
+    search.add_argument("--query", required=True)
+    search.add_argument("--k", type=int, default=3)
+    search.add_argument("--k1", type=float, default=1.5)
+    search.add_argument("--b", type=float, default=0.75)
+    search.add_argument("--workers", type=int, default=None, help="Jumlah proses worker (default: jumlah shard)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not os.path.exists(args.docs):
+            print(f"⚠️ {args.docs} tidak ditemukan. Jalankan preprocess.py dulu.")
+            exit()
+        layout = build_sharded_index(iter_token_docs(args.docs), args.out, args.shards,
+                                     shared_stats=not args.local_stats)
+        print(f"✅ {len(layout['shards'])} shard tersimpan di {args.out} ({layout['n_docs']} dokumen)")
+    else:
+        with ShardedSearcher(args.index, args.workers) as searcher:
+            results = searcher.search(args.query, args.model, args.k, args.k1, args.b)
+        print(f"\nModel: {args.model.upper()} (sharded)")
+        print(f"Query: {args.query}")
+        print("=" * 60)
+        for rank, (doc, score) in enumerate(results, 1):
+            print(f"{rank}. {doc:<25} | score={score:.4f}")
@@ -0,0 +1,235 @@
+# src/snippets.py
+
+import os
+import re
+import json
+import numpy as np
+from corpus import to_tokens
+from profiling import span
+
+# Token file hasil preprocessing (termasuk format list "['a', 'b']", sama dengan corpus.to_tokens)
+_PROCESSED_TOKEN_RE = re.compile(r"[^\s\[\]'\",]+")
+_RAW_WORD_RE = re.compile(r"\S+")
+_QUERY_TERM_RE = re.compile(r"\w+")
+_QUERY_OPERATORS = {"and", "or", "not", "near"}
+
+SOURCE_PROCESSED, SOURCE_RAW = 0, 1
+
+
+# === 1. SNIPPET SEDERHANA (kepala dokumen) ===
+def read_snippet(folder, doc, n=120):
+    with span("snippet"), open(os.path.join(folder, doc), "r", encoding="utf-8") as f:
+        return " ".join(f.read(n * 4).lower().split())[:n]
+
+
+# === 2. OFFSET TOKEN -> BYTE DI TEKS SUMBER (saat build index) ===
+def _byte_offsets(text, char_starts):
+    """Offset karakter (terurut) -> offset byte UTF-8."""
+    if text.isascii():
+        return char_starts
+    result, prev, nbytes = [], 0, 0
+    for start in char_starts:
+        nbytes += len(text[prev:start].encode("utf-8"))
+        result.append(nbytes)
+        prev = start
+    return result
+
+
+def _processed_offsets(text):
+    return [m.start() for m in _PROCESSED_TOKEN_RE.finditer(text)]
+
+
+def _raw_aligner():
+    """
+    Pemetaan token hasil preprocessing -> kata di teks asli. Pipeline
+    preprocess.py bekerja per kata (cleaning tidak menambah/menghapus spasi),
+    jadi setiap token berasal dari satu kata asli: token dicocokkan berurutan
+    dengan kata asli yang menghasilkan token yang sama setelah clean + stem
+    (kata yang dibuang sebagai stopword otomatis terlewati).
+    None jika preprocess.py tidak bisa diimpor.
+    """
+    try:
+        from preprocess import clean, stem_token
+    except ImportError:
+        return None
+
+    def align(text, tokens):
+        words = _RAW_WORD_RE.finditer(text)
+        starts = []
+        for token in tokens:
+            for m in words:
+                word = clean(m.group())
+                if word and (word == token or stem_token(word) == token):
+                    starts.append(m.start())
+                    break
+            else:
+                return None  # teks asli tidak cocok dengan hasil preprocessing
+        return starts
+    return align
+
+
+def build_snippet_store(docs_folder, out_dir, doc_names, raw_folder=None, previous_dir=None):
+    """
+    Simpan offset byte awal setiap token dokumen di file sumbernya:
+    teks asli di raw_folder jika token bisa dipetakan ke kata asli, jika tidak file
+    hasil preprocessing. Baris dokumen yang file-nya tidak berubah (mtime
+    & ukuran sama) dipakai ulang dari store sebelumnya.
+    - snippet_meta.json    : folder sumber + nama dokumen
+    - snippet_offsets.npy  : token dokumen i ada di starts[offsets[i]:offsets[i+1]]
+    - snippet_starts.npy   : offset byte token (uint32)
+    - snippet_docinfo.npy  : per dokumen (sumber, ukuran file sumber, mtime file hasil preprocessing)
+    previous_dir: folder store lama jika store baru ditulis ke folder lain (default out_dir).
+    """
+    previous = {}
+    try:
+        old = SnippetStore(previous_dir or out_dir)
+        if old.folders == [os.path.abspath(docs_folder), raw_folder and os.path.abspath(raw_folder)]:
+            previous = {name: (old.docinfo[row], old._starts(row)) for name, row in old.rows.items()}
+    except FileNotFoundError:
+        pass
+
+    align_raw = _raw_aligner() if raw_folder and os.path.isdir(raw_folder) else None
+    offsets = np.zeros(len(doc_names) + 1, dtype=np.int64)
+    docinfo = np.zeros((len(doc_names), 3), dtype=np.int64)
+    chunks = []
+    reused = 0
+    for i, name in enumerate(doc_names):
+        processed_path = os.path.join(docs_folder, name)
+        if not os.path.exists(processed_path):
+            chunks.append(np.empty(0, dtype=np.uint32))
+            offsets[i + 1] = offsets[i]
+            continue
+        mtime = os.stat(processed_path).st_mtime_ns
+        old_info, old_starts = previous.get(name, (None, None))
+        # Baris lama dari file hasil preprocessing tidak dipakai jika kini teks asli bisa dipetakan
+        if old_info is not None and old_info[2] == mtime and (old_info[0] == SOURCE_RAW or align_raw is None) and \
+                os.path.getsize(_source_path(docs_folder, raw_folder, name, old_info[0])) == old_info[1]:
+            info, starts = old_info, old_starts
+            reused += 1
+        else:
+            info, starts = _align_document(docs_folder, raw_folder, name, align_raw, mtime)
+        docinfo[i] = info
+        chunks.append(np.asarray(starts, dtype=np.uint32))
+        offsets[i + 1] = offsets[i] + len(starts)
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "snippet_offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "snippet_starts.npy"),
+            np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint32))
+    np.save(os.path.join(out_dir, "snippet_docinfo.npy"), docinfo)
+    with open(os.path.join(out_dir, "snippet_meta.json"), "w", encoding="utf-8") as f:
+        # Folder disimpan relatif terhadap out_dir: tetap valid dari direktori kerja mana pun
+        folders = [os.path.relpath(docs_folder, out_dir), raw_folder and os.path.relpath(raw_folder, out_dir)]
+        json.dump({"folders": folders, "doc_names": list(doc_names)}, f)
+    return {"n_docs": len(doc_names), "reused": reused,
+            "raw_docs": int((docinfo[:, 0] == SOURCE_RAW).sum()) if len(doc_names) else 0}
+
+
+def _source_path(docs_folder, raw_folder, name, source):
+    return os.path.join(raw_folder if source == SOURCE_RAW else docs_folder, name)
+
+
+def _align_document(docs_folder, raw_folder, name, align_raw, mtime):
+    with open(os.path.join(docs_folder, name), "r", encoding="utf-8") as f:
+        processed = f.read()
+    tokens = to_tokens(processed)
+
+    raw_path = os.path.join(raw_folder, name) if align_raw else None
+    if raw_path and os.path.exists(raw_path):
+        with open(raw_path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        starts = align_raw(raw, tokens)
+        if starts is not None:
+            return (SOURCE_RAW, os.path.getsize(raw_path), mtime), _byte_offsets(raw, starts)
+
+    starts = _processed_offsets(processed)
+    if len(starts) != len(tokens):
+        starts = []  # format tak dikenal: snippet jatuh ke kepala dokumen
+    path = os.path.join(docs_folder, name)
+    return (SOURCE_PROCESSED, os.path.getsize(path), mtime), _byte_offsets(processed, starts)
+
+
+# === 3. SNIPPET QUERY-BIASED ===
+def query_terms(query):
+    """Term query (huruf kecil, tanpa operator Boolean) untuk mencari passage yang cocok."""
+    return [t for t in _QUERY_TERM_RE.findall(query.lower()) if t not in _QUERY_OPERATORS]
+
+
+def best_window(term_hits, window):
+    """
+    Posisi awal jendela `window` token yang memuat term berbeda terbanyak
+    (seri: kemunculan terbanyak, lalu paling awal). term_hits: list array posisi terurut.
+    """
+    hits = np.unique(np.concatenate(term_hits))
+    ends = hits + window
+    distinct = sum((np.searchsorted(p, ends) > np.searchsorted(p, hits)).astype(np.int64) for p in term_hits)
+    total = np.searchsorted(hits, ends) - np.arange(len(hits))
+    best = np.lexsort((np.arange(len(hits)), -total, -distinct))[0]
+    return int(hits[best])
+
+
+class SnippetStore:
+    """
+    Snippet langsung dari file sumber: posisi term query diambil dari index
+    posisional, jendela token terbaik dipilih, lalu hanya byte jendela itu
+    yang dibaca (seek + read) -> O(window) per hasil, tanpa memuat dokumen.
+    Tanpa store / index posisional: jatuh ke kepala dokumen (read_snippet).
+    """
+
+    def __init__(self, index_dir, positional=None):
+        meta_path = os.path.join(index_dir, "snippet_meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Snippet store belum dibangun di '{index_dir}'.")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.folders = [folder and os.path.abspath(os.path.join(index_dir, folder)) for folder in meta["folders"]]
+        self.rows = {name: i for i, name in enumerate(meta["doc_names"])}
+        self.offsets = np.load(os.path.join(index_dir, "snippet_offsets.npy"), mmap_mode="r")
+        self.starts = np.load(os.path.join(index_dir, "snippet_starts.npy"), mmap_mode="r")
+        self.docinfo = np.load(os.path.join(index_dir, "snippet_docinfo.npy"), mmap_mode="r")
+        self.positional = positional
+
+    @classmethod
+    def open(cls, index):
+        """SnippetStore untuk SavedIndex, atau None jika index belum punya snippet store."""
+        try:
+            return cls(index.index_dir, index.positional)
+        except FileNotFoundError:
+            return None
+
+    def _starts(self, row):
+        return np.asarray(self.starts[self.offsets[row]:self.offsets[row + 1]], dtype=np.int64)
+
+    def _hits(self, doc, terms):
+        if self.positional is None:
+            return []
+        doc_id = self.positional.compact.doc_ids.get(doc)
+        hits = [self.positional.term_positions(t, doc_id) for t in set(terms)] if doc_id is not None else []
+        return [h for h in hits if len(h)]
+
+    def snippet(self, doc, query="", window=16, n=120):
+        docs_folder, raw_folder = self.folders
+        row = self.rows.get(doc)
+        if row is None:
+            return read_snippet(docs_folder, doc, n)
+        source, size, _ = self.docinfo[row]
+        path = _source_path(docs_folder, raw_folder, doc, source)
+        with span("snippet"):
+            starts = self._starts(row)
+            if not len(starts) or not os.path.exists(path) or os.path.getsize(path) != size:
+                # File berubah sejak index dibangun: offset tidak valid lagi
+                return read_snippet(docs_folder, doc, n)
+
+            term_hits = self._hits(doc, query_terms(query))
+            lo = max(0, best_window(term_hits, window) - window // 4) if term_hits else 0
+            hi = min(len(starts), lo + window)
+            lo = max(0, hi - window)
+            begin = int(starts[lo]) if lo > 0 else 0  # dari awal file: kata sebelum token pertama ikut tampil
+            end = int(starts[hi]) if hi < len(starts) else min(int(size), begin + n * 4)
+            with open(path, "rb") as f:
+                f.seek(begin)
+                chunk = f.read(end - begin).decode("utf-8", errors="replace")
+
+        words = chunk.split() if source == SOURCE_RAW else _PROCESSED_TOKEN_RE.findall(chunk)
+        text = " ".join(words)
+        return ("... " if lo > 0 else "") + text + (" ..." if hi < len(starts) else "")
@@ -0,0 +1,158 @@
+# src/synthetic_corpus.py
+
+import os
+import argparse
+import numpy as np
+
+# Suku kata & imbuhan bergaya Bahasa Indonesia untuk membentuk kata sintetis
+ONSETS = ["", "b", "c", "d", "g", "h", "j", "k", "l", "m", "n", "p", "r", "s", "t", "w", "y", "ng", "ny"]
+VOWELS = ["a", "i", "u", "e", "o"]
+CODAS = ["", "", "", "n", "ng", "r", "s", "t", "k", "h", "l", "m"]
+PREFIXES = ["", "", "", "me", "mem", "men", "ber", "di", "ter", "pe", "ke"]
+SUFFIXES = ["", "", "", "kan", "an", "nya", "i", "lah"]
+STOPWORDS = ["yang", "dan", "di", "ke", "dari", "ini", "itu", "dengan", "untuk", "pada", "adalah", "dalam"]
+
+
+# === 1. VOCABULARY SINTETIS + DISTRIBUSI ZIPF ===
+def heaps_vocab_size(total_tokens, k=30, beta=0.5):
+    """Hukum Heaps: ukuran vocabulary tumbuh sebanding total_tokens^beta."""
+    return max(100, int(k * total_tokens ** beta))
+
+
+def make_vocabulary(size, seed=0):
+    """`size` kata unik mirip Bahasa Indonesia (2-4 suku kata + imbuhan acak)."""
+    rng = np.random.default_rng(seed)
+    words, seen = [], set()
+    while len(words) < size:
+        # Indeks suku kata/imbuhan diambil per blok (vectorized), kata dirangkai di Python
+        m = 2 * (size - len(words)) + 16
+        n_syl = rng.integers(2, 5, m)
+        onsets = rng.integers(len(ONSETS), size=(m, 4))
+        vowels = rng.integers(len(VOWELS), size=(m, 4))
+        codas = rng.integers(len(CODAS), size=m)
+        prefixes = rng.integers(len(PREFIXES), size=m)
+        suffixes = rng.integers(len(SUFFIXES), size=m)
+        for j in range(m):
+            base = "".join(ONSETS[onsets[j, i]] + VOWELS[vowels[j, i]] for i in range(n_syl[j]))
+            word = PREFIXES[prefixes[j]] + base + CODAS[codas[j]] + SUFFIXES[suffixes[j]]
+            if word not in seen and len(word) >= 3:
+                seen.add(word)
+                words.append(word)
+                if len(words) == size:
+                    break
+    return words
+
+
+def zipf_probabilities(size, s=1.07, q=2.7):
+    """Distribusi Zipf-Mandelbrot: p(r) ∝ 1 / (r + q)^s untuk rank r = 1..size."""
+    weights = 1.0 / (np.arange(1, size + 1) + q) ** s
+    return weights / weights.sum()
+
+
+# === 2. GENERATOR KORPUS ===
+class SyntheticCorpus:
+    """
+    Korpus sintetis dengan vocabulary Zipfian: frekuensi kata mengikuti
+    Zipf, ukuran vocabulary mengikuti Heaps. Dokumen dihasilkan per chunk
+    (tidak perlu memuat seluruh korpus), deterministik untuk seed yang sama.
+    """
+
+    def __init__(self, n_docs, mean_len=60, vocab_size=None, seed=42):
+        self.n_docs = n_docs
+        self.mean_len = mean_len
+        self.seed = seed
+        if vocab_size is None:
+            vocab_size = heaps_vocab_size(n_docs * mean_len)
+        self.vocab = np.asarray(make_vocabulary(vocab_size, seed), dtype=object)
+        self.probs = zipf_probabilities(vocab_size)
+
+    def iter_token_docs(self, chunk_size=10_000):
+        """Generator (nama dokumen, list token) — sampling vectorized per chunk."""
+        rng = np.random.default_rng(self.seed + 1)
+        for start in range(0, self.n_docs, chunk_size):
+            n = min(chunk_size, self.n_docs - start)
+            lengths = np.maximum(rng.poisson(self.mean_len, n), 1)
+            ids = rng.choice(len(self.vocab), size=int(lengths.sum()), p=self.probs).astype(np.int32)
+            words = self.vocab[ids]
+            bounds = np.concatenate([[0], np.cumsum(lengths)])
+            for i in range(n):
+                yield f"doc_{start + i:07d}.txt", list(words[bounds[i]:bounds[i + 1]])
+
+    def token_docs(self):
+        """Dict {nama dokumen: list token}, format sama dengan hasil preprocessing."""
+        return dict(self.iter_token_docs())
+
+    def iter_raw_docs(self, chunk_size=10_000):
+        """Teks 'mentah' (kapital, angka, tanda baca, stopword) untuk menguji preprocessing."""
+        rng = np.random.default_rng(self.seed + 2)
+        for name, tokens in self.iter_token_docs(chunk_size):
+            words = []
+            for i, (token, r) in enumerate(zip(tokens, rng.random(len(tokens)))):
+                if r < 0.25:
+                    words.append(STOPWORDS[int(r * 1000) % len(STOPWORDS)])
+                words.append(token.capitalize() if i == 0 or r > 0.97 else token)
+                if r < 0.02:
+                    words.append(str(int(r * 100_000)))
+            yield name, " ".join(words) + "."
+
+    # === 3. QUERY LOG ===
+    def queries(self, n, max_terms=3, pool_size=None, seed=None):
+        """
+        Query log: kumpulan query unik (1..max_terms term, term diambil dari
+        distribusi Zipf), lalu query dipilih ulang secara Zipf juga sehingga
+        query populer sering berulang seperti log sungguhan.
+        """
+        rng = np.random.default_rng(self.seed + 3 if seed is None else seed)
+        pool_size = pool_size or max(10, n // 4)
+        lengths = rng.integers(1, max_terms + 1, pool_size)
+        ids = rng.choice(len(self.vocab), size=int(lengths.sum()), p=self.probs)
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        pool = [" ".join(self.vocab[ids[bounds[i]:bounds[i + 1]]]) for i in range(pool_size)]
+        picks = rng.choice(pool_size, size=n, p=zipf_probabilities(pool_size))
+        return [pool[i] for i in picks]
+
+    def boolean_queries(self, n, seed=None):
+        """Query Boolean dari query log: 'a AND b', 'a OR b', 'a AND NOT b', atau satu term."""
+        rng = np.random.default_rng(self.seed + 4 if seed is None else seed)
+        result = []
+        for query in self.queries(n, max_terms=2, seed=seed):
+            terms = query.split()
+            if len(terms) == 1:
+                result.append(terms[0])
+            else:
+                op = ["AND", "OR", "AND NOT"][rng.integers(3)]
+                result.append(f"{terms[0]} {op} {terms[1]}")
+        return result
+
+
+# === 4. TULIS KE DISK ===
+def write_corpus(corpus, out_dir, raw=False):
+    """Tulis satu file .txt per dokumen (format data/processed, atau data/raw jika raw=True)."""
+    os.makedirs(out_dir, exist_ok=True)
+    docs = corpus.iter_raw_docs() if raw else ((n, " ".join(t)) for n, t in corpus.iter_token_docs())
+    count = 0
+    for name, text in docs:
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+        count += 1
+    return count
+
+
+# === 5. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator korpus sintetis (vocabulary Zipfian) + query log")
+    parser.add_argument("--docs", type=int, default=10_000, help="Jumlah dokumen")
+    parser.add_argument("--mean-len", type=int, default=60, help="Rata-rata jumlah token per dokumen")
+    parser.add_argument("--out", default="data/synthetic", help="Folder output dokumen")
+    parser.add_argument("--raw", action="store_true", help="Tulis teks mentah (untuk preprocess.py)")
+    parser.add_argument("--queries", type=int, default=1000, help="Jumlah query di query log")
+    parser.add_argument("--queries-out", default="data/synthetic_queries.txt", help="File output query log")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(args.docs, args.mean_len, seed=args.seed)
+    count = write_corpus(corpus, args.out, raw=args.raw)
+    with open(args.queries_out, "w", encoding="utf-8") as f:
+        f.write("\n".join(corpus.queries(args.queries)) + "\n")
+    print(f"✅ {count} dokumen sintetis di {args.out} (vocabulary: {len(corpus.vocab)} kata)")
+    print(f"✅ {args.queries} query di {args.queries_out}")
@@ -0,0 +1,157 @@
+# src/term_dict.py
+
+import os
+from bisect import bisect_right
+from collections.abc import Mapping
+import numpy as np
+
+# Jumlah term per blok front coding. Blok lebih besar = lebih kecil di disk,
+# tetapi lookup men-decode lebih banyak term.
+BLOCK_SIZE = 16
+
+
+# === 1. VARINT (byte per byte, untuk string pendek) ===
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(buf, pos):
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+# === 2. KAMUS TERM FRONT-CODED ===
+class TermDictionary(Mapping):
+    """
+    Kamus term -> term ID (integer padat, urutan leksikografis) dalam dua array:
+    - data   : blok berisi BLOCK_SIZE term. Term pertama blok disimpan utuh
+               (panjang + byte UTF-8), term berikutnya hanya panjang prefix yang
+               sama dengan term sebelumnya + sisa byte (front coding)
+    - blocks : offset byte awal setiap blok
+    Lookup = binary search di term pertama tiap blok + decode satu blok.
+    Bisa dipakai seperti dict vocabulary (get, in, [term], len, iterasi terurut)
+    dan di-memory-map dari disk tanpa membangun string per term.
+    """
+
+    def __init__(self, data, blocks, n_terms, block_size=BLOCK_SIZE):
+        self.data = data
+        self.blocks = blocks
+        self.n_terms = int(n_terms)
+        self.block_size = block_size
+        self._heads = None
+
+    @classmethod
+    def build(cls, terms, block_size=BLOCK_SIZE):
+        """terms: term unik yang sudah terurut (term ID = posisi)."""
+        out = bytearray()
+        blocks = []
+        prev = b""
+        n = 0
+        for i, term in enumerate(terms):
+            raw = term.encode("utf-8")
+            if i and raw <= prev:
+                raise ValueError(f"Term harus unik dan terurut: {term!r} setelah {prev.decode('utf-8')!r}.")
+            if i % block_size == 0:
+                blocks.append(len(out))
+                _put_varint(out, len(raw))
+                out += raw
+            else:
+                shared = 0
+                limit = min(len(prev), len(raw))
+                while shared < limit and prev[shared] == raw[shared]:
+                    shared += 1
+                _put_varint(out, shared)
+                _put_varint(out, len(raw) - shared)
+                out += raw[shared:]
+            prev = raw
+            n += 1
+        return cls(np.frombuffer(bytes(out), dtype=np.uint8), np.asarray(blocks, dtype=np.int64), n, block_size)
+
+    # --- simpan / muat (array .npy, bisa mmap) ---
+    def save(self, out_dir, name):
+        np.save(os.path.join(out_dir, f"{name}_data.npy"), np.asarray(self.data, dtype=np.uint8))
+        np.save(os.path.join(out_dir, f"{name}_blocks.npy"), np.asarray(self.blocks, dtype=np.int64))
+
+    @classmethod
+    def load(cls, index_dir, name, n_terms, mmap_mode="r"):
+        data = np.load(os.path.join(index_dir, f"{name}_data.npy"), mmap_mode=mmap_mode)
+        blocks = np.load(os.path.join(index_dir, f"{name}_blocks.npy"), mmap_mode=mmap_mode)
+        return cls(data, blocks, n_terms)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.blocks.nbytes
+
+    # --- decode ---
+    def _decode_block(self, block):
+        """Semua term di satu blok (list str)."""
+        start = int(self.blocks[block])
+        end = int(self.blocks[block + 1]) if block + 1 < len(self.blocks) else len(self.data)
+        buf = bytes(self.data[start:end])
+        length, pos = _get_varint(buf, 0)
+        prev = buf[pos:pos + length]
+        pos += length
+        terms = [prev]
+        count = min(self.block_size, self.n_terms - block * self.block_size)
+        for _ in range(count - 1):
+            shared, pos = _get_varint(buf, pos)
+            length, pos = _get_varint(buf, pos)
+            prev = prev[:shared] + buf[pos:pos + length]
+            pos += length
+            terms.append(prev)
+        return [t.decode("utf-8") for t in terms]
+
+    def _block_heads(self):
+        # Term pertama tiap blok (1/BLOCK_SIZE dari vocabulary) di-decode sekali saat lookup pertama
+        if self._heads is None:
+            heads = []
+            data = self.data
+            for start in self.blocks:
+                start = int(start)
+                length, pos = _get_varint(bytes(data[start:start + 10]), 0)
+                heads.append(bytes(data[start + pos:start + pos + length]).decode("utf-8"))
+            self._heads = heads
+        return self._heads
+
+    def term(self, term_id):
+        """Term ID -> term."""
+        if not 0 <= term_id < self.n_terms:
+            raise IndexError(term_id)
+        return self._decode_block(term_id // self.block_size)[term_id % self.block_size]
+
+    def get(self, term, default=None):
+        if not self.n_terms:
+            return default
+        block = bisect_right(self._block_heads(), term) - 1
+        if block < 0:
+            return default
+        terms = self._decode_block(block)
+        i = bisect_right(terms, term) - 1
+        if i >= 0 and terms[i] == term:
+            return block * self.block_size + i
+        return default
+
+    def __getitem__(self, term):
+        term_id = self.get(term)
+        if term_id is None:
+            raise KeyError(term)
+        return term_id
+
+    def __contains__(self, term):
+        return isinstance(term, str) and self.get(term) is not None
+
+    def __len__(self):
+        return self.n_terms
+
+    def __iter__(self):
+        for block in range(len(self.blocks)):
+            yield from self._decode_block(block)
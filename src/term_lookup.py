@@ -0,0 +1,168 @@
+# src/term_lookup.py
+
+import os
+import re
+import numpy as np
+from collections import OrderedDict
+from collections.abc import Mapping
+from postings import intersect_sorted, union_sorted
+from term_dict import TermDictionary
+
+# Penanda awal/akhir term untuk pencarian prefix/suffix ("$pedang$")
+BOUNDARY = "$"
+
+
+# === 1. INDEX N-GRAM KARAKTER UNTUK VOCABULARY ===
+class NgramTermIndex:
+    """
+    Index n-gram karakter (default trigram) -> term ID terurut.
+    Pencarian substring/prefix/wildcard cukup mengiris postings n-gram
+    dari pola, lalu memverifikasi kandidat, sehingga biayanya sebanding
+    dengan jumlah kandidat dan bukan dengan ukuran vocabulary.
+    Bisa disimpan bersama index (save/load) agar tidak dibangun ulang per proses.
+    """
+
+    def __init__(self, terms, n=3, grams=None):
+        self.n = n
+        # TermDictionary (index di disk) tidak di-decode seluruhnya: term kandidat diambil per ID
+        self.terms = terms if isinstance(terms, TermDictionary) else list(terms)
+        self._term = terms.term if isinstance(terms, TermDictionary) else self.terms.__getitem__
+        if grams is not None:
+            self.grams = grams
+            return
+        grams = {}
+        for tid, term in enumerate(self.terms):
+            for gram in self._grams(BOUNDARY + term + BOUNDARY):
+                ids = grams.setdefault(gram, [])
+                if not ids or ids[-1] != tid:
+                    ids.append(tid)
+        self.grams = {g: np.asarray(ids, dtype=np.int32) for g, ids in grams.items()}
+
+    def save(self, out_dir):
+        """ngram_*.npy: kamus n-gram (TermDictionary) + postings term ID per n-gram. Mengembalikan jumlah n-gram."""
+        names = sorted(self.grams)
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self.grams[g]) for g in names])
+        ids = np.concatenate([self.grams[g] for g in names]) if names else np.empty(0, dtype=np.int32)
+        TermDictionary.build(names).save(out_dir, "ngram")
+        np.save(os.path.join(out_dir, "ngram_offsets.npy"), offsets)
+        np.save(os.path.join(out_dir, "ngram_ids.npy"), ids.astype(np.int32))
+        return len(names)
+
+    @classmethod
+    def load(cls, index_dir, terms, n_grams, n=3, mmap_mode="r"):
+        grams = _GramPostings(
+            TermDictionary.load(index_dir, "ngram", n_grams, mmap_mode),
+            np.load(os.path.join(index_dir, "ngram_offsets.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(index_dir, "ngram_ids.npy"), mmap_mode=mmap_mode),
+        )
+        return cls(terms, n, grams)
+
+    def _grams(self, text):
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def _candidates(self, pieces):
+        """Irisan postings n-gram dari semua potongan pola (None = semua term)."""
+        result = None
+        for piece in pieces:
+            if len(piece) >= self.n:
+                for gram in self._grams(piece):
+                    ids = self.grams.get(gram)
+                    if ids is None:
+                        return np.empty(0, dtype=np.int32)
+                    result = ids if result is None else intersect_sorted(result, ids)
+            elif piece.strip(BOUNDARY):
+                # Potongan pendek: gabungkan n-gram yang memuatnya (jumlah n-gram
+                # dibatasi alfabet, tidak tumbuh bersama vocabulary)
+                ids = union_sorted([v for g, v in self.grams.items() if piece in g])
+                result = ids if result is None else intersect_sorted(result, ids)
+        return result
+
+    def match(self, pattern):
+        """
+        Term yang cocok dengan pola:
+        - tanpa '*'  : substring (setara `pattern in term`)
+        - dengan '*' : wildcard penuh, mis. 'pedang*', '*an', 'pe*ng'
+        """
+        if "*" in pattern:
+            anchored = BOUNDARY + pattern + BOUNDARY
+            pieces = [p for p in anchored.split("*") if p]
+            regex = re.compile("^" + ".*".join(re.escape(p) for p in pattern.split("*")) + "$")
+            check = regex.match
+        else:
+            pieces = [pattern]
+            check = lambda term: pattern in term
+
+        candidates = self._candidates(pieces)
+        if candidates is None:
+            candidates = range(len(self.terms))
+        terms = (self._term(int(i)) for i in candidates)
+        return [term for term in terms if check(term)]
+
+
+class _GramPostings(Mapping):
+    """n-gram -> array term ID (view di atas array ngram_*.npy), pengganti dict NgramTermIndex.grams."""
+
+    def __init__(self, names, offsets, ids):
+        self.names = names
+        self.offsets = offsets
+        self.ids = ids
+
+    def __getitem__(self, gram):
+        i = self.names.get(gram)
+        if i is None:
+            raise KeyError(gram)
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def get(self, gram, default=None):
+        i = self.names.get(gram)
+        return default if i is None else self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+# === 2. EKSPANSI TOKEN -> POSTINGS (DENGAN CACHE PER POLA) ===
+class TermExpander:
+    """Gabungan postings semua term yang cocok dengan pola, di-cache (LRU) per pola."""
+
+    def __init__(self, inverted_index, n=3, cache_size=1024, term_index=None):
+        self.inverted_index = inverted_index
+        # term_index: NgramTermIndex yang sudah ada (mis. dimuat dari index di disk)
+        self.term_index = term_index or NgramTermIndex(sorted(inverted_index.keys()), n=n)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    @property
+    def compact(self):
+        return hasattr(self.inverted_index, "doc_ids")
+
+    def expand(self, pattern):
+        """
+        Postings gabungan untuk pola: array doc ID terurut jika index kompak,
+        atau frozenset nama dokumen untuk dict inverted index biasa.
+        """
+        if pattern in self._cache:
+            self._cache.move_to_end(pattern)
+            return self._cache[pattern]
+
+        matched_terms = self.term_index.match(pattern)
+        if self.compact:
+            # Postings kompak: k-way merge doc ID
+            result = union_sorted([self.inverted_index.doc_ids(t) for t in matched_terms])
+        else:
+            result = frozenset().union(*(self.inverted_index.get(t, ()) for t in matched_terms))
+
+        self._cache[pattern] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def docs(self, pattern):
+        result = self.expand(pattern)
+        if self.compact:
+            return frozenset(self.inverted_index.to_names(result))
+        return result
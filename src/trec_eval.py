@@ -0,0 +1,226 @@
+# src/trec_eval.py
+
+import sys
+import argparse
+import numpy as np
+
+
+# === 1. FORMAT TREC: QRELS & RUN ===
+# qrels : "qid 0 docno relevansi"          (relevansi bertingkat: 0, 1, 2, ...)
+# run   : "qid Q0 docno rank skor tag"     (urutan dokumen = skor menurun)
+def read_qrels(path):
+    """File qrels -> kolom (qid, docno, relevansi) sebagai array NumPy."""
+    qids, docs, grades = [], [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) != 4:
+                raise ValueError(f"{path}:{lineno}: qrels harus 4 kolom (qid 0 docno rel).")
+            qids.append(parts[0])
+            docs.append(parts[2])
+            grades.append(int(parts[3]))
+    return np.asarray(qids, dtype=str), np.asarray(docs, dtype=str), np.asarray(grades, dtype=np.int64)
+
+
+def read_run(path):
+    """File run -> kolom (qid, docno, skor). Kolom rank diabaikan, seperti trec_eval."""
+    qids, docs, scores = [], [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            parts = line.split()
+            if not parts:
+                continue
+            if len(parts) != 6:
+                raise ValueError(f"{path}:{lineno}: run harus 6 kolom (qid Q0 docno rank skor tag).")
+            qids.append(parts[0])
+            docs.append(parts[2])
+            scores.append(float(parts[4]))
+    return np.asarray(qids, dtype=str), np.asarray(docs, dtype=str), np.asarray(scores, dtype=np.float64)
+
+
+def write_qrels(path, qrels):
+    with open(path, "w", encoding="utf-8") as f:
+        for qid, doc, grade in zip(*qrels):
+            f.write(f"{qid} 0 {doc} {grade}\n")
+
+
+def write_run(path, run, tag="stki"):
+    qids, docs, scores = run
+    with open(path, "w", encoding="utf-8") as f:
+        rank = 0
+        for i, (qid, doc, score) in enumerate(zip(qids, docs, scores)):
+            rank = rank + 1 if i and qids[i - 1] == qid else 1
+            f.write(f"{qid} Q0 {doc} {rank} {score:.6f} {tag}\n")
+
+
+# === 2. KONVERSI DARI STRUKTUR PYTHON ===
+def qrels_from_gold(gold):
+    """{qid: [doc relevan]} atau {qid: {doc: relevansi}} -> kolom qrels."""
+    rows = [(str(qid), doc, grade) for qid, judged in gold.items()
+            for doc, grade in (judged.items() if isinstance(judged, dict) else ((d, 1) for d in judged))]
+    qids, docs, grades = zip(*rows) if rows else ((), (), ())
+    return np.asarray(qids, dtype=str), np.asarray(docs, dtype=str), np.asarray(grades, dtype=np.int64)
+
+
+def run_from_results(results):
+    """
+    {qid: [(doc, skor), ...]} atau {qid: [doc, ...]} (urut peringkat) -> kolom run.
+    Tanpa skor, skor sintetis menurun dibuat dari peringkat.
+    """
+    qids, docs, scores = [], [], []
+    for qid, ranked in results.items():
+        for rank, item in enumerate(ranked):
+            doc, score = item if isinstance(item, tuple) else (item, -float(rank))
+            qids.append(str(qid))
+            docs.append(doc)
+            scores.append(float(score))
+    return np.asarray(qids, dtype=str), np.asarray(docs, dtype=str), np.asarray(scores, dtype=np.float64)
+
+
+# === 3. MATRIKS RELEVANSI (vectorized) ===
+def _rank_within(groups):
+    """Peringkat 0, 1, 2, ... di dalam setiap grup (array grup sudah berurutan)."""
+    if not len(groups):
+        return groups
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    return np.arange(len(groups)) - np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+
+
+def relevance_matrix(run, qrels, k):
+    """
+    Gabungkan run dan qrels tanpa loop per query:
+    - gains     : (n_query x k) relevansi dokumen di peringkat 1..k (0 = tidak relevan / tidak ada)
+    - ideal     : (n_query x k) relevansi terbaik yang mungkin (qrels diurutkan menurun)
+    - retrieved : jumlah dokumen yang dikembalikan (<= k) per query
+    - n_rel     : jumlah dokumen relevan (relevansi > 0) per query
+    Query yang dievaluasi = query di qrels dengan minimal satu dokumen relevan;
+    query tanpa run dihitung 0 (seperti trec_eval -c).
+    """
+    # String lebar tetap (dtype 'U') jauh lebih cepat diurutkan daripada array object
+    run_q, run_d, run_s = np.asarray(run[0], dtype=str), np.asarray(run[1], dtype=str), np.asarray(run[2])
+    rel_q, rel_d, rel_g = np.asarray(qrels[0], dtype=str), np.asarray(qrels[1], dtype=str), np.asarray(qrels[2])
+    positive = rel_g > 0
+    qids = np.unique(rel_q[positive])
+    n_q = len(qids)
+    if not n_q:
+        empty = np.zeros((0, k))
+        return qids, empty, empty, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # ID integer untuk dokumen (run + qrels) dan query
+    doc_ids = np.unique(np.concatenate([run_d, rel_d]), return_inverse=True)[1].astype(np.int64)
+    run_doc, rel_doc = doc_ids[:len(run_d)], doc_ids[len(run_d):]
+    n_docs = int(doc_ids.max()) + 1
+
+    def query_index(q):
+        idx = np.minimum(np.searchsorted(qids, q), n_q - 1)
+        return idx, qids[idx] == q
+
+    # --- qrels: kunci (query, dokumen) terurut untuk join dengan run ---
+    rq, rfound = query_index(rel_q)
+    rkeys = rq[rfound] * n_docs + rel_doc[rfound]
+    rgrades = rel_g[rfound]
+    order = np.argsort(rkeys, kind="stable")
+    rkeys, rgrades = rkeys[order], rgrades[order]
+
+    n_rel = np.bincount(rq[rfound & positive], minlength=n_q)
+    ideal = np.zeros((n_q, k))
+    pos_q, pos_g = rq[rfound & positive], rel_g[rfound & positive]
+    order = np.lexsort((-pos_g, pos_q))
+    pos_q, pos_g = pos_q[order], pos_g[order]
+    rank = _rank_within(pos_q)
+    keep = rank < k
+    ideal[pos_q[keep], rank[keep]] = pos_g[keep]
+
+    # --- run: urutkan per query (skor menurun, seri: urutan file), ambil top-k ---
+    q, found = query_index(run_q)
+    q, d, s, line = q[found], run_doc[found], run_s[found], np.flatnonzero(found)
+    order = np.lexsort((line, -s, q))
+    q, d = q[order], d[order]
+    rank = _rank_within(q)
+    keep = rank < k
+    q, d, rank = q[keep], d[keep], rank[keep]
+
+    keys = q * n_docs + d
+    pos = np.searchsorted(rkeys, keys)
+    hit = pos < len(rkeys)
+    hit[hit] = rkeys[pos[hit]] == keys[hit]
+    gains = np.zeros((n_q, k))
+    gains[q[hit], rank[hit]] = rgrades[pos[hit]]
+    retrieved = np.bincount(q, minlength=n_q)
+    return qids, gains, ideal, retrieved, n_rel
+
+
+# === 4. METRIK PER QUERY + AGREGAT ===
+def evaluate(run, qrels, k=3, ap_norm="min_k", gain="linear"):
+    """
+    Semua metrik @k untuk semua query sekaligus (operasi matriks n_query x k):
+    P, recall, F1, MAP (AP@k), nDCG (bertingkat), RR (reciprocal rank).
+    ap_norm="min_k"   : AP dibagi min(n_rel, k)  (sama dengan eval.map_at_k)
+    ap_norm="relevant": AP dibagi n_rel          (sama dengan weighting_and_eval.map_at_k)
+    gain="linear" memakai relevansi apa adanya, "exponential" memakai 2^rel - 1.
+    Mengembalikan (qids, {metrik: array per query}).
+    """
+    qids, gains, ideal, retrieved, n_rel = relevance_matrix(run, qrels, k)
+    relevant = gains > 0
+    hits = relevant.sum(axis=1)
+    ranks = np.arange(1, k + 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(retrieved > 0, hits / retrieved, 0.0)
+        recall = np.where(n_rel > 0, hits / n_rel, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        # AP@k: presisi di setiap peringkat yang relevan
+        prec_at_rank = np.cumsum(relevant, axis=1) / ranks
+        norm = np.minimum(n_rel, k) if ap_norm == "min_k" else n_rel
+        average_precision = np.where(norm > 0, (prec_at_rank * relevant).sum(axis=1) / norm, 0.0)
+
+        discount = 1 / np.log2(ranks + 1)
+        to_gain = (lambda g: g) if gain == "linear" else (lambda g: 2 ** g - 1)
+        dcg = to_gain(gains) @ discount
+        idcg = to_gain(ideal) @ discount
+        ndcg = np.where(idcg > 0, dcg / idcg, 0.0)
+
+    first = np.where(relevant.any(axis=1), relevant.argmax(axis=1) + 1, 0)
+    rr = np.where(first > 0, 1 / np.maximum(first, 1), 0.0)
+    return qids, {"P": precision, "recall": recall, "F1": f1, "MAP": average_precision, "nDCG": ndcg, "RR": rr}
+
+
+def summarize(per_query):
+    """Rata-rata setiap metrik atas semua query."""
+    return {name: float(values.mean()) if len(values) else 0.0 for name, values in per_query.items()}
+
+
+def report(qids, per_query, k, per_query_rows=False, file=None):
+    """Cetak tabel gaya trec_eval: baris per query (opsional) lalu baris 'all'."""
+    file = file or sys.stdout
+    names = list(per_query)
+    print(f"{'qid':<20} " + " ".join(f"{f'{n}@{k}':>9}" for n in names), file=file)
+    if per_query_rows:
+        for i, qid in enumerate(qids):
+            print(f"{str(qid):<20} " + " ".join(f"{per_query[n][i]:>9.4f}" for n in names), file=file)
+    summary = summarize(per_query)
+    print(f"{'all':<20} " + " ".join(f"{summary[n]:>9.4f}" for n in names), file=file)
+    print(f"Jumlah query: {len(qids)}", file=file)
+    return summary
+
+
+# === 5. MAIN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluasi run TREC terhadap qrels (vectorized, metrik @k)")
+    parser.add_argument("qrels", help="File qrels: qid 0 docno relevansi")
+    parser.add_argument("run", nargs="+", help="Satu atau lebih file run: qid Q0 docno rank skor tag")
+    parser.add_argument("-k", type=int, default=10, help="Cutoff peringkat (default 10)")
+    parser.add_argument("-q", action="store_true", help="Tampilkan metrik per query")
+    parser.add_argument("--ap-norm", choices=["min_k", "relevant"], default="min_k",
+                        help="Pembagi AP: min(n_rel, k) atau n_rel")
+    parser.add_argument("--gain", choices=["linear", "exponential"], default="linear", help="Gain nDCG bertingkat")
+    args = parser.parse_args()
+
+    qrels = read_qrels(args.qrels)
+    for path in args.run:
+        print(f"\n=== {path} ===")
+        qids, per_query = evaluate(read_run(path), qrels, args.k, args.ap_norm, args.gain)
+        report(qids, per_query, args.k, args.q)
@@ -1,28 +1,12 @@
 # src/vector_space_model.py
 
-import os
-import re
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from ranking import ranked_results
+from corpus import load_texts
 
 # === 1. LOAD DOKUMEN YANG SUDAH DIPROSES ===
-def load_documents(folder):
-    docs = {}
-    if not os.path.exists(folder):
-        print(f"[ERROR] Folder '{folder}' tidak ditemukan.")
-        return docs
-
-    for filename in os.listdir(folder):
-        if filename.endswith(".txt"):
-            path = os.path.join(folder, filename)
-            with open(path, "r", encoding="utf-8") as f:
-                text = f.read().strip()
-                # Hapus karakter non-huruf agar tidak error
-                text = re.sub(r'[^a-zA-Z\s]', ' ', text)
-                if text:  # hanya tambahkan kalau tidak kosong
-                    docs[filename] = text
-    return docs
+# load_texts diimpor dari corpus.py (dokumen kosong dilewati dengan skip_empty=True).
 
 
 # === 2. BANGUN TF-IDF MATRIX ===
@@ -38,12 +22,21 @@ def vectorize_query(query, vectorizer):
     return vectorizer.transform([query])
 
 
+def vectorize_queries(queries, vectorizer):
+    # Satu matriks sparse untuk seluruh query (baris = query)
+    return vectorizer.transform(queries)
+
+
 # === 4. HITUNG COSINE SIMILARITY DAN RANKING ===
 def rank_documents(tfidf_matrix, query_vector, doc_names, k=3):
-    cosine_sim = cosine_similarity(query_vector, tfidf_matrix).flatten()
-    ranked_indices = cosine_sim.argsort()[::-1]
-    ranked_docs = [(doc_names[i], cosine_sim[i]) for i in ranked_indices[:k]]
-    return ranked_docs
+    return rank_documents_batch(tfidf_matrix, query_vector, doc_names, k)[0]
+
+
+def rank_documents_batch(tfidf_matrix, query_matrix, doc_names, k=3):
+    """Cosine similarity Q · Dᵀ untuk semua query sekaligus, top-k per baris."""
+    # Baris TF-IDF sudah l2-normalized, jadi cosine cukup dot product (tanpa normalisasi ulang)
+    cosine_sim = (query_matrix @ tfidf_matrix.T).toarray()
+    return ranked_results(cosine_sim, doc_names, k)
 
 
 # === 5. PRECISION@K ===
@@ -56,7 +49,7 @@ def precision_at_k(predicted, gold):
 if __name__ == "__main__":
     # ✅ Pastikan path ke folder processed benar
     data_folder = "D:/TUUUUUGGGGGGAAAAASSSSSSS/stki-uts-A11.2023.15390-AtanasiusMarcello/data/processed"
-    docs = load_documents(data_folder)
+    docs = load_texts(data_folder, skip_empty=True)
     doc_names = list(docs.keys())
 
     print(f"Total dokumen: {len(docs)}\n")
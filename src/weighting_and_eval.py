@@ -1,22 +1,12 @@
 import os
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from ranking import ranked_results
+from corpus import load_texts
+from trec_eval import evaluate, qrels_from_gold, run_from_results
 
 # === 1. LOAD DOKUMEN YANG SUDAH DIPROSES ===
-def load_documents(folder):
-    docs = {}
-    if not os.path.exists(folder):
-        print(f"[ERROR] Folder '{folder}' tidak ditemukan.")
-        return docs
-    for filename in os.listdir(folder):
-        if filename.endswith(".txt"):
-            path = os.path.join(folder, filename)
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:
-                    docs[filename] = content
-    return docs
+# load_texts diimpor dari corpus.py (dokumen kosong dilewati dengan skip_empty=True).
 
 
 # === 2. TF-IDF normal ===
@@ -35,15 +25,18 @@ def build_tfidf_sublinear(docs):
 
 # === 4. Ranking dokumen berdasarkan cosine similarity ===
 def rank_documents(vectorizer, tfidf_matrix, docs, query, k=3):
-    query_vec = vectorizer.transform([query])
-    cosine_sim = cosine_similarity(query_vec, tfidf_matrix).flatten()
+    return rank_documents_batch(vectorizer, tfidf_matrix, docs, [query], k)[0]
+
+
+def rank_documents_batch(vectorizer, tfidf_matrix, docs, queries, k=3):
+    query_matrix = vectorizer.transform(queries)
+    cosine_sim = (query_matrix @ tfidf_matrix.T).toarray()  # norm="l2": cosine = dot product
     doc_names = list(docs.keys())
-    ranked_indices = cosine_sim.argsort()[::-1]
-    top_docs = [(doc_names[i], cosine_sim[i]) for i in ranked_indices[:k]]
-    return top_docs
+    return ranked_results(cosine_sim, doc_names, k)
 
 
 # === 5. Evaluation metrics ===
+# Versi per query (referensi); main memakai trec_eval.evaluate (vectorized).
 def precision_at_k(predicted, gold):
     relevant = sum(1 for doc, _ in predicted if doc in gold)
     return relevant / len(predicted) if predicted else 0.0
@@ -68,7 +61,7 @@ if __name__ == "__main__":
     base_dir = os.path.dirname(os.path.abspath(__file__))
     data_folder = os.path.join(base_dir, "../data/processed")
 
-    docs = load_documents(data_folder)
+    docs = load_texts(data_folder, skip_empty=True)
     print(f"Total dokumen: {len(docs)}\n")
 
     if not docs:
@@ -82,6 +75,8 @@ if __name__ == "__main__":
         {"query": "ilmu sains pengetahuan", "gold": ["buku_sains.txt"]},
     ]
 
+    qrels = qrels_from_gold({test["query"]: test["gold"] for test in tests})
+
     models = {
         "TF-IDF Normal": build_tfidf,
         "TF-IDF Sublinear": build_tfidf_sublinear,
@@ -94,29 +89,20 @@ if __name__ == "__main__":
         print(f"🔹 Evaluasi Model: {model_name}")
         vectorizer, tfidf_matrix = builder(docs)
 
-        precisions = []
-        predicted_lists = []
-        gold_lists = []
-
-        for test in tests:
-            query = test["query"]
-            gold = test["gold"]
-
-            top_docs = rank_documents(vectorizer, tfidf_matrix, docs, query, k=3)
-            prec = precision_at_k(top_docs, gold)
-            precisions.append(prec)
-            predicted_lists.append(top_docs)
-            gold_lists.append(gold)
+        queries = [test["query"] for test in tests]
+        results = dict(zip(queries, rank_documents_batch(vectorizer, tfidf_matrix, docs, queries, k=3)))
+        # AP dibagi jumlah dokumen relevan, sama dengan map_at_k di atas
+        qids, per_query = evaluate(run_from_results(results), qrels, k=3, ap_norm="relevant")
+        row = {qid: i for i, qid in enumerate(qids)}
 
+        for query in queries:
             print(f"\nQuery: {query}")
-            for rank, (doc, score) in enumerate(top_docs, 1):
+            for rank, (doc, score) in enumerate(results[query], 1):
                 snippet = docs[doc][:100].replace("\n", " ")
                 print(f"{rank}. {doc:<25} | cosine={score:.4f} | {snippet}")
-            print(f"Precision@3: {prec:.2f}")
+            print(f"Precision@3: {per_query['P'][row[query]]:.2f}")
 
-        mean_prec = np.mean(precisions)
-        mapk = map_at_k(predicted_lists, gold_lists)
-        eval_results[model_name] = {"Precision@3": mean_prec, "MAP@3": mapk}
+        eval_results[model_name] = {"Precision@3": per_query["P"].mean(), "MAP@3": per_query["MAP"].mean()}
 
     print("\n" + "=" * 70)
     print("📊 Ringkasan Evaluasi Model:")